@@ -0,0 +1,121 @@
+"""Agregados con SQL sobre transacciones frente al motor NumPy (LedgerArrays).
+
+Calcula totales por tipo, gastos por categoría, ingresos y gastos por mes y
+el saldo acumulado de cada transacción, primero con consultas SQL que
+recorren transacciones y después con finanzas.core.analytics sobre los
+arreglos ya cargados. La carga de los arreglos se informa por separado.
+Comprueba además que ambos caminos dan los mismos centavos.
+
+Uso: python benchmarks/bench_analytics.py [--rows 1000000] [--db RUTA]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from finanzas.core import Ledger
+from finanzas.core.analytics import LedgerArrays
+from finanzas.core.schema import DEFAULT_CATEGORIES
+
+SQL_QUERIES = {
+    'totales': '''
+        SELECT tipo, SUM(monto) FROM transacciones GROUP BY tipo
+    ''',
+    'por categoría': '''
+        SELECT c.nombre, SUM(t.monto) FROM transacciones t
+        JOIN categorias c ON c.id = t.categoria_id
+        WHERE t.tipo = 'Gasto'
+        GROUP BY t.categoria_id ORDER BY SUM(t.monto) DESC
+    ''',
+    'por mes': '''
+        SELECT substr(fecha, 1, 7), SUM(CASE WHEN tipo = 'Ingreso' THEN monto ELSE 0 END),
+               SUM(CASE WHEN tipo = 'Gasto' THEN monto ELSE 0 END)
+        FROM transacciones GROUP BY substr(fecha, 1, 7)
+    ''',
+    'saldo acumulado': '''
+        SELECT SUM(CASE WHEN tipo = 'Ingreso' THEN monto ELSE -monto END) OVER (ORDER BY fecha, id)
+        FROM transacciones
+    ''',
+}
+
+ARRAY_QUERIES = {
+    'totales': LedgerArrays.totals,
+    'por categoría': LedgerArrays.by_category,
+    'por mes': LedgerArrays.monthly,
+    'saldo acumulado': LedgerArrays.running_balance,
+}
+
+
+def populate(ledger, rows, seed=42):
+    rng = random.Random(seed)
+    category_ids = dict((nombre, cat_id) for cat_id, nombre, tipo in ledger.categories.all())
+    
+    def generate():
+        for _ in range(rows):
+            nombre, tipo = rng.choice(DEFAULT_CATEGORIES)
+            fecha = f"{rng.randint(2015, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+            yield tipo, category_ids[nombre], rng.randint(100, 200000), fecha, "movimiento"
+    
+    ledger.conn.executemany(
+        'INSERT INTO transacciones (tipo, categoria_id, monto, fecha, descripcion) VALUES (?, ?, ?, ?, ?)',
+        generate()
+    )
+    ledger.conn.commit()
+
+
+def best_of(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--db', help="ruta de la base temporal (por defecto en un directorio temporal)")
+    args = parser.parse_args()
+    
+    workdir = None if args.db else tempfile.mkdtemp()
+    path = args.db or os.path.join(workdir, 'bench_analytics.db')
+    if os.path.exists(path):
+        os.remove(path)
+    
+    try:
+        with Ledger.open(path) as ledger:
+            start = time.perf_counter()
+            populate(ledger, args.rows)
+            print(f"{args.rows} filas generadas en {time.perf_counter() - start:.1f} s ({path})")
+            
+            arrays, load_time = best_of(lambda: LedgerArrays.load(ledger.conn), repeat=1)
+            print(f"carga de arreglos: {load_time * 1000:.0f} ms")
+            
+            for name, sql in SQL_QUERIES.items():
+                sql_rows, sql_time = best_of(lambda: ledger.conn.execute(sql).fetchall())
+                result, array_time = best_of(lambda: ARRAY_QUERIES[name](arrays))
+                print(f"{name}: SQL {sql_time * 1000:.1f} ms, NumPy {array_time * 1000:.1f} ms "
+                      f"(x{sql_time / max(array_time, 1e-9):.0f})")
+                
+                if name == 'totales':
+                    assert dict(sql_rows) == {'Ingreso': result[0], 'Gasto': result[1]}
+                elif name == 'por categoría':
+                    assert sorted(sql_rows) == sorted(result)
+                elif name == 'por mes':
+                    months = {mes: (income, expenses) for mes, income, expenses, balance in result}
+                    assert all(months[mes] == (income, expenses) for mes, income, expenses in sql_rows)
+                else:
+                    assert sql_rows[-1][0] == int(result[1][-1])
+    finally:
+        if workdir:
+            shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""Latencia de inserción y lecturas concurrentes con cada perfil de conexión.
+
+Para cada perfil de finanzas.core.db.PROFILES crea una base con filas de
+ejemplo, mide la latencia de TransactionStore.add (una transacción por
+inserción, como el formulario) y luego el rendimiento de varios lectores
+(resumen y primera página del historial) mientras un escritor inserta sin
+parar.
+
+Uso: python benchmarks/bench_connection.py [--rows 100000] [--inserts 500]
+     [--readers 4] [--seconds 5]
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from finanzas.core import PROFILES, Ledger
+from finanzas.core.schema import DEFAULT_CATEGORIES
+
+
+def populate(ledger, rows, seed=42):
+    rng = random.Random(seed)
+    category_ids = dict((nombre, cat_id) for cat_id, nombre, tipo in ledger.categories.all())
+    
+    def generate():
+        for _ in range(rows):
+            nombre, tipo = rng.choice(DEFAULT_CATEGORIES)
+            fecha = f"{rng.randint(2015, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+            yield tipo, category_ids[nombre], rng.randint(100, 200000), fecha, "movimiento"
+    
+    ledger.conn.executemany(
+        'INSERT INTO transacciones (tipo, categoria_id, monto, fecha, descripcion) VALUES (?, ?, ?, ?, ?)',
+        generate()
+    )
+    ledger.conn.commit()
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def bench_inserts(path, profile, count):
+    latencies = []
+    with Ledger.open(path, profile) as ledger:
+        for number in range(count):
+            start = time.perf_counter()
+            ledger.transactions.add('Gasto', 'Alimentos', '12.50', '2024-06-01', f"insercion {number}")
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def bench_concurrent(path, profile, readers, seconds):
+    stop = threading.Event()
+    reads = [0] * readers
+    read_latencies = [[] for _ in range(readers)]
+    writes = [0]
+    errors = []
+    
+    def reader(number):
+        with Ledger.open(path, profile) as ledger:
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    ledger.summary.totals()
+                    ledger.transactions.page('Gasto')
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                read_latencies[number].append(time.perf_counter() - start)
+                reads[number] += 1
+    
+    def writer():
+        with Ledger.open(path, profile) as ledger:
+            while not stop.is_set():
+                try:
+                    ledger.transactions.add('Ingreso', 'Salario', '100', '2024-06-02', "concurrente")
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                writes[0] += 1
+    
+    threads = [threading.Thread(target=reader, args=(number,)) for number in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    
+    latencies = [value for values in read_latencies for value in values]
+    return sum(reads) / seconds, writes[0] / seconds, latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--inserts', type=int, default=500)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+    
+    workdir = tempfile.mkdtemp()
+    template = os.path.join(workdir, 'plantilla.db')
+    with Ledger.open(template, 'classic') as ledger:
+        populate(ledger, args.rows)
+    
+    try:
+        for profile in PROFILES:
+            path = os.path.join(workdir, f'{profile}.db')
+            shutil.copyfile(template, path)
+            
+            latencies = bench_inserts(path, profile, args.inserts)
+            print(f"== {profile} ==")
+            print(f"inserción: media {statistics.mean(latencies) * 1000:.3f} ms, "
+                  f"p50 {percentile(latencies, 0.5) * 1000:.3f} ms, "
+                  f"p95 {percentile(latencies, 0.95) * 1000:.3f} ms, "
+                  f"p99 {percentile(latencies, 0.99) * 1000:.3f} ms")
+            
+            read_rate, write_rate, read_latencies, errors = bench_concurrent(
+                path, profile, args.readers, args.seconds
+            )
+            print(f"{args.readers} lectores + 1 escritor: {read_rate:,.0f} lecturas/s, "
+                  f"{write_rate:,.0f} escrituras/s, "
+                  f"lectura p95 {percentile(read_latencies, 0.95) * 1000:.2f} ms, "
+                  f"máx {max(read_latencies) * 1000:.2f} ms, errores {len(errors)}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
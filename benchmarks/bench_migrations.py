@@ -0,0 +1,134 @@
+"""Planes de consulta y tiempos antes y después de migrar el esquema.
+
+Genera una base con el esquema original (versión 1), mide las consultas del
+historial, del resumen y de la gestión de categorías, aplica las migraciones
+pendientes y repite las mismas mediciones.
+
+Uso: python benchmarks/bench_migrations.py [--rows 1000000] [--db ruta]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from finanzas.core import migrate, schema_version
+from finanzas.core.schema import DEFAULT_CATEGORIES
+from finanzas.core.transactions import PAGE_SIZE
+
+# (nombre, consulta con el esquema original, consulta con el esquema migrado)
+QUERIES = [
+    (
+        "historial (todos)",
+        'SELECT id, fecha, tipo, categoria, monto, descripcion FROM transacciones '
+        'ORDER BY fecha DESC, id DESC LIMIT ?',
+        'SELECT t.id, t.fecha, t.tipo, c.nombre, t.monto, t.descripcion FROM transacciones t '
+        'JOIN categorias c ON c.id = t.categoria_id ORDER BY t.fecha DESC, t.id DESC LIMIT ?',
+    ),
+    (
+        "historial (gastos)",
+        'SELECT id, fecha, tipo, categoria, monto, descripcion FROM transacciones '
+        'WHERE tipo = \'Gasto\' ORDER BY fecha DESC, id DESC LIMIT ?',
+        'SELECT t.id, t.fecha, t.tipo, c.nombre, t.monto, t.descripcion FROM transacciones t '
+        'JOIN categorias c ON c.id = t.categoria_id WHERE t.tipo = \'Gasto\' '
+        'ORDER BY t.fecha DESC, t.id DESC LIMIT ?',
+    ),
+    (
+        "ingresos totales",
+        'SELECT SUM(monto) FROM transacciones WHERE tipo = \'Ingreso\'',
+        'SELECT SUM(monto) FROM transacciones WHERE tipo = \'Ingreso\'',
+    ),
+    (
+        "gastos por categoría",
+        'SELECT categoria, SUM(monto) FROM transacciones WHERE tipo = \'Gasto\' '
+        'GROUP BY categoria ORDER BY SUM(monto) DESC',
+        'SELECT c.nombre, SUM(t.monto) FROM transacciones t JOIN categorias c ON c.id = t.categoria_id '
+        'WHERE t.tipo = \'Gasto\' GROUP BY t.categoria_id ORDER BY SUM(t.monto) DESC',
+    ),
+    (
+        "uso de una categoría",
+        'SELECT COUNT(*) FROM transacciones WHERE categoria = '
+        '(SELECT nombre FROM categorias WHERE id = 1)',
+        'SELECT COUNT(*) FROM transacciones WHERE categoria_id = 1',
+    ),
+]
+
+
+def populate_legacy(conn, rows, seed=42):
+    rng = random.Random(seed)
+    categories = DEFAULT_CATEGORIES
+    
+    def generate():
+        for _ in range(rows):
+            nombre, tipo = rng.choice(categories)
+            fecha = f"{rng.randint(2015, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+            yield tipo, nombre, round(rng.uniform(1, 2000), 2), fecha, "movimiento"
+    
+    conn.executemany(
+        'INSERT INTO transacciones (tipo, categoria, monto, fecha, descripcion) VALUES (?, ?, ?, ?, ?)',
+        generate()
+    )
+    conn.commit()
+
+
+def measure(conn, sql, repeat=3):
+    params = (PAGE_SIZE,) if '?' in sql else ()
+    plan = [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params)]
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        best = min(best, time.perf_counter() - start)
+    return plan, best
+
+
+def report(title, conn, index):
+    print(f"\n== {title} (user_version={schema_version(conn)}) ==")
+    results = {}
+    for query in QUERIES:
+        plan, elapsed = measure(conn, query[index])
+        results[query[0]] = elapsed
+        print(f"{query[0]}: {elapsed * 1000:.2f} ms")
+        for step in plan:
+            print(f"    {step}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--db', help="ruta de la base temporal (por defecto en un directorio temporal)")
+    args = parser.parse_args()
+    
+    path = args.db or os.path.join(tempfile.mkdtemp(), 'bench_finanzas.db')
+    if os.path.exists(path):
+        os.remove(path)
+    
+    conn = sqlite3.connect(path)
+    migrate(conn, target=1)
+    
+    start = time.perf_counter()
+    populate_legacy(conn, args.rows)
+    print(f"{args.rows} filas generadas en {time.perf_counter() - start:.1f} s ({path})")
+    
+    before = report("antes de migrar", conn, 1)
+    
+    start = time.perf_counter()
+    migrate(conn)
+    print(f"\nmigración aplicada en {time.perf_counter() - start:.1f} s")
+    
+    after = report("después de migrar", conn, 2)
+    
+    print("\n== aceleración ==")
+    for name in before:
+        print(f"{name}: x{before[name] / max(after[name], 1e-9):.1f}")
+    
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
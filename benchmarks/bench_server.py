@@ -0,0 +1,189 @@
+"""Carga concurrente contra finanzas.server en localhost.
+
+Levanta el servidor en el mismo proceso (puerto libre, carpeta temporal),
+crea --ledgers libros con --rows transacciones sintéticas cada uno y lanza
+--clients clientes, cada uno con su conexión persistente y su libro, que
+durante --duration segundos alternan lecturas (página del historial,
+búsqueda, resumen, categorías) y altas de transacciones. Informa
+pedidos por segundo, latencias por operación y cuántas altas confirmó el
+escritor por transacción (group commit). Con --no-group el escritor
+confirma cada alta por separado, para comparar.
+
+Uso: python benchmarks/bench_server.py [--clients 100,200] [--duration 10]
+     [--rows 100000] [--ledgers 2] [--writes 0.2] [--no-group] [--output r.json]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import finanzas.server
+from finanzas.client import RemoteLedger
+from finanzas.core import Ledger
+from finanzas.server import LedgerServer
+from synthetic import CATEGORIES, populate
+
+SEARCH_WORDS = ('super', 'taxi', 'cine', 'farmacia', 'alquiler')
+
+
+def percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def latency_stats(samples):
+    samples = sorted(samples)
+    if not samples:
+        return {'n': 0}
+    return {
+        'n': len(samples),
+        'p50_ms': round(percentile(samples, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(samples, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(samples, 0.99) * 1000, 2),
+        'max_ms': round(samples[-1] * 1000, 2),
+    }
+
+
+def client(url, ledger_name, seed, writes, deadline, start, results):
+    rng = random.Random(seed)
+    remote = RemoteLedger(url, ledger_name)
+    gastos = [category[0] for category in CATEGORIES if category[1] == 'Gasto']
+    samples = {}
+    errors = 0
+    # La conexión se abre antes de medir, como la de un cliente ya en uso
+    remote.categories.all()
+    start.wait()
+    while time.perf_counter() < deadline:
+        roll = rng.random()
+        if roll < writes:
+            name = 'alta'
+            func = lambda: remote.transactions.add('Gasto', rng.choice(gastos), f'{rng.randint(100, 99_999) / 100}',
+                                                  '2026-10-18', 'carga')
+        elif roll < writes + (1 - writes) * 0.6:
+            name = 'página'
+            func = lambda: remote.transactions.page(limit=200)
+        elif roll < writes + (1 - writes) * 0.75:
+            name = 'búsqueda'
+            func = lambda: remote.transactions.page(search=rng.choice(SEARCH_WORDS), limit=200)
+        elif roll < writes + (1 - writes) * 0.9:
+            name = 'resumen'
+            func = lambda: remote.summary.totals()
+        else:
+            name = 'categorías'
+            func = lambda: remote.categories.all()
+        
+        began = time.perf_counter()
+        try:
+            func()
+        except Exception:
+            errors += 1
+            continue
+        samples.setdefault(name, []).append(time.perf_counter() - began)
+    remote.close()
+    results.append((samples, errors))
+
+
+def run_load(url, ledgers, clients, duration, writes):
+    results = []
+    start = threading.Event()
+    deadline = time.perf_counter() + duration + 3
+    threads = [threading.Thread(target=client, args=(url, ledgers[number % len(ledgers)], number, writes,
+                                                     deadline, start, results), daemon=True)
+               for number in range(clients)]
+    for thread in threads:
+        thread.start()
+    # Unos segundos para que todos los hilos se conecten antes de medir
+    time.sleep(3)
+    started = time.perf_counter()
+    start.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    
+    samples = {}
+    errors = 0
+    for client_samples, client_errors in results:
+        errors += client_errors
+        for name, values in client_samples.items():
+            samples.setdefault(name, []).extend(values)
+    requests = sum(len(values) for values in samples.values())
+    return {
+        'clientes': clients,
+        'segundos': round(elapsed, 2),
+        'pedidos': requests,
+        'pedidos_por_s': round(requests / elapsed, 1),
+        'errores': errors,
+        'todas': latency_stats([value for values in samples.values() for value in values]),
+        'operaciones': {name: latency_stats(values) for name, values in sorted(samples.items())},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', default='100,200', help="clientes concurrentes, separados por comas")
+    parser.add_argument('--duration', type=float, default=10, help="segundos de carga por ronda")
+    parser.add_argument('--rows', type=int, default=100_000, help="transacciones sintéticas por libro")
+    parser.add_argument('--ledgers', type=int, default=2, help="libros entre los que se reparten los clientes")
+    parser.add_argument('--readers', type=int, default=finanzas.server.SERVER_READERS,
+                        help="conexiones de lectura por libro")
+    parser.add_argument('--writes', type=float, default=0.2, help="fracción de pedidos que son altas")
+    parser.add_argument('--no-group', action='store_true', help="confirmar cada alta por separado")
+    parser.add_argument('--output', help="guardar el resultado en este JSON")
+    args = parser.parse_args(argv)
+    if args.no_group:
+        finanzas.server.GROUP_COMMIT_MAX = 1
+    
+    directory = tempfile.mkdtemp(prefix='finanzas-servidor-')
+    names = [f'libro{number}' for number in range(args.ledgers)]
+    try:
+        for name in names:
+            with Ledger.open(os.path.join(directory, f'{name}.db')) as ledger:
+                populate(ledger, args.rows)
+        
+        server = LedgerServer(('127.0.0.1', 0), directory, args.readers)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_address[1]}'
+        
+        rounds = []
+        for clients in (int(value) for value in args.clients.split(',')):
+            before = server.pool_stats()
+            result = run_load(url, names, clients, args.duration, args.writes)
+            grouped = {}
+            for name, stats in server.pool_stats().items():
+                batches = stats['grupos'] - before.get(name, {}).get('grupos', 0)
+                operations = stats['operaciones'] - before.get(name, {}).get('operaciones', 0)
+                grouped[name] = {'grupos': batches, 'altas': operations,
+                                 'altas_por_grupo': round(operations / batches, 2) if batches else 0}
+            result['escritor'] = grouped
+            rounds.append(result)
+            
+            print(f"{clients} clientes: {result['pedidos_por_s']} pedidos/s, {result['errores']} errores, "
+                  f"p50 {result['todas']['p50_ms']} ms, p95 {result['todas']['p95_ms']} ms, "
+                  f"p99 {result['todas']['p99_ms']} ms")
+            for name, stats in result['operaciones'].items():
+                print(f"  {name:<11} n={stats['n']:<6} p50 {stats['p50_ms']:>8} ms  p95 {stats['p95_ms']:>8} ms  "
+                      f"p99 {stats['p99_ms']:>8} ms")
+            for name, stats in grouped.items():
+                print(f"  {name}: {stats['altas']} altas en {stats['grupos']} transacciones "
+                      f"({stats['altas_por_grupo']} por transacción)")
+        
+        server.shutdown()
+        server.server_close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump({'group_commit': not args.no_group, 'filas': args.rows, 'rondas': rounds}, file, indent=2,
+                      ensure_ascii=False)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
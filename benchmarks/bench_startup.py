@@ -0,0 +1,194 @@
+"""Tiempo hasta la primera ventana y latencia al cambiar de vista en la interfaz.
+
+Abre la interfaz --launches veces, cada una en un proceso nuevo (así cuenta
+la carga de los módulos), sobre una copia de una base sintética de --rows
+transacciones generada con benchmarks/synthetic.py, y mide:
+
+- ventana: desde que se lanza el proceso hasta el primer Expose, con la
+  ventana ya dibujada; vista inicial: hasta que el formulario tiene sus
+  categorías;
+- cada cambio de vista: desde la llamada a show_* hasta que el ejecutor no
+  tiene consultas ni resultados pendientes y Tk terminó de dibujar. La
+  primera vuelta por todas las vistas las arma; después se hacen --rounds
+  vueltas sin escrituras y --rounds vueltas con un alta publicada antes de
+  cada una.
+
+Solo usa FinanceApp, sus show_* y el ChangeBus, así que copiado a un commit
+anterior mide lo mismo; el JSON se compara con benchmarks/compare.py.
+La ventana incluye el arranque de Python y de este script. Necesita una
+pantalla: en un servidor sin ella, con xvfb-run.
+
+Uso: python benchmarks/bench_startup.py [--rows 100000] [--launches 10]
+     [--rounds 5] [--cache DIR] [--output resultados.json]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Vistas en el orden en que se recorren; la vuelta termina en el formulario,
+# que es la vista del arranque
+VIEWS = (
+    ('historial', 'show_transaction_history'),
+    ('resumen', 'show_financial_summary'),
+    ('categorías', 'show_category_management'),
+    ('presupuestos', 'show_budgets'),
+    ('configuración', 'show_settings'),
+    ('formulario', 'show_transaction_form'),
+)
+
+# Espera máxima a que la ventana aparezca o una vista termine de cargar
+SETTLE_TIMEOUT = 30
+
+
+def settle(root, executor):
+    # Procesa eventos hasta que el ejecutor queda sin trabajos ni resultados
+    # pendientes en dos revisiones seguidas; devuelve el momento de la primera
+    deadline = time.perf_counter() + SETTLE_TIMEOUT
+    quiet_since = None
+    while time.perf_counter() < deadline:
+        root.update()
+        with executor.lock:
+            busy = bool(executor.running)
+        busy = busy or not (executor.read_jobs.empty() and executor.write_jobs.empty() and executor.results.empty())
+        if busy:
+            quiet_since = None
+        elif quiet_since is None:
+            quiet_since = time.perf_counter()
+        else:
+            return quiet_since
+        time.sleep(0.002)
+    raise TimeoutError("la interfaz no terminó de cargar")
+
+
+def run_child(db_path, launched, rounds):
+    # Un arranque de la interfaz; escribe las muestras como JSON en stdout
+    import tkinter as tk
+    start = time.perf_counter()
+    import finanzas_app
+    from finanzas.core import Ledger
+    samples = {'importar módulos': [time.perf_counter() - start]}
+    
+    root = tk.Tk()
+    exposed = []
+    
+    def on_expose(event):
+        if not exposed:
+            exposed.append(time.time())
+    
+    root.bind('<Expose>', on_expose, add='+')
+    app = finanzas_app.FinanceApp(root, db_path)
+    
+    def wait_for(condition):
+        deadline = time.perf_counter() + SETTLE_TIMEOUT
+        while not condition():
+            if time.perf_counter() > deadline:
+                raise TimeoutError("la interfaz no terminó de cargar")
+            root.update()
+            time.sleep(0.001)
+        return time.time()
+    
+    # El momento del primer Expose, no el de la revisión que lo notó
+    wait_for(lambda: exposed)
+    samples['ventana'] = [exposed[0] - launched]
+    combobox = lambda: getattr(app, 'category_combobox', None)
+    samples['vista inicial'] = [wait_for(lambda: combobox() is not None and combobox()['values']) - launched]
+    settle(root, app.db)
+    
+    def switch(label):
+        for name, method in VIEWS:
+            started = time.perf_counter()
+            getattr(app, method)()
+            samples.setdefault(f'{name}: {label}', []).append(settle(root, app.db) - started)
+    
+    with Ledger.open(db_path) as ledger:
+        switch('primera vez')
+        for _ in range(rounds):
+            switch('volver')
+        for _ in range(rounds):
+            # El alta se publica como lo hace el formulario al guardar
+            trans_id = ledger.transactions.add('Gasto', 'Alimentos', '12.50', datetime.now().strftime('%Y-%m-%d'),
+                                               'bench_startup')
+            app.changes.publish('insert', ledger.transactions.get([trans_id]), [trans_id])
+            settle(root, app.db)
+            switch('tras un alta')
+    
+    app.on_closing()
+    print(json.dumps(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000, help="transacciones de la base sintética")
+    parser.add_argument('--launches', type=int, default=10, help="arranques de la interfaz")
+    parser.add_argument('--rounds', type=int, default=5, help="vueltas por las vistas de cada tipo por arranque")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--cache', help="directorio donde guardar y reutilizar las bases generadas")
+    parser.add_argument('--output', help="archivo JSON de resultados (por defecto la salida estándar)")
+    parser.add_argument('--child', nargs=2, metavar=('DB', 'LANZADO'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        run_child(args.child[0], float(args.child[1]), args.rounds)
+        return
+    # Sin pantalla cada arranque falla recién después de generar la base
+    if sys.platform.startswith('linux') and not os.environ.get('DISPLAY'):
+        parser.error("se necesita una pantalla (DISPLAY); en un servidor, con xvfb-run")
+    # Solo aquí: el proceso que mide el arranque no carga el resto de las pruebas
+    from bench_suite import git_commit, stats, template_for
+    
+    workdir = tempfile.mkdtemp()
+    cache = args.cache or workdir
+    os.makedirs(cache, exist_ok=True)
+    
+    samples = {}
+    try:
+        path = os.path.join(workdir, 'bench.db')
+        shutil.copyfile(template_for(args.rows, args.seed, cache), path)
+        for _ in range(args.launches):
+            launched = time.time()
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), '--rounds', str(args.rounds),
+                                     '--child', path, repr(launched)],
+                                    stdout=subprocess.PIPE, text=True, check=True).stdout
+            for name, values in json.loads(output.splitlines()[-1]).items():
+                samples.setdefault(name, []).extend(values)
+    finally:
+        shutil.rmtree(workdir)
+    
+    results = {name: stats(values) for name, values in samples.items()}
+    for name, measured in results.items():
+        print(f"{name:<38} mediana {measured['median_ms']:10.3f} ms  p95 {measured['p95_ms']:10.3f} ms",
+              file=sys.stderr)
+    
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'plataforma': platform.platform(),
+            'semilla': args.seed,
+            'arranques': args.launches,
+            'vueltas': args.rounds,
+        },
+        'resultados': {str(args.rows): results},
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
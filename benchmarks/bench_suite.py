@@ -0,0 +1,257 @@
+"""Tiempos de las operaciones principales con 10k, 100k y 1M transacciones.
+
+Para cada tamaño genera (o reutiliza con --cache) una base con
+benchmarks/synthetic.py y mide sobre una copia lo mismo que hace la
+interfaz: guardar transacciones una a una, cargar la primera página del
+historial, las consultas del resumen, el borrado de una selección (las
+filas más recientes, y ids dispersos como los que llegan por la API) y
+el borrado de categorías. Los borrados de transacciones repiten cada
+medición sobre una copia nueva, así todas borran de la base completa. El
+resultado es un JSON que se compara entre commits con benchmarks/compare.py.
+
+Uso: python benchmarks/bench_suite.py [--sizes 10000,100000,1000000]
+     [--repeat 10] [--inserts 200] [--cache DIR] [--output resultados.json]
+     [--cprofile DIR]
+"""
+import argparse
+import cProfile
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from finanzas.core import Ledger, ValidationError
+from synthetic import populate
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+# Filas que se borran de una vez, como una selección grande del historial
+DELETE_BATCH = 1000
+
+# Borrados masivos por la API: cantidades de ids al azar, cada una medida
+# solo en las bases donde no pasa de una fila de cada diez, y repeticiones
+# de cada una (cada repetición copia la base de nuevo)
+SCATTERED_DELETES = (1_000, 50_000)
+SCATTERED_DELETE_REPEAT = 3
+
+
+def stats(samples):
+    samples = sorted(samples)
+    return {
+        'n': len(samples),
+        'min_ms': round(samples[0] * 1000, 4),
+        'median_ms': round(statistics.median(samples) * 1000, 4),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 4),
+    }
+
+
+def timed(func, repeat, prepare=None):
+    # Tiempo de cada repetición de func(); prepare() corre antes de cada una
+    # fuera de la medición y su resultado se pasa a func
+    samples = []
+    for _ in range(repeat):
+        argument = prepare() if prepare else None
+        start = time.perf_counter()
+        func(argument) if prepare else func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def timed_on_copy(fresh_copy, func, repeat, prepare):
+    # Como timed, pero cada repetición abre con fresh_copy() una copia nueva
+    # de la base: un borrado no mide sobre lo que dejó el anterior. prepare
+    # y func reciben el Ledger de la copia
+    samples = []
+    for _ in range(repeat):
+        with fresh_copy() as ledger:
+            argument = prepare(ledger)
+            start = time.perf_counter()
+            func(ledger, argument)
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+def run_operations(ledger, repeat, inserts, fresh_copy):
+    # nombre -> función que devuelve las muestras en segundos. Primero las
+    # lecturas y después las escrituras; las que borran transacciones corren
+    # sobre copias nuevas (ver timed_on_copy) y las demás dejan la base como
+    # estaba, salvo las pocas filas de 'insertar transacción'
+    transactions = ledger.transactions
+    summary = ledger.summary
+    categories = ledger.categories
+    
+    cache = categories.cache()
+    used_id = cache.id_of('Alimentos')
+    several = [cache.id_of('Alimentos'), cache.id_of('Salud')]
+    
+    def used_category():
+        # ValidationError es el resultado esperado: la categoría tiene transacciones
+        try:
+            categories.delete(used_id)
+        except ValidationError:
+            pass
+    
+    def unused_category():
+        return categories.add(f"Temporal {time.perf_counter_ns()}", 'Gasto')
+    
+    rows = ledger.conn.execute('SELECT COUNT(*) FROM transacciones').fetchone()[0]
+    rng = random.Random(0)
+    
+    def delete(ledger, ids):
+        ledger.transactions.delete_many(ids)
+    
+    def scattered_ids(count):
+        def prepare(ledger):
+            return rng.sample([row[0] for row in ledger.conn.execute('SELECT id FROM transacciones')], count)
+        return prepare
+    
+    scattered = [
+        (f'borrar {count} dispersas', lambda count=count: timed_on_copy(
+            fresh_copy, delete, SCATTERED_DELETE_REPEAT, prepare=scattered_ids(count)
+        ))
+        for count in SCATTERED_DELETES if count <= rows // 10
+    ]
+    
+    return [
+        ('historial primera página', lambda: timed(lambda: transactions.page(), repeat)),
+        ('historial por tipo', lambda: timed(lambda: transactions.page('Gasto'), repeat)),
+        ('historial búsqueda', lambda: timed(lambda: transactions.page(search='farmacia'), repeat)),
+        ('historial por monto', lambda: timed(lambda: transactions.page(order='monto'), repeat)),
+        ('historial por categoría y tipo', lambda: timed(
+            lambda: transactions.page('Ingreso', order='categoria'), repeat
+        )),
+        ('historial varias categorías por monto', lambda: timed(
+            lambda: transactions.page(categoria_ids=several, order='monto'), repeat
+        )),
+        ('historial rango de montos', lambda: timed(
+            lambda: transactions.page(min_amount=100000, max_amount=105000), repeat
+        )),
+        ('historial mes por monto', lambda: timed(
+            lambda: transactions.page(start_date='2023-03-01', end_date='2023-03-31', order='monto'), repeat
+        )),
+        ('historial búsqueda por monto', lambda: timed(
+            lambda: transactions.page(search='super', order='monto'), repeat
+        )),
+        ('resumen totales', lambda: timed(lambda: summary.totals(), repeat)),
+        ('resumen serie mensual', lambda: timed(lambda: summary.series('mes'), repeat)),
+        ('insertar transacción', lambda: timed(
+            lambda: transactions.add('Gasto', 'Alimentos', '12.50', '2024-06-01', "Supermercado Central"),
+            inserts
+        )),
+        ('borrar selección', lambda: timed_on_copy(
+            fresh_copy, delete, repeat,
+            prepare=lambda ledger: [row[0] for row in ledger.transactions.page(limit=DELETE_BATCH)]
+        )),
+    ] + scattered + [
+        ('borrar categoría sin uso', lambda: timed(categories.delete, repeat, prepare=unused_category)),
+        ('borrar categoría en uso', lambda: timed(used_category, repeat)),
+    ]
+
+
+def template_for(rows, seed, directory):
+    path = os.path.join(directory, f'sinteticas-{rows}-{seed}.db')
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        with Ledger.open(path + '.tmp') as ledger:
+            populate(ledger, rows, seed)
+        os.replace(path + '.tmp', path)
+        print(f"{rows} filas generadas en {time.perf_counter() - start:.1f} s", file=sys.stderr)
+    return path
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="cantidades de transacciones separadas por comas")
+    parser.add_argument('--repeat', type=int, default=10, help="repeticiones de cada operación")
+    parser.add_argument('--inserts', type=int, default=200, help="transacciones guardadas una a una")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--cache', help="directorio donde guardar y reutilizar las bases generadas")
+    parser.add_argument('--output', help="archivo JSON de resultados (por defecto la salida estándar)")
+    parser.add_argument('--cprofile', help="directorio donde guardar un perfil cProfile por operación")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+    
+    workdir = tempfile.mkdtemp()
+    cache = args.cache or workdir
+    os.makedirs(cache, exist_ok=True)
+    if args.cprofile:
+        os.makedirs(args.cprofile, exist_ok=True)
+    
+    results = {}
+    try:
+        for rows in sizes:
+            template = template_for(rows, args.seed, cache)
+            path = os.path.join(workdir, 'bench.db')
+            shutil.copyfile(template, path)
+            
+            @contextmanager
+            def fresh_copy():
+                copy = os.path.join(workdir, 'copia.db')
+                shutil.copyfile(template, copy)
+                try:
+                    with Ledger.open(copy) as ledger:
+                        yield ledger
+                finally:
+                    for suffix in ('', '-wal', '-shm'):
+                        if os.path.exists(copy + suffix):
+                            os.remove(copy + suffix)
+            
+            results[str(rows)] = measured = {}
+            with Ledger.open(path) as ledger:
+                for name, operation in run_operations(ledger, args.repeat, args.inserts, fresh_copy):
+                    profiler = cProfile.Profile() if args.cprofile else None
+                    if profiler:
+                        profiler.enable()
+                    measured[name] = stats(operation())
+                    if profiler:
+                        profiler.disable()
+                        profiler.dump_stats(os.path.join(args.cprofile, f"{rows}-{name.replace(' ', '_')}.prof"))
+                    print(f"{rows:>9} {name:<38} mediana {measured[name]['median_ms']:10.3f} ms  "
+                          f"p95 {measured[name]['p95_ms']:10.3f} ms", file=sys.stderr)
+            os.remove(path)
+    finally:
+        shutil.rmtree(workdir)
+    
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'plataforma': platform.platform(),
+            'semilla': args.seed,
+            'repeticiones': args.repeat,
+            'inserciones': args.inserts,
+        },
+        'resultados': results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
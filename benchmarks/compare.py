@@ -0,0 +1,58 @@
+"""Compara dos resultados de benchmarks/bench_suite.py.
+
+Muestra el mínimo (o --metric) de cada operación en ambos archivos y la razón entre
+ellas, y marca como regresión lo que empeoró más que --threshold. Las
+diferencias por debajo de --min-ms se consideran ruido. Termina con código
+1 si hay regresiones, para usarlo en scripts.
+
+Uso: python benchmarks/compare.py ANTES.json DESPUES.json [--threshold 0.2]
+     [--min-ms 0.5] [--metric min_ms]
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=0.2, help="empeoramiento relativo tolerado")
+    parser.add_argument('--min-ms', type=float, default=0.5, help="diferencia absoluta mínima a considerar")
+    parser.add_argument('--metric', choices=['min_ms', 'median_ms', 'p95_ms'], default='min_ms',
+                        help="el mínimo es lo más estable entre corridas (por defecto)")
+    args = parser.parse_args()
+    
+    before = load(args.before)
+    after = load(args.after)
+    print(f"antes: {before['meta'].get('commit')}  después: {after['meta'].get('commit')}  ({args.metric})")
+    
+    regressions = 0
+    for rows, operations in after['resultados'].items():
+        previous = before['resultados'].get(rows, {})
+        for name, measured in operations.items():
+            new = measured[args.metric]
+            if name not in previous:
+                print(f"{rows:>9} {name:<26} {'-':>10} {new:10.3f} ms  nueva")
+                continue
+            old = previous[name][args.metric]
+            ratio = new / old if old else float('inf')
+            mark = ''
+            if new - old > args.min_ms and ratio > 1 + args.threshold:
+                mark = 'REGRESIÓN'
+                regressions += 1
+            elif old - new > args.min_ms and ratio < 1 / (1 + args.threshold):
+                mark = 'mejora'
+            print(f"{rows:>9} {name:<26} {old:10.3f} {new:10.3f} ms  x{ratio:.2f}  {mark}")
+    
+    print(f"{regressions} regresiones")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""Generador determinista de transacciones sintéticas.
+
+Reparte N transacciones entre categorías de gasto e ingreso con pesos,
+rangos de montos y comercios realistas, en fechas de un intervalo fijo. Con
+la misma semilla genera siempre las mismas filas, así que las mediciones
+de distintos commits se hacen sobre los mismos datos.
+
+Uso: python benchmarks/synthetic.py [--rows 100000] [--seed 42] [--db RUTA]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from finanzas.core import Ledger, database_path
+
+# (nombre, tipo, peso, monto mínimo y máximo en centavos, comercios o conceptos)
+CATEGORIES = [
+    ('Alimentos', 'Gasto', 30, 300, 25000, ("Supermercado Central", "Mercado del barrio", "Panadería La Espiga",
+                                             "Frutería Don José", "Carnicería El Toro")),
+    ('Transporte', 'Gasto', 14, 150, 8000, ("Gasolinera Norte", "Taxi", "Metro recarga", "Autobús",
+                                            "Estacionamiento")),
+    ('Vivienda', 'Gasto', 4, 20000, 150000, ("Alquiler", "Comunidad", "Reparación fontanero", "Ferretería")),
+    ('Entretenimiento', 'Gasto', 8, 500, 12000, ("Cine Capitol", "Suscripción streaming", "Concierto",
+                                                 "Librería Alfa", "Videojuego")),
+    ('Restaurantes', 'Gasto', 10, 800, 9000, ("Restaurante El Puerto", "Cafetería Sol", "Pizzería Roma",
+                                              "Comida a domicilio")),
+    ('Servicios', 'Gasto', 5, 1500, 20000, ("Factura luz", "Factura agua", "Internet fibra", "Teléfono móvil",
+                                            "Gas natural")),
+    ('Salud', 'Gasto', 3, 500, 40000, ("Farmacia Central", "Dentista", "Consulta médica", "Óptica")),
+    ('Ropa', 'Gasto', 3, 1500, 15000, ("Tienda de ropa", "Zapatería", "Grandes almacenes")),
+    ('Educación', 'Gasto', 2, 2000, 60000, ("Matrícula", "Academia de idiomas", "Material escolar")),
+    ('Viajes', 'Gasto', 1, 5000, 120000, ("Vuelo", "Hotel", "Tren larga distancia", "Alquiler de coche")),
+    ('Salario', 'Ingreso', 6, 150000, 450000, ("Nómina", "Paga extra")),
+    ('Freelance', 'Ingreso', 3, 5000, 120000, ("Factura cliente", "Proyecto web", "Consultoría")),
+    ('Inversiones', 'Ingreso', 1, 100, 50000, ("Dividendos", "Intereses cuenta", "Venta de acciones")),
+]
+
+FIRST_DATE = date(2015, 1, 1)
+LAST_DATE = date(2024, 12, 31)
+
+
+def generate(rows, seed=42, first_date=FIRST_DATE, last_date=LAST_DATE):
+    # (tipo, categoría, monto en centavos, fecha, descripción) en orden de
+    # generación; las fechas no salen ordenadas, como al cargar a mano
+    rng = random.Random(seed)
+    weights = [category[2] for category in CATEGORIES]
+    span = (last_date - first_date).days
+    first_ordinal = first_date.toordinal()
+    dates = {}
+    
+    for category in rng.choices(CATEGORIES, weights, k=rows):
+        nombre, tipo, weight, low, high, concepts = category
+        day = rng.randint(0, span)
+        fecha = dates.get(day)
+        if fecha is None:
+            fecha = dates[day] = date.fromordinal(first_ordinal + day).isoformat()
+        # Montos sesgados hacia el mínimo: abundan los gastos pequeños
+        monto = low + int((high - low) * rng.random() ** 2)
+        descripcion = f"{rng.choice(concepts)} #{rng.randint(1, 999)}"
+        yield tipo, nombre, monto, fecha, descripcion
+
+
+def populate(ledger, rows, seed=42, batch_size=50_000):
+    # Crea las categorías que falten e inserta las filas por lotes a través
+    # de una tabla temporal, igual que el importador
+    conn = ledger.conn
+    conn.executemany('INSERT OR IGNORE INTO categorias (nombre, tipo) VALUES (?, ?)',
+                     [(category[0], category[1]) for category in CATEGORIES])
+    conn.commit()
+    category_ids = ledger.categories.cache().by_name
+    
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TEMP TABLE IF NOT EXISTS sinteticas (
+            tipo TEXT, categoria_id INTEGER, monto INTEGER, fecha TEXT, descripcion TEXT
+        )
+    ''')
+    batch = []
+    cursor.execute('BEGIN')
+    try:
+        for tipo, nombre, monto, fecha, descripcion in generate(rows, seed):
+            batch.append((tipo, category_ids[nombre], monto, fecha, descripcion))
+            if len(batch) == batch_size:
+                insert_batch(cursor, batch)
+                batch = []
+        if batch:
+            insert_batch(cursor, batch)
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def insert_batch(cursor, batch):
+    cursor.executemany('INSERT INTO sinteticas VALUES (?, ?, ?, ?, ?)', batch)
+    cursor.execute('''
+        INSERT INTO transacciones (tipo, categoria_id, monto, fecha, descripcion)
+        SELECT tipo, categoria_id, monto, fecha, descripcion FROM sinteticas
+    ''')
+    cursor.execute('DELETE FROM sinteticas')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', help="ruta de la base (por defecto $FINANZAS_DB o finanzas.db)")
+    args = parser.parse_args()
+    
+    path = database_path(args.db)
+    start = time.perf_counter()
+    with Ledger.open(path) as ledger:
+        populate(ledger, args.rows, args.seed)
+        total = ledger.conn.execute('SELECT COUNT(*) FROM transacciones').fetchone()[0]
+    print(f"{args.rows} transacciones generadas en {time.perf_counter() - start:.1f} s; "
+          f"{path} tiene {total}")
+
+
+if __name__ == '__main__':
+    main()
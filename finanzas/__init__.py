@@ -0,0 +1 @@
+"""Sistema de Gestión Financiera."""
@@ -0,0 +1,330 @@
+"""Línea de comandos: python -m finanzas [--db RUTA] COMANDO ...
+
+Solo importa lo que necesita cada comando para que arrancar sea barato
+cuando se invoca desde cron o scripts.
+"""
+
+import argparse
+import sys
+import time
+from datetime import date
+
+from .core import (DEFAULT_PROFILE, FRECUENCIAS, METRICS, PROFILES, SORT_COLUMNS, TIPOS, Ledger, ValidationError,
+                   epoch_day, format_amount, parse_date, to_cents)
+
+
+def cmd_add(ledger, args):
+    trans_id = ledger.transactions.add(args.tipo, args.categoria, args.monto, args.fecha, args.descripcion)
+    print(trans_id)
+
+
+def cmd_list(ledger, args):
+    categoria_ids = []
+    if args.categoria:
+        cache = ledger.categories.cache()
+        for nombre in args.categoria:
+            categoria_id = cache.id_of(nombre)
+            if categoria_id is None:
+                raise ValidationError(f"La categoría {nombre} no existe")
+            categoria_ids.append(categoria_id)
+    rows = ledger.transactions.page(args.tipo, limit=args.limit, search=args.buscar, categoria_ids=categoria_ids,
+                                    start_date=args.desde, end_date=args.hasta, min_amount=args.min,
+                                    max_amount=args.max, order=args.orden, descending=not args.asc)
+    for trans_id, fecha, tipo, categoria, monto, descripcion in rows:
+        print(f"{trans_id}\t{fecha}\t{tipo}\t{categoria}\t{format_amount(monto, False)}\t{descripcion or ''}")
+
+
+def cmd_summary(ledger, args):
+    total_income, total_expenses, expenses_by_category = ledger.summary.totals(args.desde, args.hasta)
+    print(f"Ingresos\t{format_amount(total_income, False)}")
+    print(f"Gastos\t{format_amount(total_expenses, False)}")
+    print(f"Balance\t{format_amount(total_income - total_expenses, False)}")
+    for category, amount in expenses_by_category:
+        print(f"  {category}\t{format_amount(amount, False)}")
+
+
+def cmd_series(ledger, args):
+    start_day = epoch_day(args.desde) if args.desde else None
+    end_day = epoch_day(args.hasta) if args.hasta else None
+    for label, income, expenses, balance in ledger.summary.series(args.periodo, start_day, end_day):
+        print(f"{label}\t{format_amount(income, False)}\t{format_amount(expenses, False)}\t"
+              f"{format_amount(balance, False)}")
+
+
+def cmd_categories(ledger, args):
+    for cat_id, nombre, tipo in ledger.categories.all():
+        print(f"{cat_id}\t{tipo}\t{nombre}")
+
+
+def cmd_recurring(ledger, args):
+    for rule_id, tipo, categoria, monto, descripcion, frecuencia, intervalo, inicio, fin, proxima \
+            in ledger.recurring.all():
+        print(f"{rule_id}\t{tipo}\t{categoria}\t{format_amount(monto, False)}\t"
+              f"cada {intervalo} {FRECUENCIAS[frecuencia]}\t{inicio}..{fin or ''}\tpróxima {proxima}\t"
+              f"{descripcion or ''}")
+
+
+def cmd_add_recurring(ledger, args):
+    rule_id = ledger.recurring.add(args.tipo, args.categoria, args.monto, args.desde, args.frecuencia, args.cada,
+                                   args.descripcion, args.hasta)
+    print(rule_id)
+
+
+def cmd_delete_recurring(ledger, args):
+    if not ledger.recurring.delete(args.id):
+        raise ValidationError(f"La regla {args.id} no existe")
+
+
+def cmd_generate(ledger, args):
+    start = time.perf_counter()
+    ids = ledger.recurring.generate(args.hasta)
+    print(f"{len(ids)} transacciones generadas en {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+def cmd_budget(ledger, args):
+    categoria_id = ledger.categories.cache().id_of(args.categoria)
+    if categoria_id is None:
+        raise ValidationError(f"La categoría {args.categoria} no existe")
+    if args.monto is None:
+        ledger.budgets.remove(categoria_id)
+    else:
+        ledger.budgets.set(categoria_id, args.monto)
+
+
+def cmd_budgets(ledger, args):
+    for cat_id, nombre, tipo, presupuesto, registrado in ledger.budgets.report(args.mes):
+        if presupuesto is None and not args.todas:
+            continue
+        limit = format_amount(presupuesto, False) if presupuesto is not None else '-'
+        remaining = format_amount(presupuesto - registrado, False) if presupuesto is not None else '-'
+        print(f"{tipo}\t{nombre}\t{limit}\t{format_amount(registrado, False)}\t{remaining}")
+
+
+def cmd_import(ledger, args):
+    from .core.importer import import_statement
+    
+    fmt = args.format or ('ofx' if args.archivo.lower().endswith(('.ofx', '.qfx')) else 'csv')
+    with open(args.archivo, newline='', encoding='utf-8-sig', errors='replace') as file:
+        report = import_statement(ledger.conn, file, fmt, args.date_format, args.decimal)
+    
+    for error in report.errors:
+        print(error, file=sys.stderr)
+    rate = report.imported / report.elapsed if report.elapsed else 0
+    print(f"{report.imported} importadas, {report.skipped} omitidas "
+          f"en {report.elapsed:.2f} s ({rate:,.0f} filas/s)")
+
+
+def cmd_export(ledger, args):
+    from .core.exporter import export_transactions
+    
+    fmt = 'parquet' if args.archivo.lower().endswith('.parquet') else 'csv'
+    start = time.perf_counter()
+    count = export_transactions(ledger.conn, args.archivo, fmt, args.tipo, args.desde, args.hasta)
+    print(f"{count} transacciones exportadas en {time.perf_counter() - start:.2f} s")
+
+
+def cmd_analyze(ledger, args):
+    from .core.analytics import LedgerArrays
+    
+    start = time.perf_counter()
+    arrays = LedgerArrays.load(ledger.conn)
+    loaded = time.perf_counter()
+    total_income, total_expenses = arrays.totals()
+    expenses_by_category = arrays.by_category('Gasto')
+    months = arrays.monthly()
+    elapsed = time.perf_counter() - loaded
+    
+    print(f"Ingresos\t{format_amount(total_income, False)}")
+    print(f"Gastos\t{format_amount(total_expenses, False)}")
+    print(f"Balance\t{format_amount(total_income - total_expenses, False)}")
+    for category, amount in expenses_by_category:
+        print(f"  {category}\t{format_amount(amount, False)}")
+    for mes, income, expenses, balance in months:
+        print(f"{mes}\t{format_amount(income, False)}\t{format_amount(expenses, False)}\t{format_amount(balance, False)}")
+    print(f"{len(arrays)} transacciones cargadas en {loaded - start:.2f} s, analizadas en {elapsed * 1000:.1f} ms",
+          file=sys.stderr)
+
+
+def cmd_backup(ledger, args):
+    from .core.backup import backup_database, take_snapshot
+    
+    start = time.perf_counter()
+    db_path = ledger.conn.execute('PRAGMA database_list').fetchone()[2]
+    if args.archivo:
+        backup_database(db_path, args.archivo)
+        path = args.archivo
+    else:
+        path = take_snapshot(db_path, args.carpeta, args.conservar)
+    print(f"Copia guardada en {path} en {time.perf_counter() - start:.2f} s")
+
+
+def cmd_restore(ledger, args):
+    from .core.backup import restore_database
+    
+    start = time.perf_counter()
+    restore_database(args.archivo, ledger.conn)
+    count = ledger.conn.execute('SELECT COUNT(*) FROM transacciones').fetchone()[0]
+    print(f"Base restaurada desde {args.archivo} ({count} transacciones) en {time.perf_counter() - start:.2f} s")
+
+
+def cmd_check_summary(ledger, args):
+    differences = ledger.summary.rebuild() if args.rebuild else ledger.summary.check()
+    for table, key, have, want in differences:
+        print('\t'.join([table, *map(str, key), f"guardado={have}", f"esperado={want}"]))
+    print(f"{len(differences)} diferencias" + (" corregidas" if args.rebuild else ""))
+    return 1 if differences and not args.rebuild else 0
+
+
+def month(value):
+    # Argumento YYYY-MM, normalizado como lo compara el resumen ('2024-1' -> '2024-01')
+    return parse_date(value + '-01')[:7]
+
+
+def amount(value):
+    # Argumento de monto -> centavos
+    return to_cents(value)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='finanzas', description="Sistema de Gestión Financiera")
+    parser.add_argument('--db', help="ruta de la base de datos (por defecto $FINANZAS_DB o finanzas.db)")
+    parser.add_argument('--profile', choices=sorted(PROFILES), default=DEFAULT_PROFILE,
+                        help=f"perfil de conexión SQLite (por defecto {DEFAULT_PROFILE})")
+    parser.add_argument('--metrics', metavar='RUTA',
+                        help="medir las consultas y guardar el resultado en RUTA como JSON ('-' para stderr)")
+    parser.add_argument('--slow-log', metavar='RUTA', help="agregar las consultas lentas a RUTA (JSON por línea)")
+    parser.add_argument('--slow-ms', type=float, default=METRICS.slow_ms,
+                        help=f"umbral de consulta lenta en ms (por defecto {METRICS.slow_ms})")
+    commands = parser.add_subparsers(dest='command', required=True, metavar='COMANDO')
+    
+    add = commands.add_parser('agregar', help="registrar una transacción")
+    add.add_argument('tipo', choices=TIPOS)
+    add.add_argument('categoria')
+    add.add_argument('monto')
+    add.add_argument('--fecha', default=date.today().isoformat(), help="YYYY-MM-DD (por defecto hoy)")
+    add.add_argument('--descripcion', default='')
+    add.set_defaults(handler=cmd_add)
+    
+    listing = commands.add_parser('listar', help="mostrar las transacciones más recientes")
+    listing.add_argument('--tipo', choices=TIPOS)
+    listing.add_argument('--limit', type=int, default=20)
+    listing.add_argument('--categoria', action='append', help="se puede repetir para ver varias categorías")
+    listing.add_argument('--min', type=amount, help="monto mínimo")
+    listing.add_argument('--max', type=amount, help="monto máximo")
+    listing.add_argument('--orden', choices=list(SORT_COLUMNS), default='fecha')
+    listing.add_argument('--asc', action='store_true', help="orden ascendente (por defecto descendente)")
+    listing.add_argument('--buscar', help='texto en la descripción: palabras por prefijo, "frases" exactas')
+    listing.add_argument('--desde', type=parse_date, help="fecha inicial YYYY-MM-DD")
+    listing.add_argument('--hasta', type=parse_date, help="fecha final YYYY-MM-DD")
+    listing.set_defaults(handler=cmd_list)
+    
+    summary = commands.add_parser('resumen', help="ingresos, gastos y gastos por categoría")
+    summary.add_argument('--desde', type=month, help="mes inicial YYYY-MM")
+    summary.add_argument('--hasta', type=month, help="mes final YYYY-MM")
+    summary.set_defaults(handler=cmd_summary)
+    
+    series = commands.add_parser('serie', help="ingresos, gastos y saldo acumulado por semana, mes o año")
+    series.add_argument('--periodo', choices=['semana', 'mes', 'año'], default='mes')
+    series.add_argument('--desde', type=parse_date, help="fecha inicial YYYY-MM-DD")
+    series.add_argument('--hasta', type=parse_date, help="fecha final YYYY-MM-DD")
+    series.set_defaults(handler=cmd_series)
+    
+    categories = commands.add_parser('categorias', help="listar las categorías")
+    categories.set_defaults(handler=cmd_categories)
+    
+    recurring = commands.add_parser('recurrentes', help="listar las transacciones recurrentes")
+    recurring.set_defaults(handler=cmd_recurring)
+    
+    add_recurring = commands.add_parser('agregar-recurrente', help="registrar una transacción que se repite")
+    add_recurring.add_argument('tipo', choices=TIPOS)
+    add_recurring.add_argument('categoria')
+    add_recurring.add_argument('monto')
+    add_recurring.add_argument('--frecuencia', choices=list(FRECUENCIAS), default='mensual')
+    add_recurring.add_argument('--cada', type=int, default=1,
+                               help="intervalo en meses, semanas o días (por defecto 1)")
+    add_recurring.add_argument('--desde', default=date.today().isoformat(),
+                               help="primera ocurrencia YYYY-MM-DD (por defecto hoy)")
+    add_recurring.add_argument('--hasta', help="última fecha posible YYYY-MM-DD")
+    add_recurring.add_argument('--descripcion', default='')
+    add_recurring.set_defaults(handler=cmd_add_recurring)
+    
+    delete_recurring = commands.add_parser('eliminar-recurrente',
+                                           help="eliminar una regla (las transacciones generadas se conservan)")
+    delete_recurring.add_argument('id', type=int)
+    delete_recurring.set_defaults(handler=cmd_delete_recurring)
+    
+    generate = commands.add_parser('generar', help="generar las transacciones recurrentes vencidas")
+    generate.add_argument('--hasta', type=parse_date, help="generar hasta esta fecha YYYY-MM-DD (por defecto hoy)")
+    generate.set_defaults(handler=cmd_generate)
+    
+    budget = commands.add_parser('presupuesto',
+                                 help="fijar o quitar (sin monto) el presupuesto mensual de una categoría")
+    budget.add_argument('categoria')
+    budget.add_argument('monto', nargs='?')
+    budget.set_defaults(handler=cmd_budget)
+    
+    budgets = commands.add_parser('presupuestos', help="presupuesto, registrado y disponible por categoría")
+    budgets.add_argument('--mes', type=month, default=date.today().strftime('%Y-%m'),
+                         help="mes YYYY-MM (por defecto el actual)")
+    budgets.add_argument('--todas', action='store_true', help="incluir las categorías sin presupuesto")
+    budgets.set_defaults(handler=cmd_budgets)
+    
+    importing = commands.add_parser('importar', help="importar un extracto CSV u OFX")
+    importing.add_argument('archivo')
+    importing.add_argument('--format', choices=['csv', 'ofx'], help="por defecto según la extensión")
+    importing.add_argument('--date-format', default="%Y-%m-%d",
+                           help="formato de fecha del extracto (por defecto %%Y-%%m-%%d)")
+    importing.add_argument('--decimal', default='.', help="separador decimal del extracto")
+    importing.set_defaults(handler=cmd_import)
+    
+    exporting = commands.add_parser('exportar', help="exportar transacciones a CSV o Parquet (.parquet)")
+    exporting.add_argument('archivo')
+    exporting.add_argument('--tipo', choices=TIPOS)
+    exporting.add_argument('--desde', type=parse_date, help="fecha inicial YYYY-MM-DD")
+    exporting.add_argument('--hasta', type=parse_date, help="fecha final YYYY-MM-DD")
+    exporting.set_defaults(handler=cmd_export)
+    
+    analyze = commands.add_parser('analizar', help="totales, categorías y saldo mensual con NumPy")
+    analyze.set_defaults(handler=cmd_analyze)
+    
+    backup = commands.add_parser('respaldar', help="copiar la base sin detener la aplicación")
+    backup.add_argument('archivo', nargs='?',
+                        help="destino (.db o .db.gz); sin él se crea una copia fechada en la carpeta de copias")
+    backup.add_argument('--carpeta', help="carpeta de las copias fechadas (por defecto 'copias' junto a la base)")
+    backup.add_argument('--conservar', type=int, default=7, help="copias fechadas que se conservan (por defecto 7)")
+    backup.set_defaults(handler=cmd_backup)
+    
+    restore = commands.add_parser('restaurar', help="reemplazar la base por una copia verificada")
+    restore.add_argument('archivo', help="copia .db o .db.gz")
+    restore.set_defaults(handler=cmd_restore)
+    
+    check = commands.add_parser('verificar-resumen',
+                                help="comparar resumen_mensual y resumen_diario con las transacciones")
+    check.add_argument('--rebuild', action='store_true', help="recalcular ambos resúmenes desde cero")
+    check.set_defaults(handler=cmd_check_summary)
+    
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    METRICS.enabled = bool(args.metrics or args.slow_log)
+    METRICS.slow_ms = args.slow_ms
+    METRICS.slow_log_path = args.slow_log
+    try:
+        with Ledger.open(args.db, args.profile) as ledger:
+            return args.handler(ledger, args) or 0
+    except (ValidationError, RuntimeError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if args.metrics:
+            write_metrics(args.metrics)
+
+
+def write_metrics(path):
+    if path == '-':
+        METRICS.dump(sys.stderr)
+        return
+    with open(path, 'w', encoding='utf-8') as file:
+        METRICS.dump(file)
@@ -0,0 +1,219 @@
+"""Cliente de finanzas.server con la misma interfaz que Ledger.
+
+RemoteLedger expone transactions, categories y summary con los métodos que
+usa la aplicación, de modo que DBExecutor puede trabajar contra un libro
+del servidor en lugar de un archivo local. Cada instancia mantiene una
+conexión HTTP persistente; DBExecutor abre una por hilo.
+"""
+
+import http.client
+import json
+import select
+from urllib.parse import quote, urlencode, urlsplit
+
+from .core import CategoryCache, ValidationError
+
+ROW_FIELDS = ('id', 'fecha', 'tipo', 'categoria', 'monto', 'descripcion')
+RECURRING_FIELDS = ('id', 'tipo', 'categoria', 'monto', 'descripcion', 'frecuencia', 'intervalo', 'inicio', 'fin',
+                    'proxima')
+BUDGET_FIELDS = ('categoria_id', 'categoria', 'tipo', 'presupuesto', 'registrado')
+
+
+class RemoteError(RuntimeError):
+    pass
+
+
+def row_tuple(row):
+    return tuple(row[field] for field in ROW_FIELDS)
+
+
+class RemoteTransactions:
+    def __init__(self, ledger):
+        self.ledger = ledger
+    
+    def add(self, tipo, categoria, monto, fecha, descripcion=''):
+        body = transaction_body(tipo, categoria, monto, fecha, descripcion)
+        return self.ledger.request('POST', '/transactions', body=body)['row']['id']
+    
+    def update(self, trans_id, tipo, categoria, monto, fecha, descripcion=''):
+        self.ledger.request('PUT', f'/transactions/{int(trans_id)}',
+                            body=transaction_body(tipo, categoria, monto, fecha, descripcion))
+    
+    def get(self, ids):
+        ids = ','.join(str(int(trans_id)) for trans_id in ids)
+        if not ids:
+            return []
+        return [row_tuple(row) for row in self.ledger.request('GET', '/transactions', {'ids': ids})['rows']]
+    
+    def page(self, tipo=None, before=None, after=None, limit=200, search=None,
+             categoria_id=None, start_date=None, end_date=None, categoria_ids=None,
+             min_amount=None, max_amount=None, order='fecha', descending=True):
+        query = {'tipo': tipo, 'categoria_id': categoria_id, 'search': search, 'start_date': start_date,
+                 'end_date': end_date, 'min_amount': min_amount, 'max_amount': max_amount, 'order': order,
+                 'descending': int(descending), 'limit': limit}
+        if categoria_ids:
+            query['categoria_ids'] = ','.join(str(int(cat_id)) for cat_id in categoria_ids)
+        if before is not None:
+            query['before'] = json.dumps(list(before))
+        if after is not None:
+            query['after'] = json.dumps(list(after))
+        return [row_tuple(row) for row in self.ledger.request('GET', '/transactions', query)['rows']]
+    
+    def delete_many(self, ids):
+        return self.ledger.request('POST', '/transactions/delete', body={'ids': list(ids)})['deleted']
+
+
+class RemoteCategories:
+    def __init__(self, ledger):
+        self.ledger = ledger
+    
+    def cache(self):
+        return CategoryCache(self.all())
+    
+    def names(self, tipo):
+        return [nombre for cat_id, nombre, cat_tipo in self.all() if cat_tipo == tipo]
+    
+    def all(self):
+        rows = self.ledger.request('GET', '/categories')['categories']
+        return [(row['id'], row['nombre'], row['tipo']) for row in rows]
+    
+    def add(self, nombre, tipo):
+        return self.ledger.request('POST', '/categories', body={'nombre': nombre, 'tipo': tipo})['id']
+    
+    def usage(self, category_id):
+        return self.ledger.request('GET', f'/categories/{int(category_id)}/usage')['usage']
+    
+    def delete(self, category_id):
+        return self.ledger.request('DELETE', f'/categories/{int(category_id)}')['deleted']
+
+
+class RemoteSummary:
+    def __init__(self, ledger):
+        self.ledger = ledger
+    
+    def totals(self, start_month=None, end_month=None):
+        result = self.ledger.request('GET', '/summary', {'start_month': start_month, 'end_month': end_month})
+        return result['income'], result['expenses'], [tuple(row) for row in result['expenses_by_category']]
+    
+    def series(self, period='mes', start_day=None, end_day=None):
+        result = self.ledger.request('GET', '/series', {'period': period, 'start_day': start_day, 'end_day': end_day})
+        return [tuple(row) for row in result['series']]
+
+
+class RemoteRecurring:
+    def __init__(self, ledger):
+        self.ledger = ledger
+    
+    def add(self, tipo, categoria, monto, inicio, frecuencia='mensual', intervalo=1, descripcion='', fin=None):
+        body = {'tipo': tipo, 'categoria': categoria, 'monto': str(monto), 'inicio': inicio, 'frecuencia': frecuencia,
+                'intervalo': intervalo, 'descripcion': descripcion, 'fin': fin}
+        return self.ledger.request('POST', '/recurring', body=body)['id']
+    
+    def all(self):
+        rules = self.ledger.request('GET', '/recurring')['rules']
+        return [tuple(rule[field] for field in RECURRING_FIELDS) for rule in rules]
+    
+    def delete(self, rule_id):
+        return self.ledger.request('DELETE', f'/recurring/{int(rule_id)}')['deleted']
+    
+    def generate(self, today=None):
+        return self.ledger.request('POST', '/recurring/generate', body={'today': today})['ids']
+
+
+class RemoteBudgets:
+    def __init__(self, ledger):
+        self.ledger = ledger
+    
+    def set(self, categoria_id, monto):
+        return self.ledger.request('PUT', f'/budgets/{int(categoria_id)}', body={'monto': str(monto)})['monto']
+    
+    def remove(self, categoria_id):
+        return self.ledger.request('DELETE', f'/budgets/{int(categoria_id)}')['deleted']
+    
+    def report(self, mes):
+        rows = self.ledger.request('GET', '/budgets', {'month': mes})['budgets']
+        return [tuple(row[field] for field in BUDGET_FIELDS) for row in rows]
+
+
+def transaction_body(tipo, categoria, monto, fecha, descripcion):
+    return {'tipo': tipo, 'categoria': categoria, 'monto': str(monto), 'fecha': fecha, 'descripcion': descripcion}
+
+
+class RemoteLedger:
+    # Sin conexión SQLite propia: lo que necesita una (importar extractos,
+    # copias de seguridad) no está disponible en modo remoto
+    conn = None
+    
+    def __init__(self, url, name, token=None, timeout=30):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', ''):
+            raise ValueError(f"URL de servidor no soportada: {url}")
+        self.host = parts.hostname or '127.0.0.1'
+        self.port = parts.port or 8765
+        self.timeout = timeout
+        self.prefix = f"{parts.path.rstrip('/')}/ledgers/{quote(name, safe='')}"
+        self.headers = {'Content-Type': 'application/json'}
+        if token:
+            self.headers['Authorization'] = f'Bearer {token}'
+        self.http = None
+        self.transactions = RemoteTransactions(self)
+        self.categories = RemoteCategories(self)
+        self.summary = RemoteSummary(self)
+        self.recurring = RemoteRecurring(self)
+        self.budgets = RemoteBudgets(self)
+    
+    def request(self, method, path, query=None, body=None):
+        if query:
+            query = {key: value for key, value in query.items() if value is not None}
+        url = self.prefix + path + (f'?{urlencode(query)}' if query else '')
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        
+        # Una conexión persistente que el servidor cerró se reabre antes de
+        # usarla si ya se nota cerrada, o una vez tras fallar. Una escritura
+        # solo se repite si falló al enviarse: si llegó al servidor pudo
+        # haberse aplicado aunque se perdiera la respuesta
+        if self.http is not None and self.closed_by_server():
+            self.close()
+        for attempt in range(2):
+            if self.http is None:
+                self.http = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            sent = False
+            try:
+                self.http.request(method, url, data, self.headers)
+                sent = True
+                response = self.http.getresponse()
+                payload = response.read()
+                break
+            except (ConnectionError, http.client.RemoteDisconnected, http.client.CannotSendRequest):
+                self.close()
+                if attempt or (sent and method != 'GET'):
+                    raise
+        
+        result = json.loads(payload) if payload else {}
+        if response.status == 400:
+            raise ValidationError(result.get('error', "Datos inválidos"))
+        if response.status >= 300:
+            raise RemoteError(f"El servidor respondió {response.status}: {result.get('error', response.reason)}")
+        return result
+    
+    def closed_by_server(self):
+        # Sin un pedido en curso, un socket con algo para leer solo puede
+        # traer el cierre (fin de archivo) de la conexión
+        sock = self.http.sock
+        return sock is not None and bool(select.select([sock], [], [], 0)[0])
+    
+    def interrupt(self):
+        # El servidor no permite cancelar un pedido en curso; su resultado se
+        # descarta igual que con una consulta local interrumpida tarde
+        pass
+    
+    def close(self):
+        if self.http is not None:
+            self.http.close()
+            self.http = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,51 @@
+"""Lógica de negocio de finanzas sin dependencias de interfaz gráfica.
+
+Importación y exportación viven en finanzas.core.importer y
+finanzas.core.exporter y se cargan solo cuando se usan.
+"""
+
+from .budgets import BudgetStore
+from .categories import CategoryCache, CategoryStore
+from .changes import Change, ChangeBus
+from .db import DB_PATH, DEFAULT_PROFILE, PROFILES, Ledger, connect, database_path
+from .instrumentation import METRICS, timed
+from .money import format_amount, to_cents
+from .recurring import FRECUENCIAS, RecurringStore
+from .schema import migrate, schema_version
+from .summary import SummaryService
+from .transactions import SORT_COLUMNS, TransactionStore, sort_key
+from .validation import (TIPOS, ValidationError, day_to_date, epoch_day, parse_amount, parse_date,
+                         validate_transaction)
+
+__all__ = [
+    'BudgetStore',
+    'CategoryCache',
+    'CategoryStore',
+    'Change',
+    'ChangeBus',
+    'DB_PATH',
+    'DEFAULT_PROFILE',
+    'FRECUENCIAS',
+    'Ledger',
+    'METRICS',
+    'PROFILES',
+    'RecurringStore',
+    'SORT_COLUMNS',
+    'SummaryService',
+    'TIPOS',
+    'TransactionStore',
+    'ValidationError',
+    'connect',
+    'database_path',
+    'day_to_date',
+    'epoch_day',
+    'format_amount',
+    'migrate',
+    'parse_amount',
+    'parse_date',
+    'schema_version',
+    'sort_key',
+    'timed',
+    'to_cents',
+    'validate_transaction',
+]
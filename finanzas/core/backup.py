@@ -0,0 +1,178 @@
+"""Copias de seguridad con la API de backup de SQLite y su restauración.
+
+La copia avanza de a BACKUP_STEP_PAGES páginas y entre paso y paso suelta
+la base, así que la aplicación sigue leyendo y escribiendo mientras se
+copia. Las copias con extensión .gz se comprimen al terminar. Antes de
+restaurar, la copia se descomprime aparte, se verifica con integrity_check
+y se migra; recién entonces se vuelca sobre la base con la misma API.
+"""
+
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+from datetime import datetime
+
+from .db import connect
+from .schema import MIGRATIONS, schema_version
+from .validation import ValidationError
+
+# Páginas copiadas por paso (4 MiB con páginas de 4 KiB) y pausa entre pasos
+BACKUP_STEP_PAGES = 1024
+BACKUP_STEP_SLEEP = 0.005
+
+# Copias automáticas: carpeta junto a la base, cada cuánto y cuántas se conservan
+BACKUP_DIR = 'copias'
+BACKUP_INTERVAL_HOURS = 24
+BACKUP_KEEP = 7
+SNAPSHOT_PREFIX = 'finanzas-'
+SNAPSHOT_SUFFIX = '.db.gz'
+SNAPSHOT_TIME_FORMAT = '%Y%m%d-%H%M%S'
+
+# Tablas que debe tener una base de finanzas para poder restaurarla
+REQUIRED_TABLES = ('transacciones', 'categorias')
+
+
+class BackupCancelled(Exception):
+    pass
+
+
+def backup_database(source_path, path, progress=None, cancel=None):
+    # Copia source_path en path, comprimida si path termina en .gz, y devuelve
+    # el tamaño escrito. progress(páginas copiadas, total) se llama tras cada
+    # paso; si cancel (threading.Event) se activa, se descarta la copia
+    # parcial y se lanza BackupCancelled
+    compress = path.endswith('.gz')
+    plain_path = path[:-3] + '.tmp' if compress else path + '.tmp'
+    
+    def step(status, remaining, total):
+        if progress is not None:
+            progress(total - remaining, total)
+        if cancel is not None and cancel.is_set():
+            raise BackupCancelled()
+    
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(plain_path)
+    try:
+        # Con WAL una transacción de lectura abierta fija la foto que se copia:
+        # las escrituras siguen entrando al WAL y la copia no vuelve a empezar
+        # cada vez que otra conexión escribe. Con el diario clásico eso
+        # bloquearía a los escritores, así que la copia suelta la base en cada paso
+        if source.execute('PRAGMA journal_mode').fetchone()[0] == 'wal':
+            source.execute('BEGIN')
+            source.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+        source.backup(target, pages=BACKUP_STEP_PAGES, progress=step, sleep=BACKUP_STEP_SLEEP)
+        target.close()
+        if compress:
+            with open(plain_path, 'rb') as plain, gzip.open(path + '.part', 'wb', compresslevel=6) as packed:
+                shutil.copyfileobj(plain, packed, 1024 * 1024)
+            os.replace(path + '.part', path)
+            os.remove(plain_path)
+        else:
+            os.replace(plain_path, path)
+    except BaseException:
+        target.close()
+        for leftover in (plain_path, path + '.part'):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        raise
+    finally:
+        source.close()
+    return os.path.getsize(path)
+
+
+def snapshot_dir(db_path):
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), BACKUP_DIR)
+
+
+def list_snapshots(directory):
+    # [(fecha, ruta)] de las copias automáticas, de la más nueva a la más vieja
+    snapshots = []
+    if not os.path.isdir(directory):
+        return snapshots
+    for name in os.listdir(directory):
+        if not (name.startswith(SNAPSHOT_PREFIX) and name.endswith(SNAPSHOT_SUFFIX)):
+            continue
+        try:
+            when = datetime.strptime(name[len(SNAPSHOT_PREFIX):-len(SNAPSHOT_SUFFIX)], SNAPSHOT_TIME_FORMAT)
+        except ValueError:
+            continue
+        snapshots.append((when, os.path.join(directory, name)))
+    snapshots.sort(reverse=True)
+    return snapshots
+
+
+def snapshot_due(directory, now, interval_hours=BACKUP_INTERVAL_HOURS):
+    snapshots = list_snapshots(directory)
+    return not snapshots or (now - snapshots[0][0]).total_seconds() >= interval_hours * 3600
+
+
+def take_snapshot(db_path, directory=None, keep=BACKUP_KEEP, progress=None, cancel=None):
+    # Copia comprimida con fecha en el nombre; después se borran las más viejas
+    # que excedan keep. Devuelve la ruta de la copia
+    directory = directory or snapshot_dir(db_path)
+    os.makedirs(directory, exist_ok=True)
+    name = f"{SNAPSHOT_PREFIX}{datetime.now().strftime(SNAPSHOT_TIME_FORMAT)}{SNAPSHOT_SUFFIX}"
+    path = os.path.join(directory, name)
+    backup_database(db_path, path, progress, cancel)
+    prune_snapshots(directory, keep)
+    return path
+
+
+def prune_snapshots(directory, keep=BACKUP_KEEP):
+    removed = []
+    for when, path in list_snapshots(directory)[keep:]:
+        os.remove(path)
+        removed.append(path)
+    return removed
+
+
+def verify_database(path):
+    # Lanza ValidationError si el archivo no es una base de finanzas sana y
+    # restaurable con este programa
+    try:
+        conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+        try:
+            problems = [row[0] for row in conn.execute('PRAGMA integrity_check').fetchall()]
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            version = schema_version(conn)
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError as e:
+        raise ValidationError(f"El archivo no es una base de datos válida: {e}") from None
+    
+    if problems != ['ok']:
+        raise ValidationError("La copia está dañada: " + "; ".join(problems[:5]))
+    missing = [table for table in REQUIRED_TABLES if table not in tables]
+    if missing:
+        raise ValidationError(f"La copia no es de esta aplicación (faltan {', '.join(missing)})")
+    if version > len(MIGRATIONS):
+        raise ValidationError("La copia es de una versión más nueva de la aplicación")
+
+
+def restore_database(path, conn, progress=None):
+    # Reemplaza el contenido de la base abierta en conn por la copia path (.db
+    # o .db.gz). La copia se verifica y se migra en un archivo temporal: si
+    # algo falla, la base actual queda intacta
+    handle, work_path = tempfile.mkstemp(suffix='.db')
+    os.close(handle)
+    try:
+        opener = gzip.open if path.endswith('.gz') else open
+        try:
+            with opener(path, 'rb') as packed, open(work_path, 'wb') as plain:
+                shutil.copyfileobj(packed, plain, 1024 * 1024)
+        except (OSError, EOFError) as e:
+            raise ValidationError(f"No se pudo leer la copia: {e}") from None
+        verify_database(work_path)
+        
+        source = connect(work_path, 'classic')
+        try:
+            # Un solo paso: la base queda bloqueada para escribir hasta el final,
+            # y los lectores siguen viendo el contenido anterior hasta entonces
+            source.backup(conn, progress=None if progress is None else
+                          lambda status, remaining, total: progress(total - remaining, total))
+        finally:
+            source.close()
+    finally:
+        os.remove(work_path)
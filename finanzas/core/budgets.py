@@ -0,0 +1,55 @@
+"""Presupuestos mensuales por categoría y su comparación con lo registrado."""
+
+import sqlite3
+
+from .validation import ValidationError, parse_amount, parse_date
+
+
+class BudgetStore:
+    def __init__(self, conn):
+        self.conn = conn
+    
+    def set(self, categoria_id, monto):
+        # Crea o cambia el presupuesto mensual de la categoría
+        try:
+            monto = parse_amount(monto)
+        except (TypeError, ValueError):
+            raise ValidationError("Por favor ingrese un monto válido (número positivo)") from None
+        
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute('''
+                INSERT INTO presupuestos (categoria_id, monto) VALUES (?, ?)
+                ON CONFLICT (categoria_id) DO UPDATE SET monto = excluded.monto
+            ''', (categoria_id, monto))
+        except sqlite3.IntegrityError:
+            self.conn.rollback()
+            raise ValidationError("La categoría seleccionada no existe") from None
+        self.conn.commit()
+        return monto
+    
+    def remove(self, categoria_id):
+        cursor = self.conn.cursor()
+        cursor.execute('DELETE FROM presupuestos WHERE categoria_id = ?', (categoria_id,))
+        self.conn.commit()
+        return cursor.rowcount
+    
+    def report(self, mes):
+        # (id, categoría, tipo, presupuesto o None, registrado en el mes) de
+        # cada categoría. Lo registrado sale de resumen_mensual, que mantienen
+        # los triggers: el costo depende de las categorías, no de las
+        # transacciones del mes
+        try:
+            parse_date(f"{mes}-01")
+        except (TypeError, ValueError):
+            raise ValidationError("Por favor ingrese un mes válido en formato YYYY-MM") from None
+        
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT c.id, c.nombre, c.tipo, p.monto, COALESCE(r.total, 0)
+            FROM categorias c
+            LEFT JOIN presupuestos p ON p.categoria_id = c.id
+            LEFT JOIN resumen_mensual r ON r.tipo = c.tipo AND r.categoria_id = c.id AND r.mes = ?
+            ORDER BY c.tipo, c.nombre
+        ''', (mes,))
+        return cursor.fetchall()
@@ -0,0 +1,120 @@
+"""Acceso a la tabla categorias y sus reglas."""
+
+import bisect
+import sqlite3
+
+from .validation import TIPOS, ValidationError
+
+
+class CategoryCache:
+    # Copia en memoria de categorias: nombres por tipo y mapas id<->nombre.
+    # No se entera sola de los cambios; quien escribe llama a add/remove o a
+    # invalidate y el siguiente uso vuelve a cargarla con load().
+    def __init__(self, rows=None):
+        self.invalidate()
+        if rows is not None:
+            self.load(rows)
+    
+    def load(self, rows):
+        # rows: (id, nombre, tipo), como las devuelve CategoryStore.all()
+        self.by_id = {}
+        self.by_name = {}
+        self.by_tipo = {tipo: [] for tipo in TIPOS}
+        for cat_id, nombre, tipo in rows:
+            self.add(cat_id, nombre, tipo)
+        self.loaded = True
+    
+    def invalidate(self):
+        self.by_id = {}
+        self.by_name = {}
+        self.by_tipo = {tipo: [] for tipo in TIPOS}
+        self.loaded = False
+    
+    def add(self, cat_id, nombre, tipo):
+        # Los nombres por tipo se mantienen ordenados para el combobox
+        self.by_id[cat_id] = (nombre, tipo)
+        self.by_name[nombre] = cat_id
+        bisect.insort(self.by_tipo.setdefault(tipo, []), nombre)
+    
+    def remove(self, cat_id):
+        nombre, tipo = self.by_id.pop(cat_id)
+        del self.by_name[nombre]
+        self.by_tipo[tipo].remove(nombre)
+    
+    def names(self, tipo):
+        return list(self.by_tipo.get(tipo, ()))
+    
+    def all(self):
+        # Mismo orden que CategoryStore.all(): por tipo y nombre
+        rows = [(cat_id, nombre, tipo) for cat_id, (nombre, tipo) in self.by_id.items()]
+        rows.sort(key=lambda row: (row[2], row[1]))
+        return rows
+    
+    def id_of(self, nombre):
+        # Nombre exacto, como la restricción UNIQUE y las consultas por nombre
+        # de las transacciones: 'alimentos' y 'Alimentos' pueden coexistir.
+        # None si no existe
+        return self.by_name.get(nombre)
+    
+    def name_of(self, cat_id):
+        return self.by_id[cat_id][0]
+    
+    def tipo_of(self, cat_id):
+        return self.by_id[cat_id][1]
+
+
+class CategoryStore:
+    def __init__(self, conn):
+        self.conn = conn
+    
+    def cache(self):
+        # Una CategoryCache cargada con el estado actual de la tabla
+        return CategoryCache(self.all())
+    
+    def names(self, tipo):
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT nombre FROM categorias WHERE tipo = ? ORDER BY nombre', (tipo,))
+        return [row[0] for row in cursor.fetchall()]
+    
+    def all(self):
+        # (id, nombre, tipo) ordenadas por tipo y nombre
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT id, nombre, tipo FROM categorias ORDER BY tipo, nombre')
+        return cursor.fetchall()
+    
+    def add(self, nombre, tipo):
+        nombre = nombre.strip()
+        if not nombre:
+            raise ValidationError("Por favor ingrese un nombre para la categoría")
+        if tipo not in TIPOS:
+            raise ValidationError(f"Tipo de categoría desconocido: {tipo}")
+        
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute('INSERT INTO categorias (nombre, tipo) VALUES (?, ?)', (nombre, tipo))
+        except sqlite3.IntegrityError:
+            self.conn.rollback()
+            raise ValidationError("Ya existe una categoría con ese nombre") from None
+        self.conn.commit()
+        return cursor.lastrowid
+    
+    def usage(self, category_id):
+        # Cantidad de transacciones que usan la categoría
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT COUNT(*) FROM transacciones WHERE categoria_id = ?', (category_id,))
+        return cursor.fetchone()[0]
+    
+    def delete(self, category_id):
+        # Una categoría con transacciones o reglas recurrentes asociadas no se
+        # puede eliminar; su presupuesto se borra con ella
+        if self.usage(category_id) > 0:
+            raise ValidationError("No se puede eliminar esta categoría porque tiene transacciones asociadas")
+        
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT 1 FROM recurrentes WHERE categoria_id = ? LIMIT 1', (category_id,))
+        if cursor.fetchone() is not None:
+            raise ValidationError("No se puede eliminar esta categoría porque tiene transacciones recurrentes")
+        
+        cursor.execute('DELETE FROM categorias WHERE id = ?', (category_id,))
+        self.conn.commit()
+        return cursor.rowcount
@@ -0,0 +1,38 @@
+"""Avisos de escrituras confirmadas para las vistas abiertas."""
+
+from collections import namedtuple
+
+# kind: 'insert', 'update' o 'delete' de transacciones, 'reset' cuando
+# cambiaron demasiadas filas para detallarlas (importación, restauración) o
+# 'categories' cuando cambió la tabla categorias. rows trae las filas nuevas
+# con el formato de TransactionStore.page y ids los ids afectados
+Change = namedtuple('Change', 'kind rows ids')
+
+
+class ChangeBus:
+    # Quien escribe publica el cambio después de confirmarlo y cada vista
+    # suscrita lo aplica sobre lo que muestra en lugar de volver a consultar.
+    # Los suscriptores se llaman en el hilo que publica: la interfaz publica
+    # desde el hilo de Tk. version sube con cada cambio publicado: quien
+    # guarda la versión de lo que muestra sabe si se perdió alguno.
+    
+    def __init__(self):
+        self.listeners = []
+        self.version = 0
+    
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+        return listener
+    
+    def unsubscribe(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+    
+    def clear(self):
+        self.listeners = []
+    
+    def publish(self, kind, rows=(), ids=()):
+        self.version += 1
+        change = Change(kind, list(rows), list(ids))
+        for listener in list(self.listeners):
+            listener(change)
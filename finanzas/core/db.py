@@ -0,0 +1,95 @@
+"""Conexión a la base de datos y agrupación de los servicios sobre ella."""
+
+import os
+import sqlite3
+from collections import namedtuple
+
+from .budgets import BudgetStore
+from .categories import CategoryStore
+from .instrumentation import InstrumentedConnection
+from .recurring import RecurringStore
+from .schema import migrate
+from .summary import SummaryService
+from .transactions import TransactionStore
+
+DB_PATH = 'finanzas.db'
+
+# Variable de entorno que cambia la base por defecto
+DB_PATH_ENV = 'FINANZAS_DB'
+
+# PRAGMAs aplicados al abrir cada conexión y tamaño de la caché de sentencias
+# preparadas de sqlite3 (por defecto 128)
+ConnectionProfile = namedtuple('ConnectionProfile', 'pragmas cached_statements')
+
+PROFILES = {
+    # Configuración de fábrica de SQLite: diario de rollback y sincronización completa
+    'classic': ConnectionProfile({
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+    }, 128),
+    # WAL: los lectores no bloquean al escritor ni al revés; con WAL,
+    # synchronous=NORMAL sigue siendo consistente ante caídas del proceso
+    'wal': ConnectionProfile({
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,
+        'temp_store': 'MEMORY',
+    }, 512),
+}
+
+DEFAULT_PROFILE = 'wal'
+
+
+def database_path(path=None):
+    # Ruta explícita, o la de FINANZAS_DB, o finanzas.db
+    return path or os.environ.get(DB_PATH_ENV) or DB_PATH
+
+
+def connect(path=None, profile=DEFAULT_PROFILE, check_same_thread=True, factory=InstrumentedConnection):
+    # Abre la base con el perfil indicado (nombre o ConnectionProfile), la
+    # migra a la última versión y activa las claves foráneas. Las consultas
+    # se miden cuando METRICS está encendido (ver instrumentation).
+    # check_same_thread=False permite pasar la conexión entre hilos, siempre
+    # que la use uno a la vez (como el grupo de conexiones del servidor)
+    if isinstance(profile, str):
+        profile = PROFILES[profile]
+    
+    conn = sqlite3.connect(database_path(path), cached_statements=profile.cached_statements,
+                           check_same_thread=check_same_thread, factory=factory)
+    for name, value in profile.pragmas.items():
+        conn.execute(f'PRAGMA {name} = {value}')
+    migrate(conn)
+    conn.execute('PRAGMA foreign_keys = ON')
+    return conn
+
+
+class Ledger:
+    # Servicios de una base de datos sobre una misma conexión; como la
+    # conexión, un Ledger debe usarse desde un solo hilo
+    
+    def __init__(self, conn):
+        self.conn = conn
+        self.transactions = TransactionStore(conn)
+        self.categories = CategoryStore(conn)
+        self.summary = SummaryService(conn)
+        self.recurring = RecurringStore(conn)
+        self.budgets = BudgetStore(conn)
+    
+    @classmethod
+    def open(cls, path=None, profile=DEFAULT_PROFILE, **options):
+        # options se pasan a connect()
+        return cls(connect(path, profile, **options))
+    
+    def interrupt(self):
+        # Puede llamarse desde otro hilo: corta la consulta en curso
+        self.conn.interrupt()
+    
+    def close(self):
+        self.conn.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,118 @@
+"""Exportación de transacciones a CSV o Parquet por bloques."""
+
+import csv
+import os
+
+from .money import format_amount, from_cents
+
+# Exportación: filas leídas por bloques con fetchmany; Parquet usa bloques mayores
+# porque cada bloque se escribe como un row group
+EXPORT_CHUNK_SIZE = 5000
+EXPORT_PARQUET_CHUNK_SIZE = 65536
+EXPORT_COLUMNS = ('id', 'fecha', 'tipo', 'categoria', 'monto', 'descripcion')
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def export_filter(tipo=None, start_date=None, end_date=None):
+    # Condiciones compartidas por el conteo y la lectura de la exportación
+    conditions = []
+    params = []
+    if tipo is not None:
+        conditions.append('t.tipo = ?')
+        params.append(tipo)
+    if start_date is not None:
+        conditions.append('t.fecha >= ?')
+        params.append(start_date)
+    if end_date is not None:
+        conditions.append('t.fecha <= ?')
+        params.append(end_date)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    return where, params
+
+
+def iter_transaction_chunks(conn, tipo=None, start_date=None, end_date=None,
+                            chunk_size=EXPORT_CHUNK_SIZE):
+    where, params = export_filter(tipo, start_date, end_date)
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT t.id, t.fecha, t.tipo, c.nombre, t.monto, t.descripcion
+        FROM transacciones t
+        JOIN categorias c ON c.id = t.categoria_id
+        {where}
+        ORDER BY t.fecha, t.id
+    ''', params)
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield rows
+
+
+def write_csv_export(path, chunks, on_chunk):
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(EXPORT_COLUMNS)
+        for rows in chunks:
+            writer.writerows(
+                (trans_id, fecha, tipo, categoria, format_amount(monto, grouping=False), descripcion)
+                for trans_id, fecha, tipo, categoria, monto, descripcion in rows
+            )
+            on_chunk(len(rows))
+
+
+def write_parquet_export(path, chunks, on_chunk):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Exportar a Parquet requiere el paquete pyarrow") from None
+    
+    schema = pa.schema([
+        ('id', pa.int64()),
+        ('fecha', pa.string()),
+        ('tipo', pa.string()),
+        ('categoria', pa.string()),
+        ('monto', pa.decimal128(18, 2)),
+        ('descripcion', pa.string()),
+    ])
+    with pq.ParquetWriter(path, schema) as writer:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            columns[4] = [from_cents(monto) for monto in columns[4]]
+            columns = [pa.array(values, type=field.type) for values, field in zip(columns, schema)]
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+            on_chunk(len(rows))
+
+
+def export_transactions(conn, path, fmt='csv', tipo=None, start_date=None, end_date=None,
+                        progress=None, cancel=None):
+    # Escribe las transacciones filtradas en CSV o Parquet sin cargarlas todas.
+    # progress(hechas, total) se llama tras cada bloque; si cancel (threading.Event)
+    # se activa, se descarta el archivo parcial y se lanza ExportCancelled.
+    where, params = export_filter(tipo, start_date, end_date)
+    total = conn.execute(f'SELECT COUNT(*) FROM transacciones t {where}', params).fetchone()[0]
+    done = 0
+    
+    def on_chunk(count):
+        nonlocal done
+        done += count
+        if progress is not None:
+            progress(done, total)
+        if cancel is not None and cancel.is_set():
+            raise ExportCancelled()
+    
+    if fmt == 'parquet':
+        writer, chunk_size = write_parquet_export, EXPORT_PARQUET_CHUNK_SIZE
+    else:
+        writer, chunk_size = write_csv_export, EXPORT_CHUNK_SIZE
+    
+    try:
+        writer(path, iter_transaction_chunks(conn, tipo, start_date, end_date, chunk_size), on_chunk)
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    return done
@@ -0,0 +1,179 @@
+"""Importación de extractos bancarios CSV y OFX en lotes."""
+
+import csv
+import re
+import time
+from collections import namedtuple
+from itertools import islice
+
+from .categories import CategoryStore
+from .validation import TIPOS, parse_amount, parse_date
+
+# Importación de extractos: filas escritas por lote dentro de una única transacción
+IMPORT_BATCH_SIZE = 5000
+IMPORT_MAX_ERRORS = 20
+
+# Categorías usadas cuando el extracto no trae ninguna
+IMPORT_DEFAULT_CATEGORIES = {'Gasto': 'Otros gastos', 'Ingreso': 'Otros ingresos'}
+
+ImportReport = namedtuple('ImportReport', 'imported skipped errors elapsed')
+
+# Etiqueta OFX con su texto hasta la siguiente etiqueta (SGML no exige cierres)
+OFX_TOKEN = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+
+def read_csv_statement(file, decimal='.'):
+    # Genera (línea, fecha, tipo, categoría, monto, descripción) sin validar.
+    # Columnas: fecha y monto obligatorias; tipo, categoria y descripcion opcionales.
+    # Sin columna tipo, el signo del monto decide entre Gasto e Ingreso.
+    sample = file.read(4096)
+    file.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t|')
+    except csv.Error:
+        dialect = csv.excel
+    
+    reader = csv.reader(file, dialect)
+    header = [name.strip().lower().replace('í', 'i').replace('ó', 'o') for name in next(reader, [])]
+    missing = {'fecha', 'monto'} - set(header)
+    if missing:
+        raise ValueError(f"faltan columnas en el CSV: {', '.join(sorted(missing))}")
+    
+    columns = {name: index for index, name in enumerate(header)}
+    fecha_col = columns['fecha']
+    monto_col = columns['monto']
+    tipo_col = columns.get('tipo')
+    categoria_col = columns.get('categoria')
+    descripcion_col = columns.get('descripcion')
+    
+    for row in reader:
+        if not row:
+            continue
+        
+        def field(index):
+            return row[index].strip() if index is not None and index < len(row) else ''
+        
+        monto = field(monto_col)
+        tipo = field(tipo_col).capitalize()
+        if not tipo:
+            tipo = 'Gasto' if monto.startswith('-') else 'Ingreso'
+            monto = monto.lstrip('-+')
+        yield reader.line_num, field(fecha_col), tipo, field(categoria_col), monto, field(descripcion_col)
+
+
+def iter_ofx_elements(file, chunk_size=65536):
+    # Tokeniza OFX (SGML o XML) por bloques: genera (etiqueta, texto) y
+    # ('/ETIQUETA', '') al cerrar; no necesita el archivo completo en memoria
+    pending = ''
+    while True:
+        chunk = file.read(chunk_size)
+        data = pending + chunk
+        if chunk:
+            # Reservar la última etiqueta, que puede estar cortada
+            cut = data.rfind('<')
+            data, pending = data[:cut], data[cut:]
+        for match in OFX_TOKEN.finditer(data):
+            closing, tag, text = match.groups()
+            yield ('/' + tag if closing else tag), text.strip()
+        if not chunk:
+            return
+
+
+def read_ofx_statement(file, decimal='.'):
+    # Genera las transacciones (<STMTTRN>) con el mismo formato que read_csv_statement
+    current = None
+    count = 0
+    for tag, text in iter_ofx_elements(file):
+        tag = tag.upper()
+        if tag == 'STMTTRN':
+            current = {}
+        elif tag == '/STMTTRN' and current is not None:
+            count += 1
+            monto = current.get('TRNAMT', '')
+            tipo = 'Gasto' if monto.startswith('-') else 'Ingreso'
+            fecha = current.get('DTPOSTED', '')[:8]
+            if len(fecha) == 8 and fecha.isdigit():
+                fecha = f"{fecha[:4]}-{fecha[4:6]}-{fecha[6:]}"
+            descripcion = ' '.join(filter(None, (current.get('NAME'), current.get('MEMO'))))
+            yield count, fecha, tipo, '', monto.lstrip('-+'), descripcion
+            current = None
+        elif current is not None and not tag.startswith('/'):
+            current[tag] = text
+
+
+def import_statement(conn, file, fmt='csv', date_format="%Y-%m-%d", decimal='.',
+                     batch_size=IMPORT_BATCH_SIZE):
+    # Importa un extracto abierto en modo texto. Las filas inválidas se omiten
+    # y se informan; las categorías desconocidas se crean con el tipo de la fila.
+    reader = read_ofx_statement if fmt == 'ofx' else read_csv_statement
+    
+    cursor = conn.cursor()
+    categories = CategoryStore(conn).cache()
+    errors = []
+    skipped = 0
+    
+    # Los extractos pueden escribir una categoría existente con otras
+    # mayúsculas: se usa la coincidencia exacta y, si no hay, la primera que
+    # coincida sin distinguirlas
+    folded = {}
+    for cat_id, nombre, tipo in categories.all():
+        folded.setdefault(nombre.casefold(), cat_id)
+    
+    def category_id(nombre, tipo):
+        nombre = nombre or IMPORT_DEFAULT_CATEGORIES[tipo]
+        cat_id = categories.id_of(nombre)
+        if cat_id is None:
+            cat_id = folded.get(nombre.casefold())
+        if cat_id is None:
+            cursor.execute('INSERT INTO categorias (nombre, tipo) VALUES (?, ?)', (nombre, tipo))
+            cat_id = cursor.lastrowid
+            categories.add(cat_id, nombre, tipo)
+            folded[nombre.casefold()] = cat_id
+        return cat_id
+    
+    def validated_rows():
+        nonlocal skipped
+        for line, fecha, tipo, categoria, monto, descripcion in reader(file, decimal):
+            try:
+                if tipo not in TIPOS:
+                    raise ValueError(f"tipo desconocido: {tipo!r}")
+                monto = parse_amount(monto, decimal)
+                fecha = parse_date(fecha, date_format)
+            except ValueError as e:
+                skipped += 1
+                if len(errors) < IMPORT_MAX_ERRORS:
+                    errors.append(f"línea {line}: {e}")
+                continue
+            # Solo una fila válida puede crear su categoría
+            yield tipo, category_id(categoria, tipo), monto, fecha, descripcion
+    
+    start = time.perf_counter()
+    imported = 0
+    rows = validated_rows()
+    cursor.execute('''
+        CREATE TEMP TABLE IF NOT EXISTS importacion (
+            tipo TEXT, categoria_id INTEGER, monto INTEGER, fecha TEXT, descripcion TEXT
+        )
+    ''')
+    cursor.execute('BEGIN')
+    try:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            # Cada lote pasa por una tabla temporal y entra con una sola
+            # sentencia: FTS5 vuelca su índice en cada sentencia, así que
+            # insertar fila a fila en transacciones es varias veces más lento
+            cursor.executemany('INSERT INTO importacion VALUES (?, ?, ?, ?, ?)', batch)
+            cursor.execute('''
+                INSERT INTO transacciones (tipo, categoria_id, monto, fecha, descripcion)
+                SELECT tipo, categoria_id, monto, fecha, descripcion FROM importacion
+            ''')
+            cursor.execute('DELETE FROM importacion')
+            imported += len(batch)
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
+    
+    return ImportReport(imported, skipped, errors, time.perf_counter() - start)
@@ -0,0 +1,291 @@
+"""Medición de consultas SQLite y de operaciones de la interfaz.
+
+Apagada por defecto. Con METRICS.enabled las conexiones abiertas con
+connect() entregan cursores que miden cada sentencia (desde execute hasta
+leer sus filas) y timed() mide funciones completas. Cada operación acumula
+un histograma de latencias (las sentencias se agrupan por su forma, ver
+query_key); las consultas más lentas que METRICS.slow_ms se guardan con su
+EXPLAIN QUERY PLAN y, si hay slow_log_path, se agregan a ese archivo como
+JSON por línea.
+"""
+
+import bisect
+import functools
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+# Límites superiores en ms de los intervalos del histograma; el último
+# intervalo, sin límite, junta todo lo que pasa de 5 s
+HISTOGRAM_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Consultas lentas: umbral por defecto y cuántas se guardan en memoria
+SLOW_QUERY_MS = 50
+SLOW_LOG_SIZE = 200
+
+# Listas de parámetros de un IN (...): su largo depende de los datos, así que
+# en la clave de la consulta se juntan en una sola forma
+IN_PLACEHOLDERS = re.compile(r'\bIN \(\?(?:, ?\?)*\)', re.IGNORECASE)
+UNION_ALL = ' UNION ALL '
+COMPOUND_TAIL = (' ORDER BY ', ' LIMIT ')
+
+
+class OperationStats:
+    # Cantidad, suma, máximo e histograma de las duraciones de una operación
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+    
+    def add(self, seconds):
+        ms = seconds * 1000
+        self.count += 1
+        self.total += ms
+        self.maximum = max(self.maximum, ms)
+        self.buckets[bisect.bisect_left(HISTOGRAM_BOUNDS_MS, ms)] += 1
+    
+    def percentile(self, fraction):
+        # Límite superior del intervalo donde cae el percentil, acotado por el máximo
+        wanted = fraction * self.count
+        seen = 0
+        for bound, count in zip(HISTOGRAM_BOUNDS_MS, self.buckets):
+            seen += count
+            if seen >= wanted:
+                return min(bound, self.maximum)
+        return self.maximum
+    
+    def as_dict(self):
+        return {
+            'cantidad': self.count,
+            'total_ms': round(self.total, 3),
+            'media_ms': round(self.total / self.count, 3) if self.count else 0,
+            'p50_ms': round(self.percentile(0.5), 3),
+            'p95_ms': round(self.percentile(0.95), 3),
+            'p99_ms': round(self.percentile(0.99), 3),
+            'max_ms': round(self.maximum, 3),
+            'histograma': dict(zip([f'<={bound}' for bound in HISTOGRAM_BOUNDS_MS] + ['>5000'], self.buckets)),
+        }
+
+
+class Metrics:
+    # Registro compartido por todos los hilos; solo toma el lock cuando está
+    # encendido y hay algo que anotar
+    def __init__(self, enabled=False, slow_ms=SLOW_QUERY_MS, slow_log_path=None):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.slow_log_path = slow_log_path
+        self.lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        self.operations = {}
+        self.slow_queries = deque(maxlen=SLOW_LOG_SIZE)
+        self.started = datetime.now()
+    
+    def record(self, name, seconds):
+        with self.lock:
+            stats = self.operations.get(name)
+            if stats is None:
+                stats = self.operations[name] = OperationStats()
+            stats.add(seconds)
+    
+    def record_query(self, conn, sql, parameters, seconds):
+        sql = ' '.join(sql.split())
+        key = query_key(sql)
+        self.record(f'sql: {key}', seconds)
+        if seconds * 1000 < self.slow_ms:
+            return
+        
+        entry = {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'ms': round(seconds * 1000, 3),
+            'sql': key,
+            'parametros': [repr(value)[:80] for value in parameters] if isinstance(parameters, (list, tuple))
+                          else repr(parameters)[:200],
+            'plan': explain(conn, sql, parameters),
+            'hilo': threading.current_thread().name,
+        }
+        with self.lock:
+            self.slow_queries.append(entry)
+            if self.slow_log_path:
+                with open(self.slow_log_path, 'a', encoding='utf-8') as file:
+                    file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    
+    def snapshot(self):
+        # Estado actual como datos JSON; operaciones de mayor a menor tiempo total
+        with self.lock:
+            operations = sorted(self.operations.items(), key=lambda item: item[1].total, reverse=True)
+            return {
+                'desde': self.started.isoformat(timespec='seconds'),
+                'activo': self.enabled,
+                'umbral_lento_ms': self.slow_ms,
+                'operaciones': {name: stats.as_dict() for name, stats in operations},
+                'consultas_lentas': list(self.slow_queries),
+            }
+    
+    def dump(self, file):
+        json.dump(self.snapshot(), file, indent=2, ensure_ascii=False)
+        file.write('\n')
+
+
+METRICS = Metrics()
+
+
+def query_key(sql):
+    # Nombre con que se agrupa una sentencia: espacios colapsados, cada lista
+    # IN (?, ?, ...) como IN (?…) y, en un UNION ALL, cada forma de rama una
+    # sola vez, en orden alfabético y seguidas de UNION ALL …, así la cantidad
+    # y el orden de las ramas que arma page() no crean una clave nueva
+    sql = IN_PLACEHOLDERS.sub('IN (?…)', ' '.join(sql.split()))
+    branches = split_top_level(sql, UNION_ALL)
+    if len(branches) == 1:
+        return sql
+    # El ORDER BY y el LIMIT del final son del UNION ALL, no de la última rama
+    last = branches.pop()
+    cut = min([index for marker in COMPOUND_TAIL for index in top_level_positions(last, marker)] or [len(last)])
+    branches.append(last[:cut])
+    return UNION_ALL.join(sorted(set(branches))) + UNION_ALL + '…' + last[cut:]
+
+
+def top_level_positions(sql, marker):
+    # Posiciones de marker fuera de todo paréntesis
+    depth = 0
+    positions = []
+    for index, char in enumerate(sql):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif depth == 0 and sql.startswith(marker, index):
+            positions.append(index)
+    return positions
+
+
+def split_top_level(sql, marker):
+    parts = []
+    start = 0
+    for index in top_level_positions(sql, marker):
+        parts.append(sql[start:index])
+        start = index + len(marker)
+    parts.append(sql[start:])
+    return parts
+
+
+def explain(conn, sql, parameters):
+    # EXPLAIN QUERY PLAN como líneas indentadas; vacío si la sentencia no lo admite
+    if sql.split(None, 1)[0].upper() not in ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE'):
+        return []
+    try:
+        rows = sqlite3.Cursor(conn).execute(f'EXPLAIN QUERY PLAN {sql}', parameters).fetchall()
+    except sqlite3.Error:
+        return []
+    depth = {0: 0}
+    lines = []
+    for node, parent, unused, detail in rows:
+        depth[node] = depth.get(parent, 0) + 1
+        lines.append('  ' * (depth[node] - 1) + detail)
+    return lines
+
+
+def timed(category):
+    # Decorador: con METRICS encendido mide cada llamada como 'category: nombre'
+    def decorate(func):
+        name = f'{category}: {func.__name__}'
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not METRICS.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                METRICS.record(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+class TimedCursor(sqlite3.Cursor):
+    # Mide cada sentencia desde execute hasta que se leen sus filas. La
+    # medición se cierra al ejecutar otra sentencia, al leer todas las filas
+    # con fetchall o al cerrar o liberar el cursor. Recorrer el cursor con for
+    # no se mide: así el exportador no paga un costo por fila
+    sql = None
+    
+    def execute(self, sql, parameters=()):
+        self.finish()
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self.sql = sql
+            self.parameters = parameters
+            self.elapsed = time.perf_counter() - start
+    
+    def executemany(self, sql, seq_of_parameters):
+        self.finish()
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            METRICS.record(f'sql (executemany): {query_key(sql)}', time.perf_counter() - start)
+    
+    def fetchone(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            if self.sql is not None:
+                self.elapsed += time.perf_counter() - start
+    
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        try:
+            return super().fetchmany(self.arraysize if size is None else size)
+        finally:
+            if self.sql is not None:
+                self.elapsed += time.perf_counter() - start
+    
+    def fetchall(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            if self.sql is not None:
+                self.elapsed += time.perf_counter() - start
+                self.finish()
+    
+    def finish(self):
+        if self.sql is not None:
+            sql, self.sql = self.sql, None
+            METRICS.record_query(self.connection, sql, self.parameters, self.elapsed)
+    
+    def close(self):
+        self.finish()
+        super().close()
+    
+    def __del__(self):
+        try:
+            self.finish()
+        except sqlite3.Error:
+            pass
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    # Fábrica de conexión de connect(): con METRICS apagado entrega cursores
+    # comunes y el único costo es esta llamada por cursor
+    def cursor(self, factory=None):
+        if factory is None:
+            factory = TimedCursor if METRICS.enabled else sqlite3.Cursor
+        return super().cursor(factory)
+    
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
@@ -0,0 +1,39 @@
+"""Montos como enteros en centavos: conversión desde texto y formato para mostrar."""
+
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+# Unidades menores por unidad de moneda; los montos se guardan como enteros
+CENTS = 100
+CENTS_DIGITS = 2
+
+# Mayor monto aceptado, en centavos: diez billones de unidades, muy por debajo
+# del límite de INTEGER de SQLite (2**63 - 1) para que tampoco se desborden
+# las sumas del resumen
+MAX_CENTS = 10 ** 15
+
+
+def to_cents(value):
+    # '12.5', 12.5 o Decimal('12.50') -> 1250; redondea medio centavo hacia arriba
+    try:
+        amount = Decimal(repr(value)) if isinstance(value, float) else Decimal(value)
+    except (InvalidOperation, TypeError):
+        raise ValueError(f"monto inválido: {value!r}") from None
+    if not amount.is_finite():
+        raise ValueError(f"monto inválido: {value!r}")
+    # Antes de escalar: scaleb y quantize fallan con exponentes muy grandes
+    if abs(amount) > from_cents(MAX_CENTS):
+        raise ValueError(f"monto fuera de rango: {value!r}")
+    return int(amount.scaleb(CENTS_DIGITS).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents):
+    # 1250 -> Decimal('12.50'), exacto
+    return Decimal(cents).scaleb(-CENTS_DIGITS)
+
+
+def format_amount(cents, grouping=True):
+    # 123456 -> '1,234.56' (o '1234.56' sin separador de miles)
+    sign = '-' if cents < 0 else ''
+    units, rest = divmod(abs(cents), CENTS)
+    units = f"{units:,}" if grouping else str(units)
+    return f"{sign}{units}.{rest:0{CENTS_DIGITS}d}"
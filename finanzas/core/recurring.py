@@ -0,0 +1,135 @@
+"""Transacciones recurrentes: reglas y generación de las ocurrencias vencidas."""
+
+import calendar
+from datetime import date, timedelta
+
+from .validation import ValidationError, parse_date, validate_transaction
+
+# Frecuencia -> unidad del intervalo ("cada N meses")
+FRECUENCIAS = {'mensual': 'meses', 'semanal': 'semanas', 'diaria': 'días'}
+
+
+def occurrence(inicio, frecuencia, intervalo, number):
+    # Fecha 'YYYY-MM-DD' de la ocurrencia number (desde 0). Se cuenta siempre
+    # desde inicio para que el recorte de fin de mes no se arrastre: una regla
+    # del 31 cae el 28/29 en febrero y vuelve al 31 en marzo
+    start = date.fromisoformat(inicio)
+    if frecuencia == 'mensual':
+        year, month = divmod(start.year * 12 + start.month - 1 + number * intervalo, 12)
+        day = min(start.day, calendar.monthrange(year, month + 1)[1])
+        return date(year, month + 1, day).isoformat()
+    days = 7 if frecuencia == 'semanal' else 1
+    return (start + timedelta(days=number * intervalo * days)).isoformat()
+
+
+class RecurringStore:
+    def __init__(self, conn):
+        self.conn = conn
+    
+    def add(self, tipo, categoria, monto, inicio, frecuencia='mensual', intervalo=1, descripcion='', fin=None):
+        # Mismas validaciones que una transacción; la primera ocurrencia es inicio
+        monto, inicio = validate_transaction(tipo, categoria, monto, inicio)
+        if frecuencia not in FRECUENCIAS:
+            raise ValidationError(f"Frecuencia desconocida: {frecuencia}")
+        try:
+            intervalo = int(intervalo)
+        except (TypeError, ValueError):
+            intervalo = 0
+        if intervalo < 1:
+            raise ValidationError("El intervalo debe ser un número entero positivo")
+        if fin:
+            try:
+                fin = parse_date(fin)
+            except ValueError:
+                raise ValidationError("Por favor ingrese una fecha final válida en formato YYYY-MM-DD") from None
+            if fin < inicio:
+                raise ValidationError("La fecha final es anterior a la inicial")
+        
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            INSERT INTO recurrentes (tipo, categoria_id, monto, descripcion, frecuencia, intervalo, inicio, fin,
+                                     generadas, proxima)
+            SELECT ?, id, ?, ?, ?, ?, ?, ?, 0, ? FROM categorias WHERE nombre = ?
+        ''', (tipo, monto, descripcion, frecuencia, intervalo, inicio, fin or None, inicio, categoria))
+        
+        if cursor.rowcount == 0:
+            self.conn.rollback()
+            raise ValidationError("La categoría seleccionada no existe")
+        
+        self.conn.commit()
+        return cursor.lastrowid
+    
+    def all(self):
+        # (id, tipo, categoría, monto, descripción, frecuencia, intervalo,
+        # inicio, fin, próxima) ordenadas por próxima fecha
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT r.id, r.tipo, c.nombre, r.monto, r.descripcion, r.frecuencia, r.intervalo, r.inicio, r.fin,
+                   r.proxima
+            FROM recurrentes r
+            JOIN categorias c ON c.id = r.categoria_id
+            ORDER BY r.proxima, r.id
+        ''')
+        return cursor.fetchall()
+    
+    def delete(self, rule_id):
+        # Las transacciones ya generadas se conservan
+        cursor = self.conn.cursor()
+        cursor.execute('DELETE FROM recurrentes WHERE id = ?', (rule_id,))
+        self.conn.commit()
+        return cursor.rowcount
+    
+    def generate(self, today=None):
+        # Genera todas las ocurrencias vencidas hasta today ('YYYY-MM-DD', por
+        # defecto hoy) de todas las reglas, incluidos los períodos que se
+        # perdieron mientras la aplicación no corría, y devuelve los ids de las
+        # transacciones nuevas. Las ocurrencias entran con una sola sentencia
+        # y cada regla avanza su próxima fecha en la misma transacción, así que
+        # volver a llamarla no genera nada nuevo
+        today = today or date.today().isoformat()
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            CREATE TEMP TABLE IF NOT EXISTS ocurrencias (
+                tipo TEXT, categoria_id INTEGER, monto INTEGER, fecha TEXT, descripcion TEXT, recurrente_id INTEGER
+            )
+        ''')
+        # El escritor del servidor ya abrió la transacción del grupo
+        if not self.conn.in_transaction:
+            cursor.execute('BEGIN IMMEDIATE')
+        try:
+            cursor.execute('''
+                SELECT id, tipo, categoria_id, monto, descripcion, frecuencia, intervalo, inicio, fin, generadas
+                FROM recurrentes
+                WHERE proxima <= ? AND (fin IS NULL OR proxima <= fin)
+            ''', (today,))
+            rows = []
+            advanced = []
+            for rule_id, tipo, categoria_id, monto, descripcion, frecuencia, intervalo, inicio, fin, number \
+                    in cursor.fetchall():
+                fecha = occurrence(inicio, frecuencia, intervalo, number)
+                while fecha <= today and (fin is None or fecha <= fin):
+                    rows.append((tipo, categoria_id, monto, fecha, descripcion, rule_id))
+                    number += 1
+                    fecha = occurrence(inicio, frecuencia, intervalo, number)
+                advanced.append((number, fecha, rule_id))
+            
+            ids = []
+            if rows:
+                # Como en el importador: una sola sentencia sobre transacciones
+                # en lugar de una por fila
+                cursor.execute('SELECT COALESCE(MAX(id), 0) FROM transacciones')
+                last_id = cursor.fetchone()[0]
+                cursor.executemany('INSERT INTO ocurrencias VALUES (?, ?, ?, ?, ?, ?)', rows)
+                cursor.execute('''
+                    INSERT OR IGNORE INTO transacciones (tipo, categoria_id, monto, fecha, descripcion, recurrente_id)
+                    SELECT tipo, categoria_id, monto, fecha, descripcion, recurrente_id FROM ocurrencias
+                ''')
+                cursor.execute('DELETE FROM ocurrencias')
+                cursor.execute('SELECT id FROM transacciones WHERE id > ?', (last_id,))
+                ids = [row[0] for row in cursor.fetchall()]
+            cursor.executemany('UPDATE recurrentes SET generadas = ?, proxima = ? WHERE id = ?', advanced)
+        except Exception:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+        return ids
@@ -0,0 +1,376 @@
+"""Esquema de la base de datos y migraciones versionadas con PRAGMA user_version."""
+
+DEFAULT_CATEGORIES = [
+    ('Alimentos', 'Gasto'),
+    ('Transporte', 'Gasto'),
+    ('Vivienda', 'Gasto'),
+    ('Entretenimiento', 'Gasto'),
+    ('Salario', 'Ingreso'),
+    ('Freelance', 'Ingreso'),
+    ('Inversiones', 'Ingreso')
+]
+
+
+# Recalcula resumen_mensual desde cero a partir de transacciones
+SUMMARY_REBUILD_SQL = '''
+    INSERT INTO resumen_mensual (tipo, categoria_id, mes, total, cantidad)
+    SELECT tipo, categoria_id, substr(fecha, 1, 7), SUM(monto), COUNT(*)
+    FROM transacciones
+    GROUP BY tipo, categoria_id, substr(fecha, 1, 7)
+'''
+
+
+# Recalcula resumen_diario desde cero a partir de transacciones
+DAILY_REBUILD_SQL = '''
+    INSERT INTO resumen_diario (dia, tipo, total, cantidad)
+    SELECT dia, tipo, SUM(monto), COUNT(*)
+    FROM transacciones
+    GROUP BY dia, tipo
+'''
+
+
+def create_summary_triggers(cursor):
+    # Mantienen resumen_mensual al día con cada cambio en transacciones
+    cursor.execute('''
+        CREATE TRIGGER trg_resumen_insert AFTER INSERT ON transacciones
+        BEGIN
+            INSERT INTO resumen_mensual (tipo, categoria_id, mes, total, cantidad)
+            VALUES (NEW.tipo, NEW.categoria_id, substr(NEW.fecha, 1, 7), NEW.monto, 1)
+            ON CONFLICT (tipo, categoria_id, mes)
+            DO UPDATE SET total = total + excluded.total, cantidad = cantidad + 1;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER trg_resumen_delete AFTER DELETE ON transacciones
+        BEGIN
+            UPDATE resumen_mensual SET total = total - OLD.monto, cantidad = cantidad - 1
+            WHERE tipo = OLD.tipo AND categoria_id = OLD.categoria_id AND mes = substr(OLD.fecha, 1, 7);
+            DELETE FROM resumen_mensual
+            WHERE tipo = OLD.tipo AND categoria_id = OLD.categoria_id AND mes = substr(OLD.fecha, 1, 7)
+              AND cantidad = 0;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER trg_resumen_update AFTER UPDATE OF tipo, categoria_id, monto, fecha ON transacciones
+        BEGIN
+            UPDATE resumen_mensual SET total = total - OLD.monto, cantidad = cantidad - 1
+            WHERE tipo = OLD.tipo AND categoria_id = OLD.categoria_id AND mes = substr(OLD.fecha, 1, 7);
+            DELETE FROM resumen_mensual
+            WHERE tipo = OLD.tipo AND categoria_id = OLD.categoria_id AND mes = substr(OLD.fecha, 1, 7)
+              AND cantidad = 0;
+            INSERT INTO resumen_mensual (tipo, categoria_id, mes, total, cantidad)
+            VALUES (NEW.tipo, NEW.categoria_id, substr(NEW.fecha, 1, 7), NEW.monto, 1)
+            ON CONFLICT (tipo, categoria_id, mes)
+            DO UPDATE SET total = total + excluded.total, cantidad = cantidad + 1;
+        END
+    ''')
+
+
+def migration_1(cursor):
+    # Esquema original; en bases existentes estas sentencias no hacen nada
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS transacciones (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo TEXT NOT NULL,
+            categoria TEXT NOT NULL,
+            monto REAL NOT NULL,
+            fecha TEXT NOT NULL,
+            descripcion TEXT
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS categorias (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL UNIQUE,
+            tipo TEXT NOT NULL
+        )
+    ''')
+    
+    # Insertar categorías predeterminadas si no existen
+    cursor.executemany('INSERT OR IGNORE INTO categorias (nombre, tipo) VALUES (?, ?)', DEFAULT_CATEGORIES)
+
+
+def migration_2(cursor):
+    # Crear las categorías usadas por transacciones que no estén registradas
+    cursor.execute('''
+        INSERT OR IGNORE INTO categorias (nombre, tipo)
+        SELECT DISTINCT categoria, tipo FROM transacciones
+    ''')
+    
+    # SQLite no permite añadir una clave foránea con ALTER TABLE: reconstruir la tabla
+    cursor.execute('''
+        CREATE TABLE transacciones_nueva (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo TEXT NOT NULL,
+            categoria_id INTEGER NOT NULL REFERENCES categorias (id) ON DELETE RESTRICT,
+            monto REAL NOT NULL,
+            fecha TEXT NOT NULL,
+            descripcion TEXT
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO transacciones_nueva (id, tipo, categoria_id, monto, fecha, descripcion)
+        SELECT t.id, t.tipo, c.id, t.monto, t.fecha, t.descripcion
+        FROM transacciones t
+        JOIN categorias c ON c.nombre = t.categoria
+    ''')
+    cursor.execute('DROP TABLE transacciones')
+    cursor.execute('ALTER TABLE transacciones_nueva RENAME TO transacciones')
+    
+    # Historial (todos y filtrado por tipo), totales por tipo y categoría,
+    # y comprobación de uso de una categoría antes de borrarla
+    cursor.execute('CREATE INDEX idx_transacciones_fecha_id ON transacciones (fecha, id)')
+    cursor.execute('CREATE INDEX idx_transacciones_tipo_fecha ON transacciones (tipo, fecha, id)')
+    cursor.execute('CREATE INDEX idx_transacciones_tipo_categoria ON transacciones (tipo, categoria_id, monto)')
+    cursor.execute('CREATE INDEX idx_transacciones_categoria_tipo ON transacciones (categoria_id, tipo)')
+
+
+def migration_3(cursor):
+    # Totales y cantidades por (tipo, categoría, mes), mantenidos por triggers
+    cursor.execute('''
+        CREATE TABLE resumen_mensual (
+            tipo TEXT NOT NULL,
+            categoria_id INTEGER NOT NULL,
+            mes TEXT NOT NULL,
+            total REAL NOT NULL,
+            cantidad INTEGER NOT NULL,
+            PRIMARY KEY (tipo, categoria_id, mes)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute(SUMMARY_REBUILD_SQL)
+    
+    create_summary_triggers(cursor)
+
+
+def migration_4(cursor):
+    # Montos en centavos enteros: las sumas pasan a ser exactas. La afinidad
+    # REAL de la columna convertiría los enteros a coma flotante, así que
+    # transacciones se reconstruye con monto INTEGER
+    cursor.execute('''
+        CREATE TABLE transacciones_nueva (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo TEXT NOT NULL,
+            categoria_id INTEGER NOT NULL REFERENCES categorias (id) ON DELETE RESTRICT,
+            monto INTEGER NOT NULL,
+            fecha TEXT NOT NULL,
+            descripcion TEXT
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO transacciones_nueva (id, tipo, categoria_id, monto, fecha, descripcion)
+        SELECT id, tipo, categoria_id, CAST(round(monto * 100) AS INTEGER), fecha, descripcion
+        FROM transacciones
+    ''')
+    cursor.execute('DROP TABLE transacciones')
+    cursor.execute('ALTER TABLE transacciones_nueva RENAME TO transacciones')
+    cursor.execute('CREATE INDEX idx_transacciones_fecha_id ON transacciones (fecha, id)')
+    cursor.execute('CREATE INDEX idx_transacciones_tipo_fecha ON transacciones (tipo, fecha, id)')
+    cursor.execute('CREATE INDEX idx_transacciones_tipo_categoria ON transacciones (tipo, categoria_id, monto)')
+    cursor.execute('CREATE INDEX idx_transacciones_categoria_tipo ON transacciones (categoria_id, tipo)')
+    
+    # Los agregados se recalculan desde los centavos en lugar de convertir las
+    # sumas en coma flotante, que pueden arrastrar error
+    cursor.execute('DROP TABLE resumen_mensual')
+    cursor.execute('''
+        CREATE TABLE resumen_mensual (
+            tipo TEXT NOT NULL,
+            categoria_id INTEGER NOT NULL,
+            mes TEXT NOT NULL,
+            total INTEGER NOT NULL,
+            cantidad INTEGER NOT NULL,
+            PRIMARY KEY (tipo, categoria_id, mes)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute(SUMMARY_REBUILD_SQL)
+    create_summary_triggers(cursor)
+
+
+def create_daily_triggers(cursor):
+    # Mantienen resumen_diario al día con cada cambio en transacciones
+    cursor.execute('''
+        CREATE TRIGGER trg_diario_insert AFTER INSERT ON transacciones
+        BEGIN
+            INSERT INTO resumen_diario (dia, tipo, total, cantidad)
+            VALUES (NEW.dia, NEW.tipo, NEW.monto, 1)
+            ON CONFLICT (dia, tipo)
+            DO UPDATE SET total = total + excluded.total, cantidad = cantidad + 1;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER trg_diario_delete AFTER DELETE ON transacciones
+        BEGIN
+            UPDATE resumen_diario SET total = total - OLD.monto, cantidad = cantidad - 1
+            WHERE dia = OLD.dia AND tipo = OLD.tipo;
+            DELETE FROM resumen_diario WHERE dia = OLD.dia AND tipo = OLD.tipo AND cantidad = 0;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER trg_diario_update AFTER UPDATE OF tipo, monto, fecha ON transacciones
+        BEGIN
+            UPDATE resumen_diario SET total = total - OLD.monto, cantidad = cantidad - 1
+            WHERE dia = OLD.dia AND tipo = OLD.tipo;
+            DELETE FROM resumen_diario WHERE dia = OLD.dia AND tipo = OLD.tipo AND cantidad = 0;
+            INSERT INTO resumen_diario (dia, tipo, total, cantidad)
+            VALUES (NEW.dia, NEW.tipo, NEW.monto, 1)
+            ON CONFLICT (dia, tipo)
+            DO UPDATE SET total = total + excluded.total, cantidad = cantidad + 1;
+        END
+    ''')
+
+
+def migration_5(cursor):
+    # dia: días desde 1970-01-01. Es una columna generada a partir de fecha,
+    # así que ninguna escritura tiene que mantenerla; el índice la guarda
+    # y los rangos de fechas se resuelven como rangos de enteros
+    cursor.execute('''
+        ALTER TABLE transacciones ADD COLUMN dia INTEGER
+        GENERATED ALWAYS AS (CAST(julianday(fecha) - 2440587.5 AS INTEGER)) VIRTUAL
+    ''')
+    cursor.execute('CREATE INDEX idx_transacciones_dia ON transacciones (dia, tipo, monto)')
+    
+    # Totales por día y tipo: las series semanales, mensuales y anuales de
+    # cualquier período leen a lo sumo dos filas por día
+    cursor.execute('''
+        CREATE TABLE resumen_diario (
+            dia INTEGER NOT NULL,
+            tipo TEXT NOT NULL,
+            total INTEGER NOT NULL,
+            cantidad INTEGER NOT NULL,
+            PRIMARY KEY (dia, tipo)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute(DAILY_REBUILD_SQL)
+    create_daily_triggers(cursor)
+
+
+def migration_6(cursor):
+    # Índice de texto completo sobre descripcion. Es de contenido externo: el
+    # texto solo se guarda en transacciones y los triggers mantienen el índice
+    cursor.execute('''
+        CREATE VIRTUAL TABLE transacciones_fts USING fts5 (
+            descripcion,
+            content = 'transacciones',
+            content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+    ''')
+    cursor.execute("INSERT INTO transacciones_fts (transacciones_fts) VALUES ('rebuild')")
+    
+    # Historial filtrado por categoría en orden de fecha; también sirve para
+    # contar el uso de una categoría, que era lo único que cubría el anterior
+    cursor.execute('DROP INDEX idx_transacciones_categoria_tipo')
+    cursor.execute('CREATE INDEX idx_transacciones_categoria_fecha ON transacciones (categoria_id, fecha, id)')
+    
+    cursor.execute('''
+        CREATE TRIGGER trg_fts_insert AFTER INSERT ON transacciones
+        BEGIN
+            INSERT INTO transacciones_fts (rowid, descripcion) VALUES (NEW.id, NEW.descripcion);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER trg_fts_delete AFTER DELETE ON transacciones
+        BEGIN
+            INSERT INTO transacciones_fts (transacciones_fts, rowid, descripcion)
+            VALUES ('delete', OLD.id, OLD.descripcion);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER trg_fts_update AFTER UPDATE OF descripcion ON transacciones
+        BEGIN
+            INSERT INTO transacciones_fts (transacciones_fts, rowid, descripcion)
+            VALUES ('delete', OLD.id, OLD.descripcion);
+            INSERT INTO transacciones_fts (rowid, descripcion) VALUES (NEW.id, NEW.descripcion);
+        END
+    ''')
+
+
+def migration_7(cursor):
+    # Transacciones recurrentes: cada regla guarda cuántas ocurrencias generó
+    # y la fecha de la próxima, así generar otra vez no repite ninguna
+    cursor.execute('''
+        CREATE TABLE recurrentes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo TEXT NOT NULL,
+            categoria_id INTEGER NOT NULL REFERENCES categorias (id) ON DELETE RESTRICT,
+            monto INTEGER NOT NULL,
+            descripcion TEXT,
+            frecuencia TEXT NOT NULL,
+            intervalo INTEGER NOT NULL,
+            inicio TEXT NOT NULL,
+            fin TEXT,
+            generadas INTEGER NOT NULL,
+            proxima TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX idx_recurrentes_proxima ON recurrentes (proxima)')
+    
+    # Ocurrencia de origen de cada transacción generada. El índice único
+    # impide duplicarla aunque dos procesos generen a la vez, y al borrar la
+    # regla las transacciones se conservan
+    cursor.execute('ALTER TABLE transacciones ADD COLUMN recurrente_id INTEGER '
+                   'REFERENCES recurrentes (id) ON DELETE SET NULL')
+    cursor.execute('''
+        CREATE UNIQUE INDEX idx_transacciones_recurrente ON transacciones (recurrente_id, fecha)
+        WHERE recurrente_id IS NOT NULL
+    ''')
+    
+    # Presupuesto mensual por categoría; lo gastado se lee de resumen_mensual
+    cursor.execute('''
+        CREATE TABLE presupuestos (
+            categoria_id INTEGER PRIMARY KEY REFERENCES categorias (id) ON DELETE CASCADE,
+            monto INTEGER NOT NULL
+        )
+    ''')
+
+
+def migration_8(cursor):
+    # Historial ordenado por monto, solo o por tipo (el id del final de la
+    # clave va implícito en cada entrada); dentro de una categoría lo da
+    # idx_transacciones_tipo_categoria
+    cursor.execute('CREATE INDEX idx_transacciones_monto ON transacciones (monto)')
+    cursor.execute('CREATE INDEX idx_transacciones_tipo_monto ON transacciones (tipo, monto)')
+
+
+# Cada migración lleva la base de la versión N-1 a la N (PRAGMA user_version)
+MIGRATIONS = [
+    migration_1,
+    migration_2,
+    migration_3,
+    migration_4,
+    migration_5,
+    migration_6,
+    migration_7,
+    migration_8,
+]
+
+
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn, target=None):
+    target = len(MIGRATIONS) if target is None else target
+    upgraded = False
+    
+    for number in range(schema_version(conn) + 1, target + 1):
+        # Cada migración y su número de versión se aplican en una sola
+        # transacción; IMMEDIATE serializa a varias conexiones que migren a la vez
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            if schema_version(conn) >= number:
+                conn.rollback()
+                continue
+            MIGRATIONS[number - 1](cursor)
+            cursor.execute(f'PRAGMA user_version = {number}')
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+        upgraded = True
+    
+    if upgraded:
+        cursor = conn.cursor()
+        cursor.execute('ANALYZE')
+        conn.commit()
@@ -0,0 +1,164 @@
+"""Resúmenes leídos de los agregados mensuales y diarios (resumen_mensual, resumen_diario)."""
+
+from .schema import DAILY_REBUILD_SQL, SUMMARY_REBUILD_SQL
+from .validation import epoch_day
+
+# Series: período -> (clave de agrupación, etiqueta) calculadas desde dia.
+# Las semanas van de lunes a domingo y se etiquetan con el lunes; 719162 es
+# el número de días entre el lunes 0001-01-01 y 1970-01-01, así la división
+# entera no depende del signo
+SERIES_PERIODS = {
+    'semana': ('(dia + 719162) / 7', "date((dia + 719162) / 7 * 7 - 719162 + 2440587.5)"),
+    'mes': ("strftime('%Y-%m', dia + 2440587.5)", "strftime('%Y-%m', dia + 2440587.5)"),
+    'año': ("strftime('%Y', dia + 2440587.5)", "strftime('%Y', dia + 2440587.5)"),
+}
+
+# Verificación de los resúmenes: tabla -> (filas guardadas, filas recalculadas
+# desde transacciones), ambas (clave..., total, cantidad)
+SUMMARY_CHECKS = {
+    'resumen_mensual': (
+        'SELECT tipo, categoria_id, mes, total, cantidad FROM resumen_mensual',
+        '''
+            SELECT tipo, categoria_id, substr(fecha, 1, 7), SUM(monto), COUNT(*)
+            FROM transacciones
+            GROUP BY tipo, categoria_id, substr(fecha, 1, 7)
+        ''',
+    ),
+    'resumen_diario': (
+        'SELECT dia, tipo, total, cantidad FROM resumen_diario',
+        '''
+            SELECT dia, tipo, SUM(monto), COUNT(*)
+            FROM transacciones
+            GROUP BY dia, tipo
+        ''',
+    ),
+}
+
+
+def month_days(start_month=None, end_month=None):
+    # Meses 'YYYY-MM' inclusivos -> (primer día, último día) como valores de dia
+    start_day = epoch_day(f"{start_month}-01") if start_month is not None else None
+    end_day = None
+    if end_month is not None:
+        year, month = map(int, end_month.split('-'))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        end_day = epoch_day(f"{year:04d}-{month:02d}-01") - 1
+    return start_day, end_day
+
+
+class SummaryService:
+    def __init__(self, conn):
+        self.conn = conn
+    
+    def totals(self, start_month=None, end_month=None):
+        # Ingresos, gastos y gastos por categoría en centavos, leídos de
+        # resumen_mensual; los meses son cadenas 'YYYY-MM' y ambos extremos
+        # son inclusivos
+        conditions = []
+        params = []
+        if start_month is not None:
+            conditions.append('r.mes >= ?')
+            params.append(start_month)
+        if end_month is not None:
+            conditions.append('r.mes <= ?')
+            params.append(end_month)
+        where = ''.join(f' AND {condition}' for condition in conditions)
+        
+        cursor = self.conn.cursor()
+        cursor.execute(f'''
+            SELECT r.tipo, SUM(r.total)
+            FROM resumen_mensual r
+            WHERE 1 {where}
+            GROUP BY r.tipo
+        ''', params)
+        totals = dict(cursor.fetchall())
+        
+        cursor.execute(f'''
+            SELECT c.nombre, SUM(r.total)
+            FROM resumen_mensual r
+            JOIN categorias c ON c.id = r.categoria_id
+            WHERE r.tipo = 'Gasto' {where}
+            GROUP BY r.categoria_id
+            ORDER BY SUM(r.total) DESC
+        ''', params)
+        expenses_by_category = cursor.fetchall()
+        
+        return totals.get('Ingreso', 0), totals.get('Gasto', 0), expenses_by_category
+    
+    def series(self, period='mes', start_day=None, end_day=None):
+        # [(etiqueta, ingresos, gastos, saldo acumulado)] por semana, mes o año
+        # leídos de resumen_diario; los extremos son días (columna dia)
+        # inclusivos y el saldo parte del acumulado antes de start_day
+        key, label = SERIES_PERIODS[period]
+        conditions = []
+        params = []
+        if start_day is not None:
+            conditions.append('dia >= ?')
+            params.append(start_day)
+        if end_day is not None:
+            conditions.append('dia <= ?')
+            params.append(end_day)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        
+        cursor = self.conn.cursor()
+        balance = 0
+        if start_day is not None:
+            cursor.execute('''
+                SELECT SUM(CASE WHEN tipo = 'Ingreso' THEN total ELSE -total END)
+                FROM resumen_diario
+                WHERE dia < ?
+            ''', (start_day,))
+            balance = cursor.fetchone()[0] or 0
+        
+        cursor.execute(f'''
+            SELECT {label},
+                   SUM(CASE WHEN tipo = 'Ingreso' THEN total ELSE 0 END),
+                   SUM(CASE WHEN tipo = 'Gasto' THEN total ELSE 0 END)
+            FROM resumen_diario
+            {where}
+            GROUP BY {key}
+            ORDER BY {key}
+        ''', params)
+        
+        series = []
+        for etiqueta, income, expenses in cursor.fetchall():
+            balance += income - expenses
+            series.append((etiqueta, income, expenses, balance))
+        return series
+    
+    def check(self):
+        # Comparar resumen_mensual y resumen_diario con los agregados
+        # recalculados desde transacciones; devuelve (tabla, clave,
+        # (total, cantidad) guardado, (total, cantidad) esperado)
+        differences = []
+        cursor = self.conn.cursor()
+        for table, (stored_sql, expected_sql) in SUMMARY_CHECKS.items():
+            cursor.execute(stored_sql)
+            stored = {row[:-2]: row[-2:] for row in cursor.fetchall()}
+            cursor.execute(expected_sql)
+            expected = {row[:-2]: row[-2:] for row in cursor.fetchall()}
+            
+            for key in sorted(stored.keys() | expected.keys()):
+                have = stored.get(key)
+                want = expected.get(key)
+                # Con centavos enteros los totales deben coincidir exactamente
+                if have != want:
+                    differences.append((table, key, have, want))
+        return differences
+    
+    def rebuild(self):
+        # Reconstruye resumen_mensual y resumen_diario; devuelve las
+        # diferencias encontradas antes de reconstruir (ver check)
+        differences = self.check()
+        cursor = self.conn.cursor()
+        cursor.execute('BEGIN')
+        try:
+            cursor.execute('DELETE FROM resumen_mensual')
+            cursor.execute(SUMMARY_REBUILD_SQL)
+            cursor.execute('DELETE FROM resumen_diario')
+            cursor.execute(DAILY_REBUILD_SQL)
+        except Exception:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+        return differences
@@ -0,0 +1,392 @@
+"""Acceso a la tabla transacciones."""
+
+import math
+import re
+
+from .validation import ValidationError, validate_transaction
+
+PAGE_SIZE = 200
+
+# Búsqueda: con menos coincidencias que esto se recorren las coincidencias y
+# se ordenan; con más, se recorre el historial en orden hasta llenar la página
+SEARCH_SCAN_THRESHOLD = 2000
+
+# Borrar muchos ids dispersos ensucia casi todas las páginas de la tabla y de
+# sus índices; con la caché del perfil (64 MiB en wal) SQLite las vuelca al
+# WAL y las vuelve a leer a mitad del borrado. Desde BULK_DELETE_ROWS ids la
+# caché se amplía a BULK_DELETE_CACHE_KIB mientras dura el borrado
+BULK_DELETE_ROWS = 10_000
+BULK_DELETE_CACHE_KIB = 256 * 1024
+
+# Frases entre comillas o palabras sueltas del texto de búsqueda
+SEARCH_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+# Orden del historial -> columnas de la clave de paginación. Toda clave
+# termina en el id, así es única; cada una tiene un índice que la recorre
+# en orden (categoría: categorias por nombre y, dentro de cada una,
+# idx_transacciones_categoria_fecha; monto: idx_transacciones_monto)
+SORT_COLUMNS = {
+    'fecha': ('t.fecha', 't.id'),
+    'tipo': ('t.tipo', 't.fecha', 't.id'),
+    'categoria': ('c.nombre', 't.fecha', 't.id'),
+    'monto': ('t.monto', 't.id'),
+}
+
+# Columna cuyo rango recorre el índice de cada orden junto con él; un rango
+# sobre otra columna no puede usar ese índice
+SORT_RANGES = {
+    'fecha': 't.fecha',
+    'tipo': 't.fecha',
+    'categoria': 't.fecha',
+    'monto': 't.monto',
+}
+
+# Las mismas columnas como posiciones en las filas de page()
+SORT_FIELDS = {
+    'fecha': (1, 0),
+    'tipo': (2, 1, 0),
+    'categoria': (3, 1, 0),
+    'monto': (4, 0),
+}
+
+
+def sort_key(row, order='fecha'):
+    # Clave de paginación de una fila de page() para el orden dado
+    return tuple(row[index] for index in SORT_FIELDS[order])
+
+
+def compile_filters(filters, unindexed=()):
+    # [(columna, operador, valor)] -> (condiciones, parámetros). El + delante
+    # de las columnas de unindexed impide que SQLite use sus índices
+    conditions = []
+    params = []
+    for column, operator, value in filters:
+        prefix = '+' if column in unindexed else ''
+        if operator == 'IN':
+            conditions.append(f"{prefix}{column} IN ({', '.join('?' * len(value))})")
+            params.extend(value)
+        else:
+            conditions.append(f'{prefix}{column} {operator} ?')
+            params.append(value)
+    return conditions, params
+
+
+def key_condition(columns, key, descending):
+    # Condición de paginación por clave: las filas que van después de key
+    # (antes, si el recorrido es ascendente) en el orden de columns
+    if key is None:
+        return [], []
+    operator = '<' if descending else '>'
+    return [f"({', '.join(columns)}) {operator} ({', '.join('?' * len(columns))})"], list(key)
+
+
+def ordered_select(tables, conditions, columns, direction):
+    return f'''
+        SELECT t.id, t.fecha, t.tipo, c.nombre, t.monto, t.descripcion
+        FROM {' CROSS JOIN '.join(tables)}
+        WHERE {' AND '.join(conditions)}
+        ORDER BY {', '.join(f'{column} {direction}' for column in columns)}
+        LIMIT ?
+    '''
+
+
+def fts_query(text):
+    # Texto del usuario -> consulta FTS5: cada palabra busca por prefijo y
+    # "varias palabras" entre comillas busca la frase exacta. Todo término va
+    # entre comillas, así que la sintaxis de FTS5 no se filtra desde la entrada
+    terms = []
+    for phrase, word in SEARCH_TERM.findall(text):
+        if phrase.strip():
+            terms.append(f'"{phrase}"')
+        elif word:
+            word = word.replace('"', '')
+            if word:
+                terms.append(f'"{word}"*')
+    return ' '.join(terms)
+
+
+class TransactionStore:
+    def __init__(self, conn):
+        self.conn = conn
+    
+    def add(self, tipo, categoria, monto, fecha, descripcion=''):
+        # Valida, resuelve la categoría por nombre y devuelve el id nuevo
+        monto, fecha = validate_transaction(tipo, categoria, monto, fecha)
+        
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            INSERT INTO transacciones (tipo, categoria_id, monto, fecha, descripcion)
+            SELECT ?, id, ?, ?, ? FROM categorias WHERE nombre = ?
+        ''', (tipo, monto, fecha, descripcion, categoria))
+        
+        if cursor.rowcount == 0:
+            self.conn.rollback()
+            raise ValidationError("La categoría seleccionada no existe")
+        
+        self.conn.commit()
+        return cursor.lastrowid
+    
+    def update(self, trans_id, tipo, categoria, monto, fecha, descripcion=''):
+        # Mismas validaciones que add; los triggers mantienen los resúmenes y
+        # el índice de búsqueda
+        monto, fecha = validate_transaction(tipo, categoria, monto, fecha)
+        
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT id FROM categorias WHERE nombre = ?', (categoria,))
+        row = cursor.fetchone()
+        if row is None:
+            raise ValidationError("La categoría seleccionada no existe")
+        
+        cursor.execute('''
+            UPDATE transacciones SET tipo = ?, categoria_id = ?, monto = ?, fecha = ?, descripcion = ?
+            WHERE id = ?
+        ''', (tipo, row[0], monto, fecha, descripcion, trans_id))
+        if cursor.rowcount == 0:
+            self.conn.rollback()
+            raise ValidationError("La transacción ya no existe")
+        self.conn.commit()
+    
+    def get(self, ids):
+        # Filas con el formato de page() para los ids dados, en el mismo orden
+        # que page(); los ids inexistentes se omiten
+        ids = list(ids)
+        cursor = self.conn.cursor()
+        cursor.execute(f'''
+            SELECT t.id, t.fecha, t.tipo, c.nombre, t.monto, t.descripcion
+            FROM transacciones t
+            JOIN categorias c ON c.id = t.categoria_id
+            WHERE t.id IN ({', '.join('?' * len(ids))})
+            ORDER BY t.fecha DESC, t.id DESC
+        ''', ids)
+        return cursor.fetchall()
+    
+    def page(self, tipo=None, before=None, after=None, limit=PAGE_SIZE, search=None,
+             categoria_id=None, start_date=None, end_date=None, categoria_ids=None,
+             min_amount=None, max_amount=None, order='fecha', descending=True):
+        # Paginación por clave (ver SORT_COLUMNS y sort_key): el costo de cada
+        # página no depende de su posición en el historial, a diferencia de
+        # OFFSET. before es la clave de la última fila mostrada y trae la
+        # página siguiente; after, la de la primera y trae la anterior.
+        # search se busca en las descripciones (ver fts_query); las fechas son
+        # 'YYYY-MM-DD' y los montos centavos, todos inclusivos. categoria_ids
+        # filtra por varias categorías a la vez
+        if order not in SORT_COLUMNS:
+            raise ValueError(f"orden desconocido: {order!r}")
+        columns = SORT_COLUMNS[order]
+        # Las páginas anteriores se leen en el sentido contrario y se invierten
+        scan_descending = descending == (after is None)
+        direction = 'DESC' if scan_descending else 'ASC'
+        key = before if before is not None else after
+        
+        categories = set(categoria_ids) if categoria_ids else None
+        if categoria_id is not None:
+            categories = {categoria_id} if categories is None else categories & {categoria_id}
+            if not categories:
+                return []
+        ranges = []
+        if min_amount is not None:
+            ranges.append(('t.monto', '>=', min_amount))
+        if max_amount is not None:
+            ranges.append(('t.monto', '<=', max_amount))
+        if start_date is not None:
+            ranges.append(('t.fecha', '>=', start_date))
+        if end_date is not None:
+            ranges.append(('t.fecha', '<=', end_date))
+        filters = list(ranges)
+        if tipo is not None:
+            filters.insert(0, ('t.tipo', '=', tipo))
+        if categories:
+            filters.insert(0, ('t.categoria_id', 'IN', sorted(categories)))
+        unindexed = {column for column, _, _ in ranges} - {SORT_RANGES[order]}
+        
+        selects = []
+        match = fts_query(search) if search else ''
+        if match:
+            where, params = compile_filters(filters)
+            if (order == 'fecha' and all(column == 't.fecha' for column, _, _ in filters)
+                    and self.count_matches(match, SEARCH_SCAN_THRESHOLD) >= SEARCH_SCAN_THRESHOLD):
+                # El + impide que SQLite recorra las coincidencias por id en
+                # lugar de usar el índice que ya da el orden de la página
+                tables = ['transacciones t', 'categorias c']
+                where.insert(0, '+t.id IN (SELECT rowid FROM transacciones_fts WHERE transacciones_fts MATCH ?)')
+            else:
+                # Pocas coincidencias, otro orden u otros filtros: el texto se
+                # correlaciona con la categoría y el monto (un taxi siempre es
+                # Transporte y barato), así que recorrer un índice hasta llenar
+                # la página puede leer casi toda la tabla; se ordenan todas las
+                # coincidencias
+                tables = ['transacciones_fts f', 'transacciones t', 'categorias c']
+                where[:0] = ['t.id = f.rowid', 'transacciones_fts MATCH ?']
+            conditions, key_params = key_condition(columns, key, scan_descending)
+            selects.append((ordered_select(tables, ['c.id = t.categoria_id'] + where + conditions, columns, direction),
+                            [match] + params + key_params + [limit]))
+        elif (categories or (order == 'categoria' and tipo is not None)
+                or (order in ('tipo', 'categoria') and unindexed)):
+            # Ninguno de los índices da este orden con estos filtros: cada par
+            # tipo-categoría se lee por separado con su propio índice y LIMIT
+            # y las ramas se mezclan
+            for stream_tipo, stream_id, nombre, total, in_range in self.streams(tipo, categories, start_date, end_date):
+                if not in_range:
+                    continue
+                # Por tipo o por categoría, la clave de todas las filas de la
+                # rama empieza igual: si ese comienzo ya queda antes que la
+                # clave de paginación, la rama no aporta filas; si queda
+                # después, aporta todas
+                prefix = {'tipo': (stream_tipo,), 'categoria': (nombre,)}.get(order, ())
+                branch_key = key
+                if key is not None:
+                    key_prefix = tuple(key[:len(prefix)])
+                    if prefix != key_prefix and (prefix < key_prefix) != scan_descending:
+                        continue
+                    branch_key = key[len(prefix):] if prefix == key_prefix else None
+                
+                stream_filters = [('t.tipo', '=', stream_tipo), ('t.categoria_id', '=', stream_id)] + ranges
+                selects.append(self.branch_select(stream_filters, total, in_range, unindexed, order,
+                                                  columns[len(prefix):], branch_key, scan_descending, limit))
+        else:
+            total = in_range = 0
+            if unindexed:
+                for _, _, _, stream_rows, stream_in_range in self.streams(tipo, None, start_date, end_date):
+                    total += stream_rows
+                    in_range += stream_in_range
+            selects.append(self.branch_select(filters, total, in_range, unindexed, order,
+                                              columns, key, scan_descending, limit))
+        
+        if not selects:
+            return []
+        cursor = self.conn.cursor()
+        if len(selects) == 1:
+            cursor.execute(*selects[0])
+        else:
+            # Los nombres de las columnas del resultado, sin el alias de la tabla
+            merged = ', '.join(f"{column.split('.')[1]} {direction}" for column in columns)
+            cursor.execute(f'''
+                {' UNION ALL '.join(f'SELECT * FROM ({sql})' for sql, _ in selects)}
+                ORDER BY {merged}
+                LIMIT ?
+            ''', [param for _, params in selects for param in params] + [limit])
+        rows = cursor.fetchall()
+        
+        if after is not None:
+            rows.reverse()
+        return rows
+    
+    def branch_select(self, filters, total, in_range, unindexed, order, columns, key, descending, limit):
+        # Consulta de page() para filters; total e in_range cuentan sus filas
+        # sin los rangos y dentro de las fechas (ver streams). Si hay un rango
+        # que el índice del orden no cubre (unindexed), con matches filas en
+        # él, recorrer ese índice lee unas limit * total / matches filas hasta
+        # llenar la página, sin pasar de las que cubre su propio rango; leer
+        # las matches por el índice del otro rango y ordenarlas lee matches.
+        # Se elige lo que lea menos
+        direction = 'DESC' if descending else 'ASC'
+        conditions, key_params = key_condition(columns, key, descending)
+        sort_first = False
+        if unindexed:
+            if order == 'monto':
+                matches, covered = in_range, total
+            else:
+                covered = in_range
+                bound = min(math.isqrt(limit * total), covered) + 1
+                matches = self.count_filtered([item for item in filters if item[0] != 't.fecha'], bound)
+            sort_first = matches < covered and matches * matches < limit * total
+        if sort_first:
+            where, params = compile_filters(filters, {SORT_RANGES[order]})
+            tables = [f"(SELECT t.id FROM transacciones t WHERE {' AND '.join(where)}) s",
+                      'transacciones t', 'categorias c']
+            conditions[:0] = ['t.id = s.id', 'c.id = t.categoria_id']
+        else:
+            # Orden de recorrido (CROSS JOIN lo fija): por categoría, categorias
+            # va primero y se recorre por nombre. Dentro de una categoría el
+            # índice es el de categoría y fecha, salvo por monto
+            # (idx_transacciones_tipo_categoria), así que el tipo no lo usa
+            if order == 'categoria' and columns[0] == 'c.nombre':
+                tables = ['categorias c', 'transacciones t']
+            else:
+                tables = ['transacciones t', 'categorias c']
+            if order != 'monto' and any(column == 't.categoria_id' for column, _, _ in filters):
+                unindexed = unindexed | {'t.tipo'}
+            where, params = compile_filters(filters, unindexed)
+            conditions[:0] = ['c.id = t.categoria_id'] + where
+        return ordered_select(tables, conditions, columns, direction), params + key_params + [limit]
+    
+    def count_matches(self, match, limit):
+        # Coincidencias de una consulta FTS5, contando como mucho hasta limit
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT COUNT(*) FROM (
+                SELECT rowid FROM transacciones_fts WHERE transacciones_fts MATCH ? LIMIT ?
+            )
+        ''', (match, limit))
+        return cursor.fetchone()[0]
+    
+    def count_filtered(self, filters, limit):
+        # Filas que pasan los filtros de page(), contando como mucho hasta limit
+        conditions, params = compile_filters(filters)
+        cursor = self.conn.cursor()
+        cursor.execute(f'''
+            SELECT COUNT(*) FROM (
+                SELECT 1 FROM transacciones t WHERE {' AND '.join(conditions)} LIMIT ?
+            )
+        ''', params + [limit])
+        return cursor.fetchone()[0]
+    
+    def streams(self, tipo=None, categories=None, start_date=None, end_date=None):
+        # (tipo, categoria_id, nombre, filas, filas en los meses de las fechas)
+        # de cada par tipo-categoría con transacciones, leídos de
+        # resumen_mensual; la segunda cuenta es una cota, los meses de los
+        # extremos cuentan enteros
+        conditions = []
+        params = [start_date[:7] if start_date else '', end_date[:7] if end_date else '9999-99']
+        if tipo is not None:
+            conditions.append('r.tipo = ?')
+            params.append(tipo)
+        if categories:
+            conditions.append(f"r.categoria_id IN ({', '.join('?' * len(categories))})")
+            params.extend(sorted(categories))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        
+        cursor = self.conn.cursor()
+        cursor.execute(f'''
+            SELECT r.tipo, r.categoria_id, c.nombre, SUM(r.cantidad),
+                   SUM(CASE WHEN r.mes BETWEEN ? AND ? THEN r.cantidad ELSE 0 END)
+            FROM resumen_mensual r
+            JOIN categorias c ON c.id = r.categoria_id
+            {where}
+            GROUP BY r.tipo, r.categoria_id
+        ''', params)
+        return cursor.fetchall()
+    
+    def delete_many(self, ids):
+        # Los ids pasan por una tabla temporal para borrar toda la selección con
+        # una sola sentencia, sin el límite de parámetros de un IN (...)
+        cursor = self.conn.cursor()
+        cursor.execute('CREATE TEMP TABLE IF NOT EXISTS ids_a_borrar (id INTEGER PRIMARY KEY)')
+        cache_size = None
+        try:
+            cursor.executemany('INSERT OR IGNORE INTO ids_a_borrar (id) VALUES (?)', ((trans_id,) for trans_id in ids))
+            if cursor.rowcount >= BULK_DELETE_ROWS:
+                cache_size = self.enlarge_cache(BULK_DELETE_CACHE_KIB)
+            cursor.execute('DELETE FROM transacciones WHERE id IN (SELECT id FROM ids_a_borrar)')
+            deleted_count = cursor.rowcount
+            cursor.execute('DELETE FROM ids_a_borrar')
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            if cache_size is not None:
+                # Al achicarla SQLite libera las páginas que sobran
+                self.conn.execute(f'PRAGMA cache_size = {cache_size}')
+        self.conn.commit()
+        return deleted_count
+    
+    def enlarge_cache(self, kib):
+        # Lleva la caché de la conexión a al menos kib KiB; devuelve el valor
+        # anterior de cache_size para restaurarlo, o None si ya alcanzaba
+        cache_size = self.conn.execute('PRAGMA cache_size').fetchone()[0]
+        page_size = self.conn.execute('PRAGMA page_size').fetchone()[0]
+        current = -cache_size if cache_size < 0 else cache_size * page_size // 1024
+        if current >= kib:
+            return None
+        self.conn.execute(f'PRAGMA cache_size = {-kib}')
+        return cache_size
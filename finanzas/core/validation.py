@@ -0,0 +1,62 @@
+"""Reglas de validación compartidas por el formulario, la CLI y los importadores."""
+
+from datetime import date, datetime
+
+from .money import to_cents
+
+TIPOS = ('Gasto', 'Ingreso')
+
+# Ordinal de 1970-01-01: la columna dia cuenta días desde esa fecha
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+class ValidationError(ValueError):
+    # El mensaje se muestra tal cual al usuario
+    pass
+
+
+def parse_amount(value, decimal='.'):
+    # Monto positivo en centavos enteros; con decimal=',' acepta también
+    # separadores de miles con punto
+    if isinstance(value, str) and decimal != '.':
+        value = value.replace('.', '').replace(decimal, '.')
+    amount = to_cents(value)
+    if not amount > 0:
+        raise ValueError(f"monto no positivo: {value!r}")
+    return amount
+
+
+def parse_date(value, date_format="%Y-%m-%d"):
+    # Devuelve la fecha normalizada a YYYY-MM-DD, que es como se guarda
+    return datetime.strptime(value.strip(), date_format).strftime("%Y-%m-%d")
+
+
+def epoch_day(fecha):
+    # 'YYYY-MM-DD' -> días desde 1970-01-01, igual que la columna dia
+    return date.fromisoformat(fecha).toordinal() - EPOCH_ORDINAL
+
+
+def day_to_date(dia):
+    return date.fromordinal(dia + EPOCH_ORDINAL).isoformat()
+
+
+def validate_transaction(tipo, categoria, monto, fecha):
+    # Devuelve (monto en centavos, fecha) normalizados o lanza ValidationError con el
+    # mensaje que ve el usuario
+    if tipo not in TIPOS:
+        raise ValidationError(f"Tipo de transacción desconocido: {tipo}")
+    
+    if not categoria:
+        raise ValidationError("Por favor seleccione una categoría")
+    
+    try:
+        monto = parse_amount(monto)
+    except (TypeError, ValueError):
+        raise ValidationError("Por favor ingrese un monto válido (número positivo)") from None
+    
+    try:
+        fecha = parse_date(fecha)
+    except (AttributeError, ValueError):
+        raise ValidationError("Por favor ingrese una fecha válida en formato YYYY-MM-DD") from None
+    
+    return monto, fecha
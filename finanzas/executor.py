@@ -0,0 +1,149 @@
+"""Ejecutor de consultas en segundo plano para la interfaz Tk."""
+
+import queue
+import sqlite3
+import threading
+import time
+
+from .core import METRICS, Ledger
+
+# Ejecutor de consultas: cada cuánto revisa Tk los resultados (un cuadro a 60 Hz)
+# y cuánto tiempo puede dedicar a sus callbacks en cada revisión
+DB_POLL_INTERVAL_MS = 16
+DB_CALLBACK_BUDGET = 0.008
+
+# Hilos lectores además del escritor
+DB_READERS = 2
+
+
+class DBExecutor:
+    # Ejecuta trabajos func(ledger, *args) en hilos con conexiones propias y
+    # entrega los resultados en el hilo de Tk mediante root.after. Las
+    # escrituras van a un único hilo escritor y las lecturas a un grupo de
+    # lectores, que con WAL no esperan al escritor. Un trabajo enviado a un
+    # canal reemplaza a los anteriores del mismo canal: los pendientes se
+    # descartan y los que están en curso se interrumpen.
+    
+    def __init__(self, root, db_path=None, on_error=None, readers=DB_READERS, open_ledger=None):
+        # open_ledger() abre el Ledger de cada hilo; por defecto la base
+        # db_path, o un RemoteLedger para trabajar contra el servidor
+        self.root = root
+        self.db_path = db_path
+        self.open_ledger = open_ledger or (lambda: Ledger.open(db_path))
+        self.on_error = on_error
+        self.write_jobs = queue.Queue()
+        self.read_jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.lock = threading.Lock()
+        self.generations = {}
+        self.running = {}
+        self.closed = False
+        
+        self.threads = [threading.Thread(target=self.worker, args=(self.write_jobs,),
+                                         name='finanzas-db-writer', daemon=True)]
+        for number in range(readers):
+            self.threads.append(threading.Thread(target=self.worker, args=(self.read_jobs,),
+                                                 name=f'finanzas-db-reader-{number}', daemon=True))
+        for thread in self.threads:
+            thread.start()
+        self.root.after(DB_POLL_INTERVAL_MS, self.poll)
+    
+    def submit(self, func, *args, on_done=None, on_error=None, channel=None, write=False):
+        generation = self.cancel(channel) if channel is not None else None
+        jobs = self.write_jobs if write else self.read_jobs
+        jobs.put((func, args, on_done, on_error, channel, generation, time.perf_counter()))
+    
+    def cancel(self, *channels):
+        # Invalida los trabajos de los canales; devuelve la nueva generación del último.
+        # La interrupción se hace con el lock tomado: el hilo no puede terminar
+        # el trabajo cancelado y empezar otro que la reciba en su lugar
+        generation = None
+        with self.lock:
+            for channel in channels:
+                generation = self.generations[channel] = self.generations.get(channel, 0) + 1
+            for ledger, (channel, job_generation) in self.running.items():
+                if channel in channels and job_generation != self.generations[channel]:
+                    ledger.interrupt()
+        return generation
+    
+    def cancel_all(self):
+        with self.lock:
+            channels = list(self.generations)
+        self.cancel(*channels)
+    
+    def is_current(self, channel, generation):
+        if channel is None:
+            return True
+        with self.lock:
+            return self.generations.get(channel) == generation
+    
+    def worker(self, jobs):
+        try:
+            ledger = self.open_ledger()
+        except Exception as e:
+            # Sin conexión no hay trabajos que atender; informar y salir
+            self.results.put((self.on_error, e, None, None))
+            return
+        conn = ledger.conn
+        
+        while True:
+            job = jobs.get()
+            if job is None:
+                break
+            
+            func, args, on_done, on_error, channel, generation, queued = job
+            if not self.is_current(channel, generation):
+                continue
+            
+            with self.lock:
+                self.running[ledger] = (channel, generation)
+            started = time.perf_counter()
+            try:
+                result = func(ledger, *args)
+            except Exception as e:
+                if conn is not None and conn.in_transaction:
+                    conn.rollback()
+                # Una interrupción de cancel() no es un error; si el trabajo
+                # sigue vigente la interrupción vino de otro lado y se informa
+                interrupted = isinstance(e, sqlite3.OperationalError) and str(e) == 'interrupted'
+                if not interrupted or self.is_current(channel, generation):
+                    self.results.put((on_error or self.on_error, e, channel, generation))
+            else:
+                self.results.put((on_done, result, channel, generation))
+            finally:
+                with self.lock:
+                    del self.running[ledger]
+                # Espera en la cola y duración del trabajo, por canal
+                if METRICS.enabled:
+                    name = channel or ('escritura' if jobs is self.write_jobs else 'lectura')
+                    METRICS.record(f'ejecutor espera: {name}', started - queued)
+                    METRICS.record(f'ejecutor trabajo: {name}', time.perf_counter() - started)
+        
+        ledger.close()
+    
+    def poll(self):
+        if self.closed:
+            return
+        
+        # Entregar resultados sin pasar del presupuesto de tiempo del cuadro
+        deadline = time.perf_counter() + DB_CALLBACK_BUDGET
+        try:
+            while time.perf_counter() < deadline:
+                try:
+                    callback, value, channel, generation = self.results.get_nowait()
+                except queue.Empty:
+                    break
+                if callback is not None and self.is_current(channel, generation):
+                    callback(value)
+        finally:
+            self.root.after(DB_POLL_INTERVAL_MS, self.poll)
+    
+    def close(self, timeout=5):
+        # Las escrituras ya encoladas se completan antes de cerrar
+        self.closed = True
+        self.cancel_all()
+        self.write_jobs.put(None)
+        for _ in self.threads[1:]:
+            self.read_jobs.put(None)
+        for thread in self.threads:
+            thread.join(timeout)
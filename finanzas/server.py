@@ -0,0 +1,587 @@
+"""Servidor HTTP/JSON: varios libros contables servidos desde una máquina.
+
+Uso: python -m finanzas.server [--dir libros] [--host 127.0.0.1] [--port 8765]
+     [--readers 4] [--token SECRETO] [--metrics]
+
+Cada libro es un archivo NOMBRE.db en --dir. Las lecturas toman una
+conexión de un grupo acotado por libro; las escrituras van al único hilo
+escritor del libro, que confirma en una sola transacción todas las que se
+acumularon mientras confirmaba las anteriores (group commit). Cada
+operación del grupo corre en su propio SAVEPOINT: si falla, solo ella se
+deshace.
+
+Rutas (los montos de las respuestas van en centavos):
+  GET  /ledgers                          POST /ledgers {"name"}
+  GET  /ledgers/L/transactions           ?tipo&categoria_ids&search&start_date&end_date&min_amount&max_amount
+                                         &order&descending&before&after&limit o ?ids
+  POST /ledgers/L/transactions           {"tipo", "categoria", "monto", "fecha", "descripcion"}
+  PUT  /ledgers/L/transactions/ID        (mismo cuerpo)
+  POST /ledgers/L/transactions/delete    {"ids": [...]}
+  GET  /ledgers/L/categories             POST /ledgers/L/categories {"nombre", "tipo"}
+  GET  /ledgers/L/categories/ID/usage    DELETE /ledgers/L/categories/ID
+  GET  /ledgers/L/summary                ?start_month&end_month
+  GET  /ledgers/L/series                 ?period&start_day&end_day
+  GET  /ledgers/L/recurring              POST /ledgers/L/recurring {"tipo", "categoria", "monto", "inicio", ...}
+  POST /ledgers/L/recurring/generate     {"today"}; DELETE /ledgers/L/recurring/ID
+  GET  /ledgers/L/budgets?month=YYYY-MM  PUT (o DELETE) /ledgers/L/budgets/CATEGORIA_ID {"monto"}
+  GET  /stats                            tiempos por ruta y estado de los grupos
+"""
+
+import argparse
+import json
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from .core import METRICS, SORT_COLUMNS, Ledger, ValidationError, parse_date
+from .core.instrumentation import InstrumentedConnection
+
+# Conexiones de lectura por libro y espera máxima por una libre antes de
+# responder 503
+SERVER_READERS = 4
+POOL_TIMEOUT = 5
+
+# Operaciones como máximo por transacción del escritor
+GROUP_COMMIT_MAX = 256
+
+# Filas como máximo por página pedida
+SERVER_PAGE_LIMIT = 1000
+
+LEDGER_NAME = re.compile(r'[A-Za-z0-9_-]{1,64}$')
+ROW_FIELDS = ('id', 'fecha', 'tipo', 'categoria', 'monto', 'descripcion')
+RECURRING_FIELDS = ('id', 'tipo', 'categoria', 'monto', 'descripcion', 'frecuencia', 'intervalo', 'inicio', 'fin',
+                    'proxima')
+BUDGET_FIELDS = ('categoria_id', 'categoria', 'tipo', 'presupuesto', 'registrado')
+
+
+class NotFound(Exception):
+    pass
+
+
+class PoolExhausted(Exception):
+    pass
+
+
+class GroupConnection(InstrumentedConnection):
+    # Conexión del escritor: durante un grupo, commit() no hace nada (el
+    # escritor confirma el grupo entero) y rollback() deshace solo la
+    # operación en curso. Así los almacenes funcionan sin cambios
+    batching = False
+    
+    def commit(self):
+        if not self.batching:
+            super().commit()
+    
+    def rollback(self):
+        if self.batching:
+            self.execute('ROLLBACK TO operacion')
+        else:
+            super().rollback()
+
+
+class GroupWriter:
+    def __init__(self, path, name):
+        self.ledger = Ledger.open(path, check_same_thread=False, factory=GroupConnection)
+        self.jobs = queue.Queue()
+        self.batches = 0
+        self.operations = 0
+        self.largest = 0
+        self.thread = threading.Thread(target=self.run, name=f'finanzas-writer-{name}', daemon=True)
+        self.thread.start()
+    
+    def submit(self, func):
+        # Future con el resultado de func(ledger) una vez confirmado
+        future = Future()
+        self.jobs.put((func, future))
+        return future
+    
+    def run(self):
+        running = True
+        while running:
+            job = self.jobs.get()
+            if job is None:
+                break
+            batch = [job]
+            while len(batch) < GROUP_COMMIT_MAX:
+                try:
+                    job = self.jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    running = False
+                    break
+                batch.append(job)
+            self.write(batch)
+        self.ledger.close()
+    
+    def write(self, batch):
+        conn = self.ledger.conn
+        outcomes = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.batching = True
+            for func, future in batch:
+                conn.execute('SAVEPOINT operacion')
+                try:
+                    outcomes.append((future, func(self.ledger), None))
+                except Exception as e:
+                    conn.execute('ROLLBACK TO operacion')
+                    outcomes.append((future, None, e))
+                conn.execute('RELEASE operacion')
+            conn.batching = False
+            conn.commit()
+        except Exception as e:
+            # Si no se pudo confirmar, no se guardó ninguna
+            conn.batching = False
+            if conn.in_transaction:
+                conn.rollback()
+            for func, future in batch:
+                future.set_exception(e)
+            return
+        
+        self.batches += 1
+        self.operations += len(batch)
+        self.largest = max(self.largest, len(batch))
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+    
+    def close(self):
+        self.jobs.put(None)
+        self.thread.join(5)
+
+
+class LedgerPool:
+    # Conexiones de un libro: hasta size lectoras, abiertas a demanda y
+    # reutilizadas, y un escritor
+    def __init__(self, path, name, size=SERVER_READERS):
+        self.path = path
+        self.size = size
+        self.idle = queue.LifoQueue()
+        self.opened = 0
+        self.lock = threading.Lock()
+        # El escritor abre primero y migra la base antes que los lectores
+        self.writer = GroupWriter(path, name)
+    
+    def acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            create = self.opened < self.size
+            if create:
+                self.opened += 1
+        if create:
+            try:
+                return Ledger.open(self.path, check_same_thread=False)
+            except Exception:
+                with self.lock:
+                    self.opened -= 1
+                raise
+        try:
+            return self.idle.get(timeout=POOL_TIMEOUT)
+        except queue.Empty:
+            raise PoolExhausted() from None
+    
+    def release(self, ledger):
+        self.idle.put(ledger)
+    
+    def read(self, func):
+        ledger = self.acquire()
+        try:
+            return func(ledger)
+        finally:
+            if ledger.conn.in_transaction:
+                ledger.conn.rollback()
+            self.release(ledger)
+    
+    def write(self, func):
+        return self.writer.submit(func).result()
+    
+    def stats(self):
+        writer = self.writer
+        return {
+            'lectores_abiertos': self.opened,
+            'lectores_libres': self.idle.qsize(),
+            'escrituras_en_cola': writer.jobs.qsize(),
+            'grupos': writer.batches,
+            'operaciones': writer.operations,
+            'operaciones_por_grupo': round(writer.operations / writer.batches, 2) if writer.batches else 0,
+            'grupo_mayor': writer.largest,
+        }
+    
+    def close(self):
+        self.writer.close()
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+def row_dict(row):
+    return dict(zip(ROW_FIELDS, row))
+
+
+def int_param(query, name, default=None):
+    value = query.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError(f"{name} debe ser un número entero") from None
+
+
+def int_list_param(query, name):
+    value = query.get(name)
+    if not value:
+        return None
+    try:
+        return [int(item) for item in value.split(',') if item]
+    except ValueError:
+        raise ValidationError(f"{name} debe ser una lista de números separados por comas") from None
+
+
+def key_param(query, name, order):
+    # Clave de paginación: lista JSON con los valores de SORT_COLUMNS[order],
+    # p. ej. ["2024-01-31", 1234] por fecha
+    value = query.get(name)
+    if not value:
+        return None
+    try:
+        key = json.loads(value)
+    except ValueError:
+        key = None
+    if (not isinstance(key, list) or len(key) != len(SORT_COLUMNS[order])
+            or not all(isinstance(item, (str, int)) and not isinstance(item, bool) for item in key)):
+        raise ValidationError(f"{name} debe ser una lista JSON con {len(SORT_COLUMNS[order])} valores")
+    return key
+
+
+def date_param(query, name):
+    value = query.get(name)
+    if not value:
+        return None
+    try:
+        return parse_date(value)
+    except ValueError:
+        raise ValidationError(f"{name} debe ser una fecha YYYY-MM-DD") from None
+
+
+def transaction_fields(body):
+    try:
+        return (body['tipo'], body['categoria'], str(body['monto']), body['fecha'], body.get('descripcion') or '')
+    except (KeyError, TypeError):
+        raise ValidationError("Faltan campos: tipo, categoria, monto y fecha son obligatorios") from None
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    # (método, ruta, nombre del método que la atiende); los grupos con nombre
+    # se pasan como argumentos
+    ROUTES = [(method, re.compile(pattern + '$'), handler) for method, pattern, handler in [
+        ('GET', r'/ledgers', 'list_ledgers'),
+        ('POST', r'/ledgers', 'create_ledger'),
+        ('GET', r'/ledgers/(?P<ledger>[^/]+)/transactions', 'list_transactions'),
+        ('POST', r'/ledgers/(?P<ledger>[^/]+)/transactions', 'add_transaction'),
+        ('POST', r'/ledgers/(?P<ledger>[^/]+)/transactions/delete', 'delete_transactions'),
+        ('PUT', r'/ledgers/(?P<ledger>[^/]+)/transactions/(?P<trans_id>\d+)', 'update_transaction'),
+        ('GET', r'/ledgers/(?P<ledger>[^/]+)/categories', 'list_categories'),
+        ('POST', r'/ledgers/(?P<ledger>[^/]+)/categories', 'add_category'),
+        ('GET', r'/ledgers/(?P<ledger>[^/]+)/categories/(?P<category_id>\d+)/usage', 'category_usage'),
+        ('DELETE', r'/ledgers/(?P<ledger>[^/]+)/categories/(?P<category_id>\d+)', 'delete_category'),
+        ('GET', r'/ledgers/(?P<ledger>[^/]+)/summary', 'summary'),
+        ('GET', r'/ledgers/(?P<ledger>[^/]+)/series', 'series'),
+        ('GET', r'/ledgers/(?P<ledger>[^/]+)/recurring', 'list_recurring'),
+        ('POST', r'/ledgers/(?P<ledger>[^/]+)/recurring', 'add_recurring'),
+        ('POST', r'/ledgers/(?P<ledger>[^/]+)/recurring/generate', 'generate_recurring'),
+        ('DELETE', r'/ledgers/(?P<ledger>[^/]+)/recurring/(?P<rule_id>\d+)', 'delete_recurring'),
+        ('GET', r'/ledgers/(?P<ledger>[^/]+)/budgets', 'budget_report'),
+        ('PUT', r'/ledgers/(?P<ledger>[^/]+)/budgets/(?P<category_id>\d+)', 'set_budget'),
+        ('DELETE', r'/ledgers/(?P<ledger>[^/]+)/budgets/(?P<category_id>\d+)', 'remove_budget'),
+        ('GET', r'/stats', 'stats'),
+    ]]
+    
+    def do_GET(self):
+        self.dispatch('GET')
+    
+    def do_POST(self):
+        self.dispatch('POST')
+    
+    def do_PUT(self):
+        self.dispatch('PUT')
+    
+    def do_DELETE(self):
+        self.dispatch('DELETE')
+    
+    def dispatch(self, method):
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        name = 'desconocida'
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            raw = self.rfile.read(length) if length else b''
+            for route_method, pattern, handler in self.ROUTES:
+                match = pattern.match(url.path)
+                if match and route_method == method:
+                    name = handler
+                    break
+            else:
+                raise NotFound()
+            
+            if self.server.token and self.headers.get('Authorization') != f'Bearer {self.server.token}':
+                status, payload = 401, {'error': "Token inválido"}
+            else:
+                # Con los valores vacíos: ?ids= es una lista vacía, no la falta del filtro
+                query = {key: values[-1] for key, values in parse_qs(url.query, keep_blank_values=True).items()}
+                try:
+                    body = json.loads(raw) if raw else {}
+                except ValueError:
+                    raise ValidationError("El cuerpo no es JSON válido") from None
+                status, payload = getattr(self, handler)(query, body, **match.groupdict())
+        except ValidationError as e:
+            status, payload = 400, {'error': str(e)}
+        except NotFound:
+            status, payload = 404, {'error': "No encontrado"}
+        except PoolExhausted:
+            status, payload = 503, {'error': "Servidor ocupado, reintente"}
+        except Exception as e:
+            status, payload = 500, {'error': f"{type(e).__name__}: {e}"}
+        
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        elapsed = time.perf_counter() - start
+        METRICS.record(f'http {method} {name}', elapsed)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Server-Timing', f'app;dur={elapsed * 1000:.2f}')
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+    
+    def list_ledgers(self, query, body):
+        return 200, {'ledgers': self.server.ledger_names()}
+    
+    def create_ledger(self, query, body):
+        name = body.get('name', '') if isinstance(body, dict) else ''
+        self.server.pool(name, create=True)
+        return 201, {'name': name}
+    
+    def list_transactions(self, query, body, ledger):
+        pool = self.server.pool(ledger)
+        if 'ids' in query:
+            ids = int_list_param(query, 'ids')
+            if not ids:
+                return 200, {'rows': []}
+            rows = pool.read(lambda ledger: ledger.transactions.get(ids))
+            return 200, {'rows': [row_dict(row) for row in rows]}
+        
+        order = query.get('order') or 'fecha'
+        if order not in SORT_COLUMNS:
+            raise ValidationError(f"order debe ser uno de: {', '.join(SORT_COLUMNS)}")
+        options = {
+            'tipo': query.get('tipo') or None,
+            'categoria_id': int_param(query, 'categoria_id'),
+            'categoria_ids': int_list_param(query, 'categoria_ids'),
+            'search': query.get('search') or None,
+            'start_date': date_param(query, 'start_date'),
+            'end_date': date_param(query, 'end_date'),
+            'min_amount': int_param(query, 'min_amount'),
+            'max_amount': int_param(query, 'max_amount'),
+            'order': order,
+            'descending': bool(int_param(query, 'descending', 1)),
+            'before': key_param(query, 'before', order),
+            'after': key_param(query, 'after', order),
+            'limit': min(int_param(query, 'limit', 200), SERVER_PAGE_LIMIT),
+        }
+        rows = pool.read(lambda ledger: ledger.transactions.page(**options))
+        return 200, {'rows': [row_dict(row) for row in rows]}
+    
+    def add_transaction(self, query, body, ledger):
+        fields = transaction_fields(body)
+        
+        def add(ledger):
+            return ledger.transactions.get([ledger.transactions.add(*fields)])
+        
+        rows = self.server.pool(ledger).write(add)
+        return 201, {'row': row_dict(rows[0])}
+    
+    def update_transaction(self, query, body, ledger, trans_id):
+        fields = transaction_fields(body)
+        trans_id = int(trans_id)
+        
+        def update(ledger):
+            ledger.transactions.update(trans_id, *fields)
+            return ledger.transactions.get([trans_id])
+        
+        rows = self.server.pool(ledger).write(update)
+        return 200, {'row': row_dict(rows[0])}
+    
+    def delete_transactions(self, query, body, ledger):
+        try:
+            ids = [int(value) for value in body['ids']]
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError("Se espera {\"ids\": [...]} con ids numéricos") from None
+        deleted = self.server.pool(ledger).write(lambda ledger: ledger.transactions.delete_many(ids))
+        return 200, {'deleted': deleted}
+    
+    def list_categories(self, query, body, ledger):
+        rows = self.server.pool(ledger).read(lambda ledger: ledger.categories.all())
+        return 200, {'categories': [{'id': cat_id, 'nombre': nombre, 'tipo': tipo} for cat_id, nombre, tipo in rows]}
+    
+    def add_category(self, query, body, ledger):
+        nombre, tipo = body.get('nombre', ''), body.get('tipo', '')
+        cat_id = self.server.pool(ledger).write(lambda ledger: ledger.categories.add(nombre, tipo))
+        return 201, {'id': cat_id}
+    
+    def category_usage(self, query, body, ledger, category_id):
+        count = self.server.pool(ledger).read(lambda ledger: ledger.categories.usage(int(category_id)))
+        return 200, {'usage': count}
+    
+    def delete_category(self, query, body, ledger, category_id):
+        deleted = self.server.pool(ledger).write(lambda ledger: ledger.categories.delete(int(category_id)))
+        return 200, {'deleted': deleted}
+    
+    def summary(self, query, body, ledger):
+        start_month, end_month = query.get('start_month') or None, query.get('end_month') or None
+        income, expenses, by_category = self.server.pool(ledger).read(
+            lambda ledger: ledger.summary.totals(start_month, end_month)
+        )
+        return 200, {'income': income, 'expenses': expenses, 'expenses_by_category': by_category}
+    
+    def series(self, query, body, ledger):
+        period = query.get('period') or 'mes'
+        if period not in ('semana', 'mes', 'año'):
+            raise ValidationError("period debe ser semana, mes o año")
+        start_day, end_day = int_param(query, 'start_day'), int_param(query, 'end_day')
+        series = self.server.pool(ledger).read(lambda ledger: ledger.summary.series(period, start_day, end_day))
+        return 200, {'series': series}
+    
+    def list_recurring(self, query, body, ledger):
+        rows = self.server.pool(ledger).read(lambda ledger: ledger.recurring.all())
+        return 200, {'rules': [dict(zip(RECURRING_FIELDS, row)) for row in rows]}
+    
+    def add_recurring(self, query, body, ledger):
+        try:
+            fields = (body['tipo'], body['categoria'], str(body['monto']), body['inicio'],
+                      body.get('frecuencia', 'mensual'), body.get('intervalo', 1), body.get('descripcion') or '',
+                      body.get('fin'))
+        except (KeyError, TypeError):
+            raise ValidationError("Faltan campos: tipo, categoria, monto e inicio son obligatorios") from None
+        rule_id = self.server.pool(ledger).write(lambda ledger: ledger.recurring.add(*fields))
+        return 201, {'id': rule_id}
+    
+    def generate_recurring(self, query, body, ledger):
+        today = date_param(body, 'today') if isinstance(body, dict) else None
+        ids = self.server.pool(ledger).write(lambda ledger: ledger.recurring.generate(today))
+        return 200, {'ids': ids}
+    
+    def delete_recurring(self, query, body, ledger, rule_id):
+        deleted = self.server.pool(ledger).write(lambda ledger: ledger.recurring.delete(int(rule_id)))
+        return 200, {'deleted': deleted}
+    
+    def budget_report(self, query, body, ledger):
+        month = query.get('month', '')
+        rows = self.server.pool(ledger).read(lambda ledger: ledger.budgets.report(month))
+        return 200, {'budgets': [dict(zip(BUDGET_FIELDS, row)) for row in rows]}
+    
+    def set_budget(self, query, body, ledger, category_id):
+        monto = str(body.get('monto', '')) if isinstance(body, dict) else ''
+        monto = self.server.pool(ledger).write(lambda ledger: ledger.budgets.set(int(category_id), monto))
+        return 200, {'monto': monto}
+    
+    def remove_budget(self, query, body, ledger, category_id):
+        deleted = self.server.pool(ledger).write(lambda ledger: ledger.budgets.remove(int(category_id)))
+        return 200, {'deleted': deleted}
+    
+    def stats(self, query, body):
+        snapshot = METRICS.snapshot()
+        snapshot['libros'] = self.server.pool_stats()
+        return 200, snapshot
+
+
+class LedgerServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Cola de conexiones pendientes del socket: con la de fábrica (5) se
+    # rechazan conexiones cuando llegan muchos clientes a la vez
+    request_queue_size = 256
+    
+    def __init__(self, address, directory, readers=SERVER_READERS, token=None, verbose=False):
+        super().__init__(address, RequestHandler)
+        self.directory = directory
+        self.readers = readers
+        self.token = token
+        self.verbose = verbose
+        self.pools = {}
+        self.pools_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+    
+    def ledger_names(self):
+        return sorted(name[:-3] for name in os.listdir(self.directory)
+                      if name.endswith('.db') and LEDGER_NAME.match(name[:-3]))
+    
+    def pool(self, name, create=False):
+        # Grupo de conexiones del libro; se crea la primera vez que se usa
+        if not LEDGER_NAME.match(name):
+            raise ValidationError("Nombre de libro inválido (letras, números, - y _)")
+        with self.pools_lock:
+            pool = self.pools.get(name)
+            if pool is None:
+                path = os.path.join(self.directory, f'{name}.db')
+                if not create and not os.path.exists(path):
+                    raise NotFound()
+                pool = self.pools[name] = LedgerPool(path, name, self.readers)
+        return pool
+    
+    def pool_stats(self):
+        with self.pools_lock:
+            pools = dict(self.pools)
+        return {name: pool.stats() for name, pool in pools.items()}
+    
+    def server_close(self):
+        super().server_close()
+        with self.pools_lock:
+            for pool in self.pools.values():
+                pool.close()
+            self.pools = {}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='finanzas.server', description=__doc__.splitlines()[0])
+    parser.add_argument('--dir', default='libros', help="carpeta de los libros (por defecto libros)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--readers', type=int, default=SERVER_READERS, help="conexiones de lectura por libro")
+    parser.add_argument('--token', help="exigir 'Authorization: Bearer TOKEN' en cada pedido")
+    parser.add_argument('--metrics', action='store_true', help="medir también cada consulta SQL (ver /stats)")
+    parser.add_argument('--verbose', action='store_true', help="registrar cada pedido en stderr")
+    args = parser.parse_args(argv)
+    METRICS.enabled = args.metrics
+    
+    server = LedgerServer((args.host, args.port), args.dir, args.readers, args.token, args.verbose)
+    print(f"Sirviendo {os.path.abspath(args.dir)} en http://{args.host}:{server.server_address[1]}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
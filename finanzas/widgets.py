@@ -0,0 +1,114 @@
+"""Widgets Tk propios de la interfaz."""
+
+import tkinter as tk
+from tkinter import ttk
+
+from .core import format_amount
+
+# Gráfico de barras: alto de cada fila y de su barra, ancho reservado para las
+# etiquetas y los importes, y margen alrededor del dibujo
+CHART_ROW_HEIGHT = 24
+CHART_BAR_HEIGHT = 16
+CHART_LABEL_WIDTH = 160
+CHART_VALUE_WIDTH = 110
+CHART_MARGIN = 8
+
+
+class BarChart(ttk.Frame):
+    # Barras horizontales dibujadas en un único Canvas: etiquetas, barras,
+    # importes y eje son ítems del Canvas, no widgets. Cada fila se identifica
+    # por su etiqueta; set_data solo crea o borra las filas que aparecen o
+    # desaparecen y mueve o reescala las demás, y un cambio de tamaño solo
+    # recalcula coordenadas.
+    
+    def __init__(self, master, color='#FF6B6B', empty_text="Sin datos", **kwargs):
+        super().__init__(master, **kwargs)
+        self.color = color
+        self.canvas = tk.Canvas(self, bg='white', highlightthickness=0)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        # etiqueta -> [texto, barra, importe, posición, valor]
+        self.rows = {}
+        self.maximum = 0
+        self.width = 0
+        self.axis = self.canvas.create_line(0, 0, 0, 0, fill='#999999')
+        self.empty = self.canvas.create_text(CHART_MARGIN, CHART_MARGIN, anchor=tk.NW, text=empty_text,
+                                             fill='#666666')
+        
+        self.canvas.bind('<Configure>', self.on_resize)
+        self.canvas.bind('<MouseWheel>', self.on_wheel)
+        self.canvas.bind('<Button-4>', lambda event: self.canvas.yview_scroll(-1, 'units'))
+        self.canvas.bind('<Button-5>', lambda event: self.canvas.yview_scroll(1, 'units'))
+    
+    def set_data(self, rows):
+        # rows: [(etiqueta, valor)] en el orden en que se dibujan
+        rows = list(rows)
+        maximum = max((value for label, value in rows), default=0)
+        rescale = maximum != self.maximum
+        self.maximum = maximum
+        
+        canvas = self.canvas
+        seen = set()
+        for position, (label, value) in enumerate(rows):
+            seen.add(label)
+            row = self.rows.get(label)
+            if row is None:
+                row = self.rows[label] = [
+                    canvas.create_text(0, 0, anchor=tk.E, text=label),
+                    canvas.create_rectangle(0, 0, 0, 0, fill=self.color, outline=''),
+                    canvas.create_text(0, 0, anchor=tk.W, text=self.format_value(value)),
+                    None, value,
+                ]
+            elif row[4] != value:
+                canvas.itemconfigure(row[2], text=self.format_value(value))
+                row[4] = value
+            elif row[3] == position and not rescale:
+                continue
+            row[3] = position
+            self.place_row(row)
+        
+        for label in [label for label in self.rows if label not in seen]:
+            canvas.delete(*self.rows.pop(label)[:3])
+        
+        canvas.itemconfigure(self.empty, state=tk.HIDDEN if rows else tk.NORMAL)
+        self.place_axis()
+    
+    def format_value(self, value):
+        return f"${format_amount(value)}"
+    
+    def bar_scale(self):
+        # Píxeles por unidad de valor con el ancho actual del Canvas
+        room = self.width - CHART_LABEL_WIDTH - CHART_VALUE_WIDTH - CHART_MARGIN
+        return max(room, 1) / self.maximum if self.maximum else 0
+    
+    def place_row(self, row, scale=None):
+        scale = self.bar_scale() if scale is None else scale
+        top = CHART_MARGIN + row[3] * CHART_ROW_HEIGHT
+        middle = top + CHART_ROW_HEIGHT / 2
+        left = CHART_LABEL_WIDTH
+        right = left + max(row[4], 0) * scale
+        
+        coords = self.canvas.coords
+        coords(row[0], left - 6, middle)
+        coords(row[1], left, middle - CHART_BAR_HEIGHT / 2, right, middle + CHART_BAR_HEIGHT / 2)
+        coords(row[2], right + 6, middle)
+    
+    def place_axis(self):
+        height = CHART_MARGIN * 2 + len(self.rows) * CHART_ROW_HEIGHT
+        self.canvas.coords(self.axis, CHART_LABEL_WIDTH, CHART_MARGIN, CHART_LABEL_WIDTH, height - CHART_MARGIN)
+        self.canvas.configure(scrollregion=(0, 0, self.width, height))
+    
+    def on_resize(self, event):
+        if event.width == self.width:
+            return
+        self.width = event.width
+        scale = self.bar_scale()
+        for row in self.rows.values():
+            self.place_row(row, scale)
+        self.place_axis()
+    
+    def on_wheel(self, event):
+        self.canvas.yview_scroll(-1 if event.delta > 0 else 1, 'units')
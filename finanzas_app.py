@@ -1,18 +1,108 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-import sqlite3
+from tkinter import ttk, messagebox, filedialog
+import argparse
+import os
+import queue
+import threading
 from datetime import datetime
 
+from finanzas.core import (FRECUENCIAS, METRICS, TIPOS, CategoryCache, ChangeBus, ValidationError, connect,
+                           database_path, format_amount, parse_date, sort_key, timed, to_cents,
+                           validate_transaction)
+from finanzas.core.summary import month_days
+from finanzas.executor import DBExecutor
+
+# El cliente remoto, las copias, la importación, la exportación y el gráfico
+# se importan donde se usan: la primera ventana no los necesita
+
+# Historial: filas por página y páginas que se mantienen cargadas en el Treeview
+HISTORY_PAGE_SIZE = 200
+HISTORY_MAX_PAGES = 3
+
+# Búsqueda del historial: espera tras la última tecla antes de consultar
+HISTORY_SEARCH_DELAY_MS = 250
+
+# Historial: columnas que ordenan al hacer clic en su encabezado -> orden de
+# TransactionStore.page; fecha y monto empiezan de mayor a menor
+HISTORY_SORTS = {"Fecha": 'fecha', "Tipo": 'tipo', "Categoría": 'categoria', "Monto": 'monto'}
+HISTORY_SORTS_DESCENDING = ('fecha', 'monto')
+
+# Resumen: espera tras un cambio en los datos antes de volver a consultarlo
+SUMMARY_REFRESH_DELAY_MS = 300
+
+# Resumen: períodos predefinidos y agrupaciones de la serie
+SUMMARY_RANGES = ("Todo", "Este mes", "Últimos 3 meses", "Últimos 12 meses", "Este año", "Año anterior")
+SUMMARY_GROUPINGS = {"Mensual": 'mes', "Semanal": 'semana', "Anual": 'año'}
+
+# Transacciones recurrentes: opción del formulario para no repetir y
+# generación de las vencidas poco después del arranque y luego cada hora
+REPEAT_NEVER = "No se repite"
+RECURRING_CHECK_DELAY_MS = 1000
+RECURRING_CHECK_INTERVAL_MS = 3_600_000
+
+# Copias automáticas: primera revisión tras el arranque y luego cada hora
+BACKUP_CHECK_DELAY_MS = 10_000
+BACKUP_CHECK_INTERVAL_MS = 3_600_000
+
+def summary_range(name, today):
+    # (mes inicial, mes final) 'YYYY-MM' de un período predefinido; (None, None) es todo
+    months_back = {"Este mes": 0, "Últimos 3 meses": 2, "Últimos 12 meses": 11}
+    if name in months_back:
+        first = today.year * 12 + today.month - 1 - months_back[name]
+        return f"{first // 12:04d}-{first % 12 + 1:02d}", f"{today.year:04d}-{today.month:02d}"
+    if name == "Este año":
+        return f"{today.year:04d}-01", f"{today.year:04d}-12"
+    if name == "Año anterior":
+        return f"{today.year - 1:04d}-01", f"{today.year - 1:04d}-12"
+    return None, None
+
+def generate_recurring(ledger):
+    # Trabajo del ejecutor: genera las ocurrencias vencidas y devuelve (ids,
+    # filas). Con más filas que una página del historial (una regla diaria
+    # tras meses sin abrir la aplicación) solo vuelven los ids
+    ids = ledger.recurring.generate()
+    return ids, ledger.transactions.get(ids) if 0 < len(ids) <= HISTORY_PAGE_SIZE else []
+
 class FinanceApp:
-    def __init__(self, root):
+    def __init__(self, root, db_path=None, metrics_path=None, server=None, ledger_name=None, token=None):
         self.root = root
-        self.root.title("Sistema de Gestión Financiera")
+        # Con server se trabaja sobre el libro ledger_name de finanzas.server
+        # en lugar de un archivo local
+        self.server = server
+        self.db_path = None if server else database_path(db_path)
+        # Con metrics_path las mediciones se guardan ahí al cerrar
+        self.metrics_path = metrics_path
+        self.root.title("Sistema de Gestión Financiera" + (f" — {ledger_name} en {server}" if server else ""))
         self.root.geometry("900x600")
         self.root.configure(bg='#f0f0f0')
         
-        # Establecer conexión con la base de datos
-        self.conn = sqlite3.connect('finanzas.db')
-        self.create_tables()
+        # Toda consulta pasa por el hilo del ejecutor; Tk nunca espera a SQLite
+        open_ledger = None
+        if server:
+            from finanzas.client import RemoteLedger
+            open_ledger = lambda: RemoteLedger(server, ledger_name, token)
+        self.db = DBExecutor(self.root, self.db_path, on_error=self.show_db_error, open_ledger=open_ledger)
+        
+        # Escrituras confirmadas: las vistas abiertas se suscriben y aplican
+        # cada cambio sin volver a consultar todo
+        self.changes = ChangeBus()
+        
+        # Copias de seguridad: una a la vez, en su propio hilo y conexión
+        self.backup_thread = None
+        self.backup_cancel = threading.Event()
+        self.backup_status = None
+        
+        # Categorías en memoria: formularios y vistas no consultan la base de datos
+        # salvo la primera vez o después de invalidar la caché
+        self.category_cache = CategoryCache()
+        self.category_version = 0
+        self.category_waiters = []
+        
+        # Vistas: cada una se construye la primera vez que se abre y después
+        # queda oculta en lugar de destruirse (ver show_view)
+        self.views = {}
+        self.view_versions = {}
+        self.current_view = None
         
         # Configurar estilo
         self.style = ttk.Style()
@@ -21,48 +111,72 @@ class FinanceApp:
         self.style.configure('Header.TLabel', font=('Arial', 14, 'bold'), background='#f0f0f0')
         self.style.configure('Option.TButton', font=('Arial', 11), width=20, padding=10)
         
-        # Crear widgets
+        # Crear widgets: el marco y el menú ahora; la vista inicial y el trabajo
+        # con la base de datos esperan a que la ventana se dibuje
         self.create_widgets()
-        
-    def create_tables(self):
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS transacciones (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                tipo TEXT NOT NULL,
-                categoria TEXT NOT NULL,
-                monto REAL NOT NULL,
-                fecha TEXT NOT NULL,
-                descripcion TEXT
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS categorias (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nombre TEXT NOT NULL UNIQUE,
-                tipo TEXT NOT NULL
-            )
-        ''')
-        
-        # Insertar categorías predeterminadas si no existen
-        default_categories = [
-            ('Alimentos', 'Gasto'),
-            ('Transporte', 'Gasto'),
-            ('Vivienda', 'Gasto'),
-            ('Entretenimiento', 'Gasto'),
-            ('Salario', 'Ingreso'),
-            ('Freelance', 'Ingreso'),
-            ('Inversiones', 'Ingreso')
-        ]
-        
-        for category in default_categories:
-            try:
-                cursor.execute('INSERT INTO categorias (nombre, tipo) VALUES (?, ?)', category)
-            except sqlite3.IntegrityError:
-                pass
-        
-        self.conn.commit()
+        self.main_frame.bind('<Expose>', self.on_first_paint)
+    
+    def on_first_paint(self, event):
+        self.main_frame.unbind('<Expose>')
+        self.root.after_idle(self.finish_startup)
+    
+    def finish_startup(self):
+        # La vista inicial consulta las categorías; las copias automáticas y
+        # las transacciones recurrentes se revisan un poco después
+        if self.current_view is None:
+            self.show_transaction_form()
+        if not self.server:
+            self.root.after(BACKUP_CHECK_DELAY_MS, self.check_snapshot)
+        self.root.after(RECURRING_CHECK_DELAY_MS, self.run_recurring_scheduler)
+    
+    def show_db_error(self, error):
+        messagebox.showerror("Error", f"Error de base de datos: {error}")
+    
+    def show_error(self, error):
+        # Los errores de validación se muestran tal cual
+        if isinstance(error, ValidationError):
+            messagebox.showerror("Error", str(error))
+        else:
+            self.show_db_error(error)
+    
+    def with_categories(self, callback):
+        # Ejecuta callback con la caché de categorías cargada
+        if self.category_cache.loaded:
+            callback()
+            return
+        self.category_waiters.append(callback)
+        if len(self.category_waiters) == 1:
+            self.load_categories()
+    
+    def load_categories(self):
+        version = self.category_version
+        
+        def loaded(rows):
+            # Si hubo escrituras mientras se leía, la lectura puede estar vieja
+            if version != self.category_version:
+                self.load_categories()
+                return
+            self.category_cache.load(rows)
+            waiters, self.category_waiters = self.category_waiters, []
+            for callback in waiters:
+                callback()
+        
+        def failed(error):
+            self.category_waiters = []
+            self.show_db_error(error)
+        
+        self.db.submit(lambda ledger: ledger.categories.all(), on_done=loaded, on_error=failed)
+    
+    def categories_changed(self, change=None):
+        # Llamar después de cada escritura en categorias ya confirmada: aplica
+        # change(cache) si la caché está cargada, o la invalida si no se sabe
+        # qué cambió
+        self.category_version += 1
+        if change is not None and self.category_cache.loaded:
+            change(self.category_cache)
+        else:
+            self.category_cache.invalidate()
+        self.changes.publish('categories')
     
     def create_widgets(self):
         # Frame principal
@@ -96,6 +210,7 @@ class FinanceApp:
             ("Ver Historial", self.show_transaction_history),
             ("Resumen Financiero", self.show_financial_summary),
             ("Gestión de Categorías", self.show_category_management),
+            ("Presupuestos", self.show_budgets),
             ("Configuración", self.show_settings)
         ]
         
@@ -112,29 +227,56 @@ class FinanceApp:
         # Frame para el área de trabajo
         self.work_area = ttk.Frame(self.content_frame)
         self.work_area.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        # Mostrar el formulario de transacción por defecto
-        self.show_transaction_form()
     
-    def clear_work_area(self):
-        for widget in self.work_area.winfo_children():
-            widget.destroy()
+    def show_view(self, name, build, refresh=None):
+        # Muestra la vista name; la primera vez la arma build(frame). Al
+        # volver a una vista ya armada se llama a refresh solo si se publicaron
+        # cambios que no aplicó mientras estaba oculta. Las consultas en curso
+        # de la vista anterior siguen: sus resultados la dejan al día
+        if self.current_view == name:
+            return
+        if self.current_view is not None:
+            self.views[self.current_view].pack_forget()
+        self.current_view = name
+        
+        frame = self.views.get(name)
+        if frame is None:
+            frame = self.views[name] = ttk.Frame(self.work_area)
+            self.view_loaded(name)
+            build(frame)
+        elif refresh is not None and self.view_versions[name] != self.changes.version:
+            refresh()
+        frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+    
+    def view_visible(self, name):
+        return self.current_view == name
+    
+    def view_loaded(self, name):
+        # La vista acaba de pedir sus datos: muestra todo lo publicado hasta ahora
+        self.view_versions[name] = self.changes.version
     
+    def view_current(self, name):
+        # Un suscriptor aplicó a la vista el cambio que se está publicando; si
+        # estaba al día, lo sigue estando
+        if self.view_versions.get(name) == self.changes.version - 1:
+            self.view_versions[name] = self.changes.version
+    
+    @timed('vista')
     def show_transaction_form(self):
-        self.clear_work_area()
-        
-        # Frame para el formulario
-        form_frame = ttk.Frame(self.work_area)
-        form_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
-        
+        # Solo las categorías del combobox pueden haber cambiado
+        self.show_view('formulario', self.build_transaction_form, self.update_category_combobox)
+    
+    def build_transaction_form(self, form_frame):
         # Título
         ttk.Label(form_frame, text="Registrar Nueva Transacción", style='Header.TLabel').grid(row=0, column=0, columnspan=2, pady=(0, 20))
         
         # Tipo de transacción
         ttk.Label(form_frame, text="Tipo:").grid(row=1, column=0, sticky=tk.W, pady=5)
         self.transaction_type = tk.StringVar(value="Gasto")
-        ttk.Radiobutton(form_frame, text="Gasto", variable=self.transaction_type, value="Gasto").grid(row=1, column=1, sticky=tk.W)
-        ttk.Radiobutton(form_frame, text="Ingreso", variable=self.transaction_type, value="Ingreso").grid(row=1, column=1, sticky=tk.E)
+        ttk.Radiobutton(form_frame, text="Gasto", variable=self.transaction_type, value="Gasto",
+                        command=self.update_category_combobox).grid(row=1, column=1, sticky=tk.W)
+        ttk.Radiobutton(form_frame, text="Ingreso", variable=self.transaction_type, value="Ingreso",
+                        command=self.update_category_combobox).grid(row=1, column=1, sticky=tk.E)
         
         # Categoría
         ttk.Label(form_frame, text="Categoría:").grid(row=2, column=0, sticky=tk.W, pady=5)
@@ -159,19 +301,40 @@ class FinanceApp:
         self.description_entry = tk.Text(form_frame, height=4, width=30)
         self.description_entry.grid(row=5, column=1, sticky=tk.EW, pady=5)
         
+        # Repetición: con una frecuencia, se guarda una regla que genera esta
+        # transacción y las siguientes cada N meses, semanas o días
+        ttk.Label(form_frame, text="Repetir:").grid(row=6, column=0, sticky=tk.W, pady=5)
+        repeat_frame = ttk.Frame(form_frame)
+        repeat_frame.grid(row=6, column=1, sticky=tk.W, pady=5)
+        self.repeat_var = tk.StringVar(value=REPEAT_NEVER)
+        ttk.Combobox(repeat_frame, textvariable=self.repeat_var, values=(REPEAT_NEVER, *FRECUENCIAS),
+                     state='readonly', width=14).pack(side=tk.LEFT)
+        ttk.Label(repeat_frame, text="cada").pack(side=tk.LEFT, padx=5)
+        self.repeat_interval = ttk.Spinbox(repeat_frame, from_=1, to=365, width=5)
+        self.repeat_interval.set(1)
+        self.repeat_interval.pack(side=tk.LEFT)
+        
         # Botón de guardar
         save_button = ttk.Button(form_frame, text="Guardar Transacción", command=self.save_transaction)
-        save_button.grid(row=6, column=1, sticky=tk.E, pady=20)
+        save_button.grid(row=7, column=1, sticky=tk.E, pady=20)
         
         # Configurar el peso de las columnas
         form_frame.columnconfigure(1, weight=1)
     
+    @timed('vista')
     def update_category_combobox(self):
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT nombre FROM categorias WHERE tipo = ? ORDER BY nombre', (self.transaction_type.get(),))
-        categories = [row[0] for row in cursor.fetchall()]
+        self.view_loaded('formulario')
+        self.with_categories(
+            lambda: self.fill_category_combobox(self.category_cache.names(self.transaction_type.get()))
+        )
+    
+    @timed('vista')
+    def fill_category_combobox(self, categories):
+        if not self.category_combobox.winfo_exists():
+            return
+        # La categoría elegida se conserva si sigue en la lista
         self.category_combobox['values'] = categories
-        if categories:
+        if categories and self.category_var.get() not in categories:
             self.category_var.set(categories[0])
     
     def save_transaction(self):
@@ -181,46 +344,52 @@ class FinanceApp:
         fecha = self.date_entry.get()
         descripcion = self.description_entry.get("1.0", tk.END).strip()
         
-        # Validaciones
-        if not categoria:
-            messagebox.showerror("Error", "Por favor seleccione una categoría")
-            return
-        
-        try:
-            monto = float(monto)
-            if monto <= 0:
-                raise ValueError
-        except ValueError:
-            messagebox.showerror("Error", "Por favor ingrese un monto válido (número positivo)")
-            return
-        
+        # Validaciones (el almacén las repite al guardar)
         try:
-            datetime.strptime(fecha, "%Y-%m-%d")
-        except ValueError:
-            messagebox.showerror("Error", "Por favor ingrese una fecha válida en formato YYYY-MM-DD")
+            validate_transaction(tipo, categoria, monto, fecha)
+        except ValidationError as e:
+            messagebox.showerror("Error", str(e))
             return
         
-        # Guardar en la base de datos
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            INSERT INTO transacciones (tipo, categoria, monto, fecha, descripcion)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (tipo, categoria, monto, fecha, descripcion))
-        
-        self.conn.commit()
-        messagebox.showinfo("Éxito", "Transacción registrada correctamente")
-        
-        # Limpiar campos (excepto fecha y tipo)
-        self.amount_entry.delete(0, tk.END)
-        self.description_entry.delete("1.0", tk.END)
+        frecuencia = self.repeat_var.get()
+        intervalo = self.repeat_interval.get()
+        
+        # Guardar en la base de datos; las filas guardadas vuelven para las vistas abiertas
+        def run(ledger):
+            if frecuencia == REPEAT_NEVER:
+                trans_id = ledger.transactions.add(tipo, categoria, monto, fecha, descripcion)
+                return [trans_id], ledger.transactions.get([trans_id])
+            # La regla genera en el acto las ocurrencias que ya vencieron
+            ledger.recurring.add(tipo, categoria, monto, fecha, frecuencia, intervalo, descripcion)
+            return generate_recurring(ledger)
+        
+        def saved(result):
+            self.publish_generated(result)
+            if frecuencia == REPEAT_NEVER:
+                messagebox.showinfo("Éxito", "Transacción registrada correctamente")
+            else:
+                messagebox.showinfo("Éxito", f"Transacción recurrente registrada; "
+                                             f"{len(result[0])} generadas hasta hoy")
+            
+            # Limpiar campos (excepto fecha y tipo)
+            if self.amount_entry.winfo_exists():
+                self.amount_entry.delete(0, tk.END)
+                self.description_entry.delete("1.0", tk.END)
+                self.repeat_var.set(REPEAT_NEVER)
+        
+        def failed(error):
+            if isinstance(error, ValidationError):
+                messagebox.showerror("Error", str(error))
+            else:
+                self.show_db_error(error)
+        
+        self.db.submit(run, on_done=saved, on_error=failed, write=True)
     
+    @timed('vista')
     def show_transaction_history(self):
-        self.clear_work_area()
-        
-        # Frame principal para el historial
-        history_frame = ttk.Frame(self.work_area)
-        history_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
-        
+        self.show_view('historial', self.build_transaction_history, self.refresh_transaction_history)
+    
+    def build_transaction_history(self, history_frame):
         # Título
         ttk.Label(history_frame, text="Historial de Transacciones", style='Header.TLabel').pack(pady=(0, 20))
         
@@ -238,6 +407,41 @@ class FinanceApp:
         ttk.Radiobutton(filter_frame, text="Ingresos", variable=self.filter_type, value="Ingreso", 
                        command=self.update_transaction_table).pack(side=tk.LEFT, padx=5)
         
+        # Varias categorías a la vez: un menú con una casilla por categoría
+        ttk.Label(filter_frame, text="Categorías:").pack(side=tk.LEFT, padx=(15, 5))
+        self.filter_category_button = ttk.Menubutton(filter_frame, text="Todas", width=15)
+        self.filter_category_menu = tk.Menu(self.filter_category_button, tearoff=False)
+        self.filter_category_button['menu'] = self.filter_category_menu
+        self.filter_category_button.pack(side=tk.LEFT)
+        self.filter_categories = {}
+        self.with_categories(self.fill_filter_category_menu)
+        
+        # Búsqueda en las descripciones: palabras por prefijo, "frases" exactas
+        ttk.Label(filter_frame, text="Buscar:").pack(side=tk.LEFT, padx=(15, 5))
+        self.search_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=self.search_var, width=20).pack(side=tk.LEFT)
+        self.history_search_job = None
+        self.search_var.trace_add('write', lambda *args: self.schedule_history_search())
+        
+        # Rango de fechas opcional (YYYY-MM-DD) para el historial y la exportación
+        date_frame = ttk.Frame(history_frame)
+        date_frame.pack(fill=tk.X, pady=(0, 10))
+        ttk.Label(date_frame, text="Desde:").pack(side=tk.LEFT, padx=5)
+        self.history_start_entry = ttk.Entry(date_frame, width=11)
+        self.history_start_entry.pack(side=tk.LEFT)
+        ttk.Label(date_frame, text="Hasta:").pack(side=tk.LEFT, padx=5)
+        self.history_end_entry = ttk.Entry(date_frame, width=11)
+        self.history_end_entry.pack(side=tk.LEFT)
+        ttk.Label(date_frame, text="Monto desde:").pack(side=tk.LEFT, padx=(15, 5))
+        self.history_min_entry = ttk.Entry(date_frame, width=10)
+        self.history_min_entry.pack(side=tk.LEFT)
+        ttk.Label(date_frame, text="Hasta:").pack(side=tk.LEFT, padx=5)
+        self.history_max_entry = ttk.Entry(date_frame, width=10)
+        self.history_max_entry.pack(side=tk.LEFT)
+        for entry in (self.history_start_entry, self.history_end_entry, self.history_min_entry,
+                      self.history_max_entry):
+            entry.bind('<Return>', lambda event: self.update_transaction_table())
+        
         # Tabla de transacciones
         columns = ("#", "Fecha", "Tipo", "Categoría", "Monto", "Descripción")
         self.transaction_tree = ttk.Treeview(
@@ -250,69 +454,325 @@ class FinanceApp:
         for col in columns:
             self.transaction_tree.heading(col, text=col)
             self.transaction_tree.column(col, width=100, anchor=tk.CENTER)
+        for col in HISTORY_SORTS:
+            self.transaction_tree.heading(col, command=lambda col=col: self.sort_history(col))
+        self.history_order = 'fecha'
+        self.history_descending = True
+        self.show_history_sort()
         
         self.transaction_tree.column("#", width=50)
         self.transaction_tree.column("Descripción", width=200)
         self.transaction_tree.column("Monto", anchor=tk.E)
         
-        scrollbar = ttk.Scrollbar(history_frame, orient=tk.VERTICAL, command=self.transaction_tree.yview)
-        self.transaction_tree.configure(yscrollcommand=scrollbar.set)
+        # Configurar estilos para las filas
+        self.transaction_tree.tag_configure('ingreso', foreground='green')
+        self.transaction_tree.tag_configure('gasto', foreground='red')
+        
+        # El scroll pasa por on_history_scroll para cargar páginas bajo demanda
+        self.history_scrollbar = ttk.Scrollbar(history_frame, orient=tk.VERTICAL, command=self.transaction_tree.yview)
+        self.transaction_tree.configure(yscrollcommand=self.on_history_scroll)
         
         self.transaction_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.history_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.transaction_tree.bind('<Double-1>', lambda event: self.edit_selected_transaction())
         
         # Botones de acción
         button_frame = ttk.Frame(history_frame)
         button_frame.pack(fill=tk.X, pady=(10, 0))
         
         ttk.Button(button_frame, text="Eliminar Seleccionados", command=self.delete_selected_transactions).pack(side=tk.RIGHT, padx=5)
-        ttk.Button(button_frame, text="Exportar a CSV", command=self.export_to_csv).pack(side=tk.RIGHT, padx=5)
+        self.export_button = ttk.Button(button_frame, text="Exportar", command=self.export_to_csv)
+        self.export_button.pack(side=tk.RIGHT, padx=5)
+        
+        # Progreso de la exportación en curso
+        self.export_progress = ttk.Progressbar(button_frame, length=120, mode='determinate')
+        self.export_status = ttk.Label(button_frame)
+        
+        # Las escrituras posteriores se aplican a la tabla fila por fila,
+        # también mientras la vista está oculta
+        self.changes.subscribe(self.on_history_change)
         
         # Actualizar la tabla
         self.update_transaction_table()
     
+    def refresh_transaction_history(self):
+        # Al volver a la vista después de cambios que no pudo aplicar oculta
+        self.with_categories(self.fill_filter_category_menu)
+        self.update_transaction_table()
+    
+    @timed('vista')
+    def fill_filter_category_menu(self):
+        # Las casillas marcadas siguen marcadas si su categoría sigue existiendo
+        if not self.filter_category_button.winfo_exists():
+            return
+        checked = {nombre for nombre, var in self.filter_categories.items() if var.get()}
+        self.filter_category_menu.delete(0, tk.END)
+        self.filter_categories = {}
+        for nombre in sorted(nombre for cat_id, nombre, tipo in self.category_cache.all()):
+            var = self.filter_categories[nombre] = tk.BooleanVar(value=nombre in checked)
+            self.filter_category_menu.add_checkbutton(label=nombre, variable=var,
+                                                      command=self.on_filter_category_toggle)
+        self.show_filter_categories()
+    
+    def on_filter_category_toggle(self):
+        self.show_filter_categories()
+        self.update_transaction_table()
+    
+    def show_filter_categories(self):
+        checked = [nombre for nombre, var in self.filter_categories.items() if var.get()]
+        if not checked:
+            text = "Todas"
+        elif len(checked) == 1:
+            text = checked[0]
+        else:
+            text = f"{len(checked)} categorías"
+        self.filter_category_button.configure(text=text)
+    
+    def sort_history(self, column):
+        # Clic en un encabezado: la misma columna invierte el sentido, otra
+        # ordena por ella
+        order = HISTORY_SORTS[column]
+        if order == self.history_order:
+            self.history_descending = not self.history_descending
+        else:
+            self.history_order = order
+            self.history_descending = order in HISTORY_SORTS_DESCENDING
+        self.show_history_sort()
+        self.update_transaction_table()
+    
+    def show_history_sort(self):
+        # Flecha en el encabezado de la columna que ordena
+        for column, order in HISTORY_SORTS.items():
+            arrow = (" ▼" if self.history_descending else " ▲") if order == self.history_order else ""
+            self.transaction_tree.heading(column, text=column + arrow)
+    
+    def schedule_history_search(self):
+        # Cada tecla reinicia la espera; la consulta anterior, si sigue en
+        # curso, se interrumpe al enviar la nueva por el mismo canal
+        if self.history_search_job is not None:
+            self.root.after_cancel(self.history_search_job)
+        self.history_search_job = self.root.after(HISTORY_SEARCH_DELAY_MS, self.run_history_search)
+    
+    def run_history_search(self):
+        self.history_search_job = None
+        self.update_transaction_table()
+    
+    @timed('vista')
     def update_transaction_table(self):
-        # Limpiar tabla
-        for item in self.transaction_tree.get_children():
-            self.transaction_tree.delete(item)
-        
-        # Obtener transacciones según filtro
-        cursor = self.conn.cursor()
+        # La tabla se reemplaza cuando llega la primera página, así las
+        # búsquedas sucesivas no la dejan en blanco mientras se escribe. Los
+        # cambios que se esperaban para otra página ya están en esta lectura
+        self.history_loading = True
+        self.history_pending = []
+        
+        # Cargar solo la primera página; el resto se pide al desplazarse con
+        # los mismos filtros aunque los campos cambien mientras tanto
+        self.view_loaded('historial')
+        filters = self.history_filters = self.history_filter()
+        self.db.submit(
+            lambda ledger: ledger.transactions.page(limit=HISTORY_PAGE_SIZE, **filters),
+            on_done=self.show_first_history_page, channel='history'
+        )
+    
+    def history_filter(self):
+        # Argumentos de TransactionStore.page para el orden y los filtros de
+        # la vista; una fecha o un monto mal escritos no filtran
         filter_value = self.filter_type.get()
+        filters = {'tipo': None if filter_value == "Todos" else filter_value,
+                   'order': self.history_order, 'descending': self.history_descending}
         
-        if filter_value == "Todos":
-            cursor.execute('''
-                SELECT id, fecha, tipo, categoria, monto, descripcion 
-                FROM transacciones 
-                ORDER BY fecha DESC
-            ''')
-        else:
-            cursor.execute('''
-                SELECT id, fecha, tipo, categoria, monto, descripcion 
-                FROM transacciones 
-                WHERE tipo = ?
-                ORDER BY fecha DESC
-            ''', (filter_value,))
+        categoria_ids = [self.category_cache.id_of(nombre) for nombre, var in self.filter_categories.items()
+                         if var.get()]
+        filters['categoria_ids'] = [cat_id for cat_id in categoria_ids if cat_id is not None] or None
         
-        transactions = cursor.fetchall()
+        search = self.search_var.get().strip()
+        if search:
+            filters['search'] = search
         
-        # Insertar datos en la tabla
-        for i, transaction in enumerate(transactions, 1):
-            trans_id, fecha, tipo, categoria, monto, descripcion = transaction
-            monto_str = f"${monto:,.2f}"
+        for key, entry in (('start_date', self.history_start_entry), ('end_date', self.history_end_entry)):
+            try:
+                filters[key] = parse_date(entry.get()) if entry.get().strip() else None
+            except ValueError:
+                filters[key] = None
+        for key, entry in (('min_amount', self.history_min_entry), ('max_amount', self.history_max_entry)):
+            text = entry.get().strip().lstrip('$').replace(',', '')
+            try:
+                filters[key] = to_cents(text) if text else None
+            except ValueError:
+                filters[key] = None
+        return filters
+    
+    @timed('vista')
+    def show_first_history_page(self, rows):
+        # Limpiar tabla y reiniciar la ventana de filas cargadas
+        self.transaction_tree.delete(*self.transaction_tree.get_children())
+        self.history_keys = {}
+        self.history_offset = 0
+        self.history_at_end = len(rows) < HISTORY_PAGE_SIZE
+        self.history_loading = False
+        self.insert_history_rows(rows, tk.END, 1)
+        self.transaction_tree.yview_moveto(0)
+        self.apply_pending_history_changes()
+    
+    def insert_history_rows(self, rows, index, first_number):
+        for number, transaction in enumerate(rows, first_number):
+            # El iid de cada fila es el id real de la transacción
+            item = self.transaction_tree.insert(
+                "", index, 
+                values=self.history_values(transaction, number),
+                tags=self.history_tags(transaction),
+                iid=transaction[0]
+            )
+            self.history_keys[item] = sort_key(transaction, self.history_filters['order'])
+            if index != tk.END:
+                index += 1
+    
+    def history_values(self, transaction, number):
+        trans_id, fecha, tipo, categoria, monto, descripcion = transaction
+        return (number, fecha, tipo, categoria, f"${format_amount(monto)}", descripcion)
+    
+    def history_tags(self, transaction):
+        # Cambiar color según el tipo
+        return ('ingreso',) if transaction[2] == "Ingreso" else ('gasto',)
+    
+    def edit_selected_transaction(self):
+        selected = self.transaction_tree.selection()
+        if len(selected) != 1:
+            return
+        trans_id = int(selected[0])
+        number, fecha, tipo, categoria, monto, descripcion = self.transaction_tree.item(selected[0], 'values')
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Editar Transacción")
+        dialog.transient(self.root)
+        form = ttk.Frame(dialog, padding=15)
+        form.pack(fill=tk.BOTH, expand=True)
+        
+        tipo_var = tk.StringVar(value=tipo)
+        category_var = tk.StringVar(value=categoria)
+        ttk.Label(form, text="Tipo:").grid(row=0, column=0, sticky=tk.W, pady=5)
+        ttk.Combobox(form, textvariable=tipo_var, values=TIPOS, state='readonly').grid(row=0, column=1, sticky=tk.EW)
+        ttk.Label(form, text="Categoría:").grid(row=1, column=0, sticky=tk.W, pady=5)
+        category_combobox = ttk.Combobox(form, textvariable=category_var, state='readonly')
+        category_combobox.grid(row=1, column=1, sticky=tk.EW)
+        
+        def fill_categories(*args):
+            names = self.category_cache.names(tipo_var.get())
+            category_combobox['values'] = names
+            if category_var.get() not in names:
+                category_var.set(names[0] if names else '')
+        
+        self.with_categories(fill_categories)
+        tipo_var.trace_add('write', lambda *args: self.with_categories(fill_categories))
+        
+        entries = {}
+        for row, (label, value) in enumerate((("Monto:", monto.lstrip('$').replace(',', '')), ("Fecha:", fecha),
+                                              ("Descripción:", descripcion)), 2):
+            ttk.Label(form, text=label).grid(row=row, column=0, sticky=tk.W, pady=5)
+            entries[label] = ttk.Entry(form, width=30)
+            entries[label].insert(0, value)
+            entries[label].grid(row=row, column=1, sticky=tk.EW)
+        
+        def save():
+            values = (tipo_var.get(), category_var.get(), entries["Monto:"].get(), entries["Fecha:"].get())
+            try:
+                validate_transaction(*values)
+            except ValidationError as e:
+                messagebox.showerror("Error", str(e), parent=dialog)
+                return
+            descripcion = entries["Descripción:"].get().strip()
             
-            # Cambiar color según el tipo
-            tags = ('ingreso',) if tipo == "Ingreso" else ('gasto',)
+            def run(ledger):
+                ledger.transactions.update(trans_id, *values, descripcion)
+                return ledger.transactions.get([trans_id])
             
-            self.transaction_tree.insert(
-                "", tk.END, 
-                values=(i, fecha, tipo, categoria, monto_str, descripcion),
-                tags=tags
-            )
+            def saved(rows):
+                dialog.destroy()
+                self.changes.publish('update', rows, [trans_id])
+            
+            def failed(error):
+                if isinstance(error, ValidationError):
+                    messagebox.showerror("Error", str(error), parent=dialog)
+                else:
+                    self.show_db_error(error)
+            
+            self.db.submit(run, on_done=saved, on_error=failed, write=True)
         
-        # Configurar estilos para las filas
-        self.transaction_tree.tag_configure('ingreso', foreground='green')
-        self.transaction_tree.tag_configure('gasto', foreground='red')
+        ttk.Button(form, text="Guardar", command=save).grid(row=5, column=1, sticky=tk.E, pady=(10, 0))
+        form.columnconfigure(1, weight=1)
+        dialog.grab_set()
+    
+    def on_history_scroll(self, first, last):
+        self.history_scrollbar.set(first, last)
+        if self.history_loading:
+            return
+        
+        # Pedir la página siguiente o anterior al acercarse a un extremo de la ventana
+        children = self.transaction_tree.get_children()
+        if not children:
+            return
+        filters = self.history_filters
+        if float(last) >= 0.9 and not self.history_at_end:
+            self.history_loading = True
+            before = self.history_keys[children[-1]]
+            self.db.submit(
+                lambda ledger: ledger.transactions.page(before=before, limit=HISTORY_PAGE_SIZE, **filters),
+                on_done=self.append_history_page, channel='history'
+            )
+        elif float(first) <= 0.1 and self.history_offset > 0:
+            self.history_loading = True
+            after = self.history_keys[children[0]]
+            self.db.submit(
+                lambda ledger: ledger.transactions.page(after=after, limit=HISTORY_PAGE_SIZE, **filters),
+                on_done=self.prepend_history_page, channel='history'
+            )
+    
+    @timed('vista')
+    def append_history_page(self, rows):
+        self.history_loading = False
+        children = self.transaction_tree.get_children()
+        
+        top_row = round(self.transaction_tree.yview()[0] * len(children))
+        if len(rows) < HISTORY_PAGE_SIZE:
+            self.history_at_end = True
+        self.insert_history_rows(rows, tk.END, self.history_offset + len(children) + 1)
+        
+        # Descartar las filas más antiguas de la ventana sin mover la vista
+        total = len(children) + len(rows)
+        excess = total - HISTORY_PAGE_SIZE * HISTORY_MAX_PAGES
+        if excess > 0:
+            dropped = children[:excess]
+            self.transaction_tree.delete(*dropped)
+            for item in dropped:
+                del self.history_keys[item]
+            self.history_offset += excess
+            total -= excess
+            self.transaction_tree.yview_moveto(max(top_row - excess, 0) / total)
+        self.apply_pending_history_changes()
+    
+    @timed('vista')
+    def prepend_history_page(self, rows):
+        self.history_loading = False
+        children = self.transaction_tree.get_children()
+        
+        top_row = round(self.transaction_tree.yview()[0] * len(children))
+        if len(rows) < HISTORY_PAGE_SIZE:
+            self.history_offset = len(rows)
+        self.history_offset -= len(rows)
+        self.insert_history_rows(rows, 0, self.history_offset + 1)
+        
+        # Descartar las filas más recientes del final de la ventana
+        total = len(children) + len(rows)
+        excess = total - HISTORY_PAGE_SIZE * HISTORY_MAX_PAGES
+        if excess > 0:
+            dropped = children[-excess:]
+            self.transaction_tree.delete(*dropped)
+            for item in dropped:
+                del self.history_keys[item]
+            self.history_at_end = False
+            total -= excess
+        self.transaction_tree.yview_moveto((top_row + len(rows)) / total)
+        self.apply_pending_history_changes()
     
     def delete_selected_transactions(self):
         selected_items = self.transaction_tree.selection()
@@ -328,101 +788,351 @@ class FinanceApp:
         if not confirm:
             return
         
-        cursor = self.conn.cursor()
-        deleted_count = 0
-        
-        for item in selected_items:
-            item_id = self.transaction_tree.item(item)['values'][0]
-            cursor.execute('DELETE FROM transacciones WHERE id = ?', (item_id,))
-            deleted_count += cursor.rowcount
+        ids = [int(item) for item in selected_items]
         
-        self.conn.commit()
+        def deleted(deleted_count):
+            if deleted_count > 0:
+                self.changes.publish('delete', ids=ids)
+                messagebox.showinfo("Éxito", f"Se eliminaron {deleted_count} transacciones")
+            else:
+                messagebox.showerror("Error", "No se pudo eliminar ninguna transacción")
         
-        if deleted_count > 0:
-            messagebox.showinfo("Éxito", f"Se eliminaron {deleted_count} transacciones")
+        self.db.submit(lambda ledger: ledger.transactions.delete_many(ids), on_done=deleted, write=True)
+    
+    def remove_history_items(self, items):
+        # Quitar solo las filas borradas; devuelve la posición de la primera
+        # o None si ninguna estaba cargada
+        items = [item for item in items if item in self.history_keys]
+        if not items:
+            return None
+        first = min(self.transaction_tree.index(item) for item in items)
+        self.transaction_tree.delete(*items)
+        for item in items:
+            del self.history_keys[item]
+        return first
+    
+    def renumber_history(self, start=0):
+        # La columna # cambia solo desde la primera fila desplazada
+        children = self.transaction_tree.get_children()
+        for number, item in enumerate(children[start:], self.history_offset + start + 1):
+            self.transaction_tree.set(item, "#", number)
+    
+    def on_history_change(self, change):
+        # Aplica una escritura confirmada a la ventana cargada: las filas
+        # nuevas entran en su posición, las borradas salen y las editadas se
+        # corrigen en su lugar. Lo que obliga a consultar se deja, si la vista
+        # está oculta, para cuando se vuelva a mostrar
+        visible = self.view_visible('historial')
+        if change.kind == 'categories':
+            # Las filas no cambian, solo las casillas del filtro
+            if visible or self.category_cache.loaded:
+                self.with_categories(self.fill_filter_category_menu)
+                self.view_current('historial')
+            return
+        if self.history_loading:
+            # Con una página en camino la tabla puede tener claves de otro
+            # orden y la página puede no traer el cambio: se aplica al llegar
+            self.history_pending.append(change)
+            self.view_current('historial')
+            return
+        if self.history_requery(change):
+            if visible:
+                self.update_transaction_table()
+            return
+        self.apply_history_change(change)
+        self.view_current('historial')
+    
+    def history_requery(self, change):
+        # Sin saber qué filas cambiaron, o si coinciden con la búsqueda, se relee
+        return change.kind == 'reset' or (change.kind != 'delete' and self.history_filters.get('search'))
+    
+    def apply_pending_history_changes(self):
+        # Cambios publicados mientras se leía una página: la página puede
+        # traerlos o no, y aplicarlos otra vez no repite filas
+        pending, self.history_pending = self.history_pending, []
+        if any(self.history_requery(change) for change in pending):
             self.update_transaction_table()
-        else:
-            messagebox.showerror("Error", "No se pudo eliminar ninguna transacción")
+            return
+        for change in pending:
+            self.apply_history_change(change)
+    
+    def apply_history_change(self, change):
+        if change.kind == 'delete':
+            first = self.remove_history_items([str(trans_id) for trans_id in change.ids])
+            if first is not None:
+                self.renumber_history(first)
+            return
+        
+        first = None
+        for row in change.rows:
+            item = str(row[0])
+            key = sort_key(row, self.history_filters['order'])
+            if item in self.history_keys and self.history_keys[item] == key and self.history_matches(row):
+                # Misma posición: solo cambian los valores de la fila
+                number = self.transaction_tree.set(item, "#")
+                self.transaction_tree.item(item, values=self.history_values(row, number),
+                                           tags=self.history_tags(row))
+                continue
+            
+            removed = self.remove_history_items([item])
+            inserted = self.insert_history_row_sorted(row) if self.history_matches(row) else None
+            for position in (removed, inserted):
+                if position is not None:
+                    first = position if first is None else min(first, position)
+        if first is not None:
+            self.renumber_history(first)
+    
+    def history_matches(self, row):
+        # La fila cumple los filtros de la vista (sin contar la búsqueda)
+        trans_id, fecha, tipo, categoria, monto, descripcion = row
+        filters = self.history_filters
+        return ((filters['tipo'] is None or tipo == filters['tipo'])
+                and (not filters['categoria_ids'] or self.category_cache.id_of(categoria) in filters['categoria_ids'])
+                and (filters['start_date'] is None or fecha >= filters['start_date'])
+                and (filters['end_date'] is None or fecha <= filters['end_date'])
+                and (filters['min_amount'] is None or monto >= filters['min_amount'])
+                and (filters['max_amount'] is None or monto <= filters['max_amount']))
+    
+    def insert_history_row_sorted(self, row):
+        # Búsqueda binaria de la posición por la clave del orden de la vista;
+        # devuelve la posición, 0 si la fila queda por encima de la ventana
+        # (solo corre la numeración) o None si queda debajo, sin cargar
+        key = sort_key(row, self.history_filters['order'])
+        descending = self.history_filters['descending']
+        children = self.transaction_tree.get_children()
+        low, high = 0, len(children)
+        while low < high:
+            middle = (low + high) // 2
+            if (self.history_keys[children[middle]] > key) == descending:
+                low = middle + 1
+            else:
+                high = middle
+        
+        if low == 0 and self.history_offset > 0:
+            self.history_offset += 1
+            return 0
+        if low == len(children) and not self.history_at_end:
+            return None
+        self.insert_history_rows([row], low, self.history_offset + low + 1)
+        return low
     
     def export_to_csv(self):
-        # Implementación básica - en una aplicación real, esto generaría un archivo CSV
-        messagebox.showinfo("Información", "Esta función exportaría los datos a CSV en una implementación completa")
+        if not self.local_only():
+            return
+        from finanzas.core.exporter import ExportCancelled, export_transactions
+        if getattr(self, 'export_thread', None) is not None and self.export_thread.is_alive():
+            messagebox.showwarning("Advertencia", "Ya hay una exportación en curso")
+            return
+        
+        try:
+            start_date = self.history_start_entry.get().strip() or None
+            end_date = self.history_end_entry.get().strip() or None
+            start_date = start_date and parse_date(start_date)
+            end_date = end_date and parse_date(end_date)
+        except ValueError:
+            messagebox.showerror("Error", "Por favor ingrese fechas válidas en formato YYYY-MM-DD")
+            return
+        
+        path = filedialog.asksaveasfilename(
+            title="Exportar transacciones",
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("Parquet", "*.parquet")]
+        )
+        if not path:
+            return
+        
+        fmt = 'parquet' if path.lower().endswith('.parquet') else 'csv'
+        filter_value = self.filter_type.get()
+        tipo = None if filter_value == "Todos" else filter_value
+        
+        # La exportación corre en su propio hilo y conexión; el progreso vuelve
+        # al hilo de Tk por una cola que se revisa con root.after
+        self.export_queue = queue.Queue()
+        self.export_cancel = threading.Event()
+        
+        def run():
+            conn = connect(self.db_path)
+            try:
+                count = export_transactions(
+                    conn, path, fmt, tipo, start_date, end_date,
+                    progress=lambda done, total: self.export_queue.put(('progress', done, total)),
+                    cancel=self.export_cancel
+                )
+                self.export_queue.put(('done', count, path))
+            except ExportCancelled:
+                self.export_queue.put(('cancelled',))
+            except Exception as e:
+                self.export_queue.put(('error', e))
+            finally:
+                conn.close()
+        
+        self.export_thread = threading.Thread(target=run, daemon=True)
+        self.export_thread.start()
+        
+        self.export_progress['value'] = 0
+        self.export_progress.pack(side=tk.LEFT, padx=10)
+        self.export_status.configure(text="Exportando...")
+        self.export_status.pack(side=tk.LEFT)
+        self.export_button.configure(text="Cancelar", command=self.export_cancel.set)
+        self.root.after(100, self.poll_export)
     
-    def show_financial_summary(self):
-        self.clear_work_area()
+    def poll_export(self):
+        finished = None
+        while True:
+            try:
+                event = self.export_queue.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == 'progress':
+                done, total = event[1], event[2]
+                if self.export_progress.winfo_exists():
+                    self.export_progress['value'] = 100 * done / total if total else 100
+                    self.export_status.configure(text=f"{done:,} / {total:,}")
+            else:
+                finished = event
+        
+        if finished is None:
+            self.root.after(100, self.poll_export)
+            return
         
-        # Frame principal para el resumen
-        summary_frame = ttk.Frame(self.work_area)
-        summary_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+        # Restaurar los controles si la vista del historial sigue abierta
+        if self.export_button.winfo_exists():
+            self.export_progress.pack_forget()
+            self.export_status.pack_forget()
+            self.export_button.configure(text="Exportar", command=self.export_to_csv)
+        
+        if finished[0] == 'done':
+            messagebox.showinfo("Éxito", f"Se exportaron {finished[1]} transacciones a {finished[2]}")
+        elif finished[0] == 'error':
+            messagebox.showerror("Error", f"No se pudo exportar: {finished[1]}")
+    
+    @timed('vista')
+    def show_financial_summary(self):
+        self.show_view('resumen', self.build_financial_summary, self.load_financial_summary)
+    
+    def build_financial_summary(self, summary_frame):
+        from finanzas.widgets import BarChart
         
         # Título
         ttk.Label(summary_frame, text="Resumen Financiero", style='Header.TLabel').pack(pady=(0, 20))
         
-        # Obtener datos de resumen
-        cursor = self.conn.cursor()
+        # Selectores de período y agrupación de la serie
+        period_frame = ttk.Frame(summary_frame)
+        period_frame.pack(fill=tk.X, pady=(0, 10))
         
-        # Ingresos totales
-        cursor.execute('SELECT SUM(monto) FROM transacciones WHERE tipo = "Ingreso"')
-        total_income = cursor.fetchone()[0] or 0
+        ttk.Label(period_frame, text="Período:").pack(side=tk.LEFT, padx=5)
+        self.summary_range = tk.StringVar(value=SUMMARY_RANGES[0])
+        range_combobox = ttk.Combobox(period_frame, textvariable=self.summary_range, values=SUMMARY_RANGES,
+                                      state='readonly', width=18)
+        range_combobox.pack(side=tk.LEFT, padx=5)
+        range_combobox.bind('<<ComboboxSelected>>', lambda event: self.load_financial_summary())
         
-        # Gastos totales
-        cursor.execute('SELECT SUM(monto) FROM transacciones WHERE tipo = "Gasto"')
-        total_expenses = cursor.fetchone()[0] or 0
+        ttk.Label(period_frame, text="Agrupar por:").pack(side=tk.LEFT, padx=5)
+        self.summary_grouping = tk.StringVar(value="Mensual")
+        grouping_combobox = ttk.Combobox(period_frame, textvariable=self.summary_grouping,
+                                         values=list(SUMMARY_GROUPINGS), state='readonly', width=10)
+        grouping_combobox.pack(side=tk.LEFT, padx=5)
+        grouping_combobox.bind('<<ComboboxSelected>>', lambda event: self.load_financial_summary())
         
-        # Balance
-        balance = total_income - total_expenses
+        # Estado de la carga y métricas principales; se actualizan sin recrearse
+        self.summary_status = ttk.Label(summary_frame, text="")
+        self.summary_status.pack(anchor=tk.W)
         
-        # Mostrar métricas principales
         metrics_frame = ttk.Frame(summary_frame)
         metrics_frame.pack(fill=tk.X, pady=(0, 20))
         
-        ttk.Label(metrics_frame, text=f"Ingresos Totales: ${total_income:,.2f}", 
-                 font=('Arial', 12), foreground='green').pack(side=tk.LEFT, padx=10)
-        ttk.Label(metrics_frame, text=f"Gastos Totales: ${total_expenses:,.2f}", 
-                 font=('Arial', 12), foreground='red').pack(side=tk.LEFT, padx=10)
-        ttk.Label(metrics_frame, text=f"Balance: ${balance:,.2f}", 
-                 font=('Arial', 12, 'bold'), 
-                 foreground='blue' if balance >= 0 else 'red').pack(side=tk.LEFT, padx=10)
+        self.income_label = ttk.Label(metrics_frame, font=('Arial', 12), foreground='green')
+        self.income_label.pack(side=tk.LEFT, padx=10)
+        self.expenses_label = ttk.Label(metrics_frame, font=('Arial', 12), foreground='red')
+        self.expenses_label.pack(side=tk.LEFT, padx=10)
+        self.balance_label = ttk.Label(metrics_frame, font=('Arial', 12, 'bold'))
+        self.balance_label.pack(side=tk.LEFT, padx=10)
         
-        # Gráfico de gastos por categoría (simulado con texto)
-        chart_frame = ttk.Frame(summary_frame)
-        chart_frame.pack(fill=tk.BOTH, expand=True)
+        # Serie del período con saldo acumulado, abajo del gráfico
+        series_frame = ttk.Frame(summary_frame)
+        series_frame.pack(side=tk.BOTTOM, fill=tk.BOTH, pady=(10, 0))
         
-        ttk.Label(chart_frame, text="Distribución de Gastos por Categoría", 
+        columns = ("Período", "Ingresos", "Gastos", "Saldo acumulado")
+        self.series_tree = ttk.Treeview(series_frame, columns=columns, show="headings", height=8)
+        for col in columns:
+            self.series_tree.heading(col, text=col)
+            self.series_tree.column(col, width=120, anchor=tk.E)
+        self.series_tree.column("Período", anchor=tk.CENTER)
+        
+        scrollbar = ttk.Scrollbar(series_frame, orient=tk.VERTICAL, command=self.series_tree.yview)
+        self.series_tree.configure(yscrollcommand=scrollbar.set)
+        self.series_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        # Gráfico de gastos por categoría: un solo Canvas para todas las barras
+        ttk.Label(summary_frame, text="Distribución de Gastos por Categoría", 
                  font=('Arial', 11, 'bold')).pack(pady=(0, 10))
+        self.expense_chart = BarChart(summary_frame, empty_text="No hay gastos en el período")
+        self.expense_chart.pack(fill=tk.BOTH, expand=True)
         
-        cursor.execute('''
-            SELECT categoria, SUM(monto) 
-            FROM transacciones 
-            WHERE tipo = "Gasto" 
-            GROUP BY categoria 
-            ORDER BY SUM(monto) DESC
-        ''')
-        expenses_by_category = cursor.fetchall()
-        
-        for category, amount in expenses_by_category:
-            category_frame = ttk.Frame(chart_frame)
-            category_frame.pack(fill=tk.X, pady=2)
-            
-            ttk.Label(category_frame, text=category, width=20).pack(side=tk.LEFT)
-            
-            # Barra de progreso simulada
-            max_amount = max(row[1] for row in expenses_by_category)
-            bar_length = int(300 * (amount / max_amount))
-            
-            canvas = tk.Canvas(category_frame, height=20, width=300, bg='white', highlightthickness=0)
-            canvas.pack(side=tk.LEFT, padx=5)
-            canvas.create_rectangle(0, 0, bar_length, 20, fill='#FF6B6B', outline='')
-            
-            ttk.Label(category_frame, text=f"${amount:,.2f}").pack(side=tk.LEFT)
-    
-    def show_category_management(self):
-        self.clear_work_area()
+        # Cualquier escritura cambia los totales: releerlos tras una breve
+        # espera, así una ráfaga de cambios hace una sola consulta. Oculto, el
+        # resumen no consulta y se relee al volver a mostrarlo
+        self.summary_refresh_job = None
+        self.changes.subscribe(lambda change: self.schedule_summary_refresh())
         
-        # Frame principal para gestión de categorías
-        category_frame = ttk.Frame(self.work_area)
-        category_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+        self.load_financial_summary()
+    
+    def schedule_summary_refresh(self):
+        if not self.view_visible('resumen'):
+            return
+        if self.summary_refresh_job is not None:
+            self.root.after_cancel(self.summary_refresh_job)
+        self.summary_refresh_job = self.root.after(SUMMARY_REFRESH_DELAY_MS, self.refresh_financial_summary)
+    
+    def refresh_financial_summary(self):
+        self.summary_refresh_job = None
+        if self.expense_chart.winfo_exists():
+            self.load_financial_summary()
+    
+    def load_financial_summary(self):
+        start_month, end_month = summary_range(self.summary_range.get(), datetime.now())
+        start_day, end_day = month_days(start_month, end_month)
+        period = SUMMARY_GROUPINGS[self.summary_grouping.get()]
+        
+        # Los datos llegan del ejecutor; mientras tanto se muestra un aviso y
+        # queda a la vista el resumen anterior
+        self.view_loaded('resumen')
+        self.summary_status.config(text="Cargando...")
+        
+        self.db.submit(
+            lambda ledger: (ledger.summary.totals(start_month, end_month),
+                            ledger.summary.series(period, start_day, end_day)),
+            on_done=self.render_financial_summary, channel='summary'
+        )
+    
+    @timed('vista')
+    def render_financial_summary(self, result):
+        (total_income, total_expenses, expenses_by_category), series = result
+        if not self.expense_chart.winfo_exists():
+            return
+        self.summary_status.config(text="")
         
+        balance = total_income - total_expenses
+        self.income_label.config(text=f"Ingresos Totales: ${format_amount(total_income)}")
+        self.expenses_label.config(text=f"Gastos Totales: ${format_amount(total_expenses)}")
+        self.balance_label.config(text=f"Balance: ${format_amount(balance)}",
+                                  foreground='blue' if balance >= 0 else 'red')
+        
+        # El gráfico solo toca las barras que cambiaron
+        self.expense_chart.set_data(expenses_by_category)
+        
+        self.series_tree.delete(*self.series_tree.get_children())
+        for label, income, expenses, balance in series:
+            self.series_tree.insert("", tk.END, values=(
+                label, f"${format_amount(income)}", f"${format_amount(expenses)}", f"${format_amount(balance)}"
+            ))
+    
+    @timed('vista')
+    def show_category_management(self):
+        self.show_view('categorias', self.build_category_management, self.update_category_table)
+    
+    def build_category_management(self, category_frame):
         # Título
         ttk.Label(category_frame, text="Gestión de Categorías", style='Header.TLabel').pack(pady=(0, 20))
         
@@ -466,15 +1176,18 @@ class FinanceApp:
         # Actualizar tabla de categorías
         self.update_category_table()
     
+    @timed('vista')
     def update_category_table(self):
-        # Limpiar tabla
-        for item in self.category_tree.get_children():
-            self.category_tree.delete(item)
+        self.view_loaded('categorias')
+        self.with_categories(lambda: self.fill_category_table(self.category_cache.all()))
+    
+    @timed('vista')
+    def fill_category_table(self, categories):
+        if not self.category_tree.winfo_exists():
+            return
         
-        # Obtener categorías
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT id, nombre, tipo FROM categorias ORDER BY tipo, nombre')
-        categories = cursor.fetchall()
+        # Limpiar tabla
+        self.category_tree.delete(*self.category_tree.get_children())
         
         # Insertar datos en la tabla
         for i, (cat_id, nombre, tipo) in enumerate(categories, 1):
@@ -492,46 +1205,211 @@ class FinanceApp:
             messagebox.showerror("Error", "Por favor ingrese un nombre para la categoría")
             return
         
-        cursor = self.conn.cursor()
-        try:
-            cursor.execute('INSERT INTO categorias (nombre, tipo) VALUES (?, ?)', (name, cat_type))
-            self.conn.commit()
+        def added(cat_id):
+            self.categories_changed(lambda cache: cache.add(cat_id, name, cat_type))
             messagebox.showinfo("Éxito", "Categoría agregada correctamente")
-            self.new_category_name.delete(0, tk.END)
-            self.update_category_table()
-            self.update_category_combobox()
-        except sqlite3.IntegrityError:
-            messagebox.showerror("Error", "Ya existe una categoría con ese nombre")
+            if self.category_tree.winfo_exists():
+                self.new_category_name.delete(0, tk.END)
+                self.update_category_table()
+        
+        def failed(error):
+            if isinstance(error, ValidationError):
+                messagebox.showerror("Error", str(error))
+            else:
+                self.show_db_error(error)
+        
+        self.db.submit(lambda ledger: ledger.categories.add(name, cat_type), on_done=added, on_error=failed, write=True)
     
     def delete_category(self, category_id):
         # Primero verificar si hay transacciones asociadas
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT COUNT(*) FROM transacciones WHERE categoria = (SELECT nombre FROM categorias WHERE id = ?)', (category_id,))
-        count = cursor.fetchone()[0]
+        def counted(count):
+            if count > 0:
+                messagebox.showerror("Error", "No se puede eliminar esta categoría porque tiene transacciones asociadas")
+                return
+            
+            confirm = messagebox.askyesno(
+                "Confirmar", 
+                "¿Está seguro que desea eliminar esta categoría?"
+            )
+            
+            if confirm:
+                self.db.submit(
+                    lambda ledger: ledger.categories.delete(category_id),
+                    on_done=deleted, on_error=failed, write=True
+                )
+        
+        def deleted(count):
+            self.categories_changed(lambda cache: cache.remove(int(category_id)) if count else None)
+            if self.category_tree.winfo_exists():
+                self.update_category_table()
+            messagebox.showinfo("Éxito", "Categoría eliminada correctamente")
         
-        if count > 0:
-            messagebox.showerror("Error", "No se puede eliminar esta categoría porque tiene transacciones asociadas")
-            return
+        def failed(error):
+            if isinstance(error, ValidationError):
+                messagebox.showerror("Error", str(error))
+            else:
+                self.show_db_error(error)
         
-        confirm = messagebox.askyesno(
-            "Confirmar", 
-            "¿Está seguro que desea eliminar esta categoría?"
-        )
+        self.db.submit(lambda ledger: ledger.categories.usage(category_id), on_done=counted)
+    
+    @timed('vista')
+    def show_budgets(self):
+        self.show_view('presupuestos', self.build_budgets, self.load_budgets)
+    
+    def build_budgets(self, budget_frame):
+        ttk.Label(budget_frame, text="Presupuestos y Recurrentes", style='Header.TLabel').pack(pady=(0, 20))
+        
+        # Mes del informe
+        month_frame = ttk.Frame(budget_frame)
+        month_frame.pack(fill=tk.X, pady=(0, 10))
+        ttk.Label(month_frame, text="Mes (YYYY-MM):").pack(side=tk.LEFT, padx=5)
+        self.budget_month = ttk.Entry(month_frame, width=10)
+        self.budget_month.insert(0, datetime.now().strftime("%Y-%m"))
+        self.budget_month.pack(side=tk.LEFT, padx=5)
+        self.budget_month.bind('<Return>', lambda event: self.load_budgets())
+        ttk.Button(month_frame, text="Ver", command=self.load_budgets).pack(side=tk.LEFT, padx=5)
+        
+        # Presupuesto contra lo registrado en el mes, por categoría
+        columns = ("Categoría", "Tipo", "Presupuesto", "Registrado", "Disponible", "Uso")
+        self.budget_tree = ttk.Treeview(budget_frame, columns=columns, show="headings", selectmode="browse",
+                                        height=10)
+        for col in columns:
+            self.budget_tree.heading(col, text=col)
+            self.budget_tree.column(col, width=100, anchor=tk.E)
+        self.budget_tree.column("Categoría", width=140, anchor=tk.W)
+        self.budget_tree.column("Tipo", width=70, anchor=tk.CENTER)
+        self.budget_tree.tag_configure('excedido', foreground='red')
+        self.budget_tree.pack(fill=tk.BOTH, expand=True)
+        
+        # Presupuesto de la categoría seleccionada
+        edit_frame = ttk.Frame(budget_frame)
+        edit_frame.pack(fill=tk.X, pady=10)
+        ttk.Label(edit_frame, text="Presupuesto mensual:").pack(side=tk.LEFT, padx=5)
+        self.budget_amount = ttk.Entry(edit_frame, width=12)
+        self.budget_amount.pack(side=tk.LEFT, padx=5)
+        ttk.Button(edit_frame, text="Fijar", command=self.set_selected_budget).pack(side=tk.LEFT, padx=5)
+        ttk.Button(edit_frame, text="Quitar", command=self.remove_selected_budget).pack(side=tk.LEFT, padx=5)
+        
+        # Reglas de transacciones recurrentes
+        ttk.Label(budget_frame, text="Transacciones Recurrentes", font=('Arial', 11, 'bold')).pack(pady=(10, 5))
+        columns = ("Próxima", "Descripción", "Categoría", "Monto", "Frecuencia")
+        self.recurring_tree = ttk.Treeview(budget_frame, columns=columns, show="headings", selectmode="browse",
+                                           height=5)
+        for col in columns:
+            self.recurring_tree.heading(col, text=col)
+            self.recurring_tree.column(col, width=100, anchor=tk.CENTER)
+        self.recurring_tree.column("Descripción", width=180, anchor=tk.W)
+        self.recurring_tree.column("Monto", anchor=tk.E)
+        self.recurring_tree.pack(fill=tk.X)
+        ttk.Button(budget_frame, text="Eliminar Regla", command=self.delete_selected_rule).pack(anchor=tk.E, pady=5)
+        
+        # Lo registrado por mes se mantiene en la base con cada escritura:
+        # volver a leer el informe cuesta una fila por categoría. Como el
+        # resumen, oculto espera a que se vuelva a mostrar
+        self.budget_refresh_job = None
+        self.changes.subscribe(lambda change: self.schedule_budget_refresh())
+        
+        self.load_budgets()
+    
+    def schedule_budget_refresh(self):
+        if not self.view_visible('presupuestos'):
+            return
+        if self.budget_refresh_job is not None:
+            self.root.after_cancel(self.budget_refresh_job)
+        self.budget_refresh_job = self.root.after(SUMMARY_REFRESH_DELAY_MS, self.refresh_budgets)
+    
+    def refresh_budgets(self):
+        self.budget_refresh_job = None
+        if self.budget_tree.winfo_exists():
+            self.load_budgets()
+    
+    def load_budgets(self):
+        mes = self.budget_month.get().strip()
+        self.view_loaded('presupuestos')
+        self.db.submit(lambda ledger: (ledger.budgets.report(mes), ledger.recurring.all()),
+                       on_done=self.render_budgets, on_error=self.show_error, channel='budgets')
+    
+    @timed('vista')
+    def render_budgets(self, result):
+        report, rules = result
+        if not self.budget_tree.winfo_exists():
+            return
         
-        if confirm:
-            cursor.execute('DELETE FROM categorias WHERE id = ?', (category_id,))
-            self.conn.commit()
-            self.update_category_table()
-            self.update_category_combobox()
-            messagebox.showinfo("Éxito", "Categoría eliminada correctamente")
+        selection = self.budget_tree.selection()
+        self.budget_tree.delete(*self.budget_tree.get_children())
+        for cat_id, nombre, tipo, presupuesto, registrado in report:
+            if presupuesto is None:
+                values = (nombre, tipo, "-", f"${format_amount(registrado)}", "-", "")
+                tags = ()
+            else:
+                values = (nombre, tipo, f"${format_amount(presupuesto)}", f"${format_amount(registrado)}",
+                          f"${format_amount(presupuesto - registrado)}", f"{registrado * 100 // presupuesto}%")
+                tags = ('excedido',) if tipo == 'Gasto' and registrado > presupuesto else ()
+            self.budget_tree.insert("", tk.END, iid=cat_id, values=values, tags=tags)
+        self.budget_tree.selection_set([item for item in selection if self.budget_tree.exists(item)])
+        
+        self.recurring_tree.delete(*self.recurring_tree.get_children())
+        for rule_id, tipo, categoria, monto, descripcion, frecuencia, intervalo, inicio, fin, proxima in rules:
+            self.recurring_tree.insert("", tk.END, iid=rule_id, values=(
+                proxima if fin is None or proxima <= fin else "Terminada", descripcion or "", categoria,
+                f"${format_amount(monto)}", f"cada {intervalo} {FRECUENCIAS[frecuencia]}"
+            ))
     
-    def show_settings(self):
-        self.clear_work_area()
+    def set_selected_budget(self):
+        selection = self.budget_tree.selection()
+        if not selection:
+            messagebox.showwarning("Advertencia", "Seleccione una categoría")
+            return
+        category_id = int(selection[0])
+        monto = self.budget_amount.get().strip()
         
-        # Frame para configuración
-        settings_frame = ttk.Frame(self.work_area)
-        settings_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+        def saved(result):
+            if self.budget_tree.winfo_exists():
+                self.budget_amount.delete(0, tk.END)
+                self.load_budgets()
         
+        self.db.submit(lambda ledger: ledger.budgets.set(category_id, monto), on_done=saved,
+                       on_error=self.show_error, write=True)
+    
+    def remove_selected_budget(self):
+        selection = self.budget_tree.selection()
+        if not selection:
+            messagebox.showwarning("Advertencia", "Seleccione una categoría")
+            return
+        category_id = int(selection[0])
+        self.db.submit(lambda ledger: ledger.budgets.remove(category_id), on_done=lambda count: self.refresh_budgets(),
+                       on_error=self.show_error, write=True)
+    
+    def delete_selected_rule(self):
+        selection = self.recurring_tree.selection()
+        if not selection:
+            messagebox.showwarning("Advertencia", "Seleccione una regla")
+            return
+        if not messagebox.askyesno("Confirmar", "¿Eliminar la regla? Las transacciones ya generadas se conservan."):
+            return
+        rule_id = int(selection[0])
+        self.db.submit(lambda ledger: ledger.recurring.delete(rule_id), on_done=lambda count: self.refresh_budgets(),
+                       on_error=self.show_error, write=True)
+    
+    def run_recurring_scheduler(self):
+        # Al arrancar se generan de una vez las ocurrencias de los días en
+        # que la aplicación no corrió; después se revisa cada hora
+        self.root.after(RECURRING_CHECK_INTERVAL_MS, self.run_recurring_scheduler)
+        self.db.submit(generate_recurring, on_done=self.publish_generated, write=True)
+    
+    def publish_generated(self, result):
+        ids, rows = result
+        if rows:
+            self.changes.publish('insert', rows, ids)
+        elif ids:
+            self.changes.publish('reset')
+    
+    @timed('vista')
+    def show_settings(self):
+        # El estado de las copias se actualiza solo (ver poll_backup)
+        self.show_view('configuracion', self.build_settings)
+    
+    def build_settings(self, settings_frame):
         # Título
         ttk.Label(settings_frame, text="Configuración", style='Header.TLabel').pack(pady=(0, 20))
         
@@ -540,24 +1418,319 @@ class FinanceApp:
         ttk.Label(settings_frame, text="En una implementación completa aquí habría opciones como:").pack(pady=10)
         ttk.Label(settings_frame, text="- Moneda predeterminada").pack()
         ttk.Label(settings_frame, text="- Formato de fecha").pack()
-        ttk.Label(settings_frame, text="- Copias de seguridad automáticas").pack()
         ttk.Label(settings_frame, text="- Tema de la interfaz").pack()
         
+        # Copias de seguridad automáticas y progreso de la copia en curso
+        backup_frame = ttk.Frame(settings_frame)
+        backup_frame.pack(pady=(20, 0))
+        self.backup_status = ttk.Label(backup_frame, text=self.backup_summary())
+        self.backup_status.pack()
+        self.backup_progress = ttk.Progressbar(backup_frame, length=300, mode='determinate')
+        if self.backup_running():
+            self.backup_progress.pack(pady=5)
+        
         ttk.Button(settings_frame, text="Exportar Base de Datos", command=self.export_database).pack(pady=20)
         ttk.Button(settings_frame, text="Importar Base de Datos", command=self.import_database).pack()
+        ttk.Button(settings_frame, text="Importar Extracto (CSV/OFX)", command=self.import_statement_file).pack(pady=20)
+        ttk.Button(settings_frame, text="Diagnóstico de Rendimiento", command=self.show_diagnostics).pack()
+    
+    def show_diagnostics(self):
+        # Las mediciones cambian sin escrituras: se releen cada vez
+        self.show_view('diagnostico', self.build_diagnostics)
+        self.fill_diagnostics()
+    
+    def build_diagnostics(self, diagnostics_frame):
+        ttk.Label(diagnostics_frame, text="Diagnóstico de Rendimiento", style='Header.TLabel').pack(pady=(0, 10))
+        
+        # Encendido, umbral de consulta lenta y acciones
+        controls_frame = ttk.Frame(diagnostics_frame)
+        controls_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        self.metrics_enabled = tk.BooleanVar(value=METRICS.enabled)
+        ttk.Checkbutton(controls_frame, text="Medir consultas y vistas", variable=self.metrics_enabled,
+                        command=lambda: setattr(METRICS, 'enabled', self.metrics_enabled.get())).pack(side=tk.LEFT)
+        ttk.Label(controls_frame, text="Lenta desde (ms):").pack(side=tk.LEFT, padx=(15, 5))
+        self.slow_ms_entry = ttk.Entry(controls_frame, width=6)
+        self.slow_ms_entry.insert(0, f"{METRICS.slow_ms:g}")
+        self.slow_ms_entry.pack(side=tk.LEFT)
+        self.slow_ms_entry.bind('<Return>', lambda event: self.set_slow_threshold())
+        
+        ttk.Button(controls_frame, text="Actualizar", command=self.fill_diagnostics).pack(side=tk.LEFT, padx=5)
+        ttk.Button(controls_frame, text="Reiniciar",
+                   command=lambda: (METRICS.reset(), self.fill_diagnostics())).pack(side=tk.LEFT, padx=5)
+        ttk.Button(controls_frame, text="Guardar JSON", command=self.save_diagnostics).pack(side=tk.LEFT, padx=5)
+        
+        # Operaciones ordenadas por tiempo total
+        columns = ("Operación", "Cantidad", "Media", "p50", "p95", "Máx")
+        operations_frame = ttk.Frame(diagnostics_frame)
+        operations_frame.pack(fill=tk.BOTH, expand=True)
+        self.operations_tree = ttk.Treeview(operations_frame, columns=columns, show="headings", height=10)
+        for col in columns:
+            self.operations_tree.heading(col, text=col)
+            self.operations_tree.column(col, width=70, anchor=tk.E)
+        self.operations_tree.column("Operación", width=380, anchor=tk.W)
+        scrollbar = ttk.Scrollbar(operations_frame, orient=tk.VERTICAL, command=self.operations_tree.yview)
+        self.operations_tree.configure(yscrollcommand=scrollbar.set)
+        self.operations_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        # Consultas lentas; doble clic muestra el plan
+        ttk.Label(diagnostics_frame, text="Consultas lentas (doble clic para ver el plan)",
+                  font=('Arial', 10, 'bold')).pack(anchor=tk.W, pady=(10, 0))
+        self.slow_tree = ttk.Treeview(diagnostics_frame, columns=("Fecha", "ms", "Consulta"), show="headings",
+                                      height=6)
+        self.slow_tree.heading("Fecha", text="Fecha")
+        self.slow_tree.heading("ms", text="ms")
+        self.slow_tree.heading("Consulta", text="Consulta")
+        self.slow_tree.column("Fecha", width=140)
+        self.slow_tree.column("ms", width=70, anchor=tk.E)
+        self.slow_tree.column("Consulta", width=500)
+        self.slow_tree.pack(fill=tk.X)
+        self.slow_tree.bind('<Double-1>', lambda event: self.show_slow_query_plan())
+        
+        ttk.Button(diagnostics_frame, text="Volver", command=self.show_settings).pack(pady=(10, 0))
+    
+    def fill_diagnostics(self):
+        self.diagnostics = METRICS.snapshot()
+        self.operations_tree.delete(*self.operations_tree.get_children())
+        for name, stats in self.diagnostics['operaciones'].items():
+            self.operations_tree.insert("", tk.END, values=(
+                name, stats['cantidad'], f"{stats['media_ms']:.2f}", f"{stats['p50_ms']:.2f}",
+                f"{stats['p95_ms']:.2f}", f"{stats['max_ms']:.2f}"
+            ))
+        
+        self.slow_tree.delete(*self.slow_tree.get_children())
+        for number, entry in reversed(list(enumerate(self.diagnostics['consultas_lentas']))):
+            self.slow_tree.insert("", tk.END, iid=str(number), values=(entry['fecha'], entry['ms'], entry['sql']))
+    
+    def set_slow_threshold(self):
+        try:
+            METRICS.slow_ms = float(self.slow_ms_entry.get())
+        except ValueError:
+            messagebox.showerror("Error", "Ingrese el umbral en milisegundos")
+    
+    def show_slow_query_plan(self):
+        selected = self.slow_tree.selection()
+        if not selected:
+            return
+        entry = self.diagnostics['consultas_lentas'][int(selected[0])]
+        plan = "\n".join(entry['plan']) or "(sin plan)"
+        messagebox.showinfo("Plan de consulta", f"{entry['sql']}\n\nParámetros: {entry['parametros']}\n\n{plan}")
+    
+    def save_diagnostics(self):
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON", "*.json")],
+                                            title="Guardar diagnóstico")
+        if not path:
+            return
+        try:
+            with open(path, 'w', encoding='utf-8') as file:
+                METRICS.dump(file)
+        except OSError as e:
+            messagebox.showerror("Error", f"No se pudo guardar el diagnóstico: {e}")
+    
+    def backup_summary(self):
+        if self.server:
+            return "Las copias de seguridad se hacen en el servidor"
+        from finanzas.core.backup import list_snapshots, snapshot_dir
+        directory = snapshot_dir(self.db_path)
+        snapshots = list_snapshots(directory)
+        if not snapshots:
+            return "Todavía no hay copias automáticas"
+        return (f"Última copia automática: {snapshots[0][0]:%Y-%m-%d %H:%M} "
+                f"({len(snapshots)} guardadas en {directory})")
+    
+    def backup_shown(self):
+        # La pantalla de configuración, con el estado de las copias, ya se armó
+        return self.backup_status is not None and self.backup_status.winfo_exists()
+    
+    def backup_running(self):
+        return self.backup_thread is not None and self.backup_thread.is_alive()
+    
+    def start_backup(self, func, done_message=None):
+        # Corre func(progress, cancel) en un hilo propio. Sin done_message la
+        # copia es automática y solo avisa si falla. Devuelve False si ya hay
+        # una copia en curso
+        if self.backup_running():
+            return False
+        
+        self.backup_queue = queue.Queue()
+        
+        def run():
+            try:
+                func(lambda done, total: self.backup_queue.put(('progress', done, total)), self.backup_cancel)
+                self.backup_queue.put(('done',))
+            except Exception as e:
+                self.backup_queue.put(('error', e))
+        
+        self.backup_thread = threading.Thread(target=run, name='finanzas-backup', daemon=True)
+        self.backup_thread.start()
+        if self.backup_shown():
+            self.backup_status.configure(text="Copiando...")
+            self.backup_progress['value'] = 0
+            self.backup_progress.pack(pady=5)
+        self.root.after(100, self.poll_backup, done_message)
+        return True
+    
+    def poll_backup(self, done_message):
+        finished = None
+        while True:
+            try:
+                event = self.backup_queue.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == 'progress':
+                done, total = event[1], event[2]
+                if self.backup_shown():
+                    self.backup_progress['value'] = 100 * done / total if total else 100
+            else:
+                finished = event
+        
+        if finished is None:
+            self.root.after(100, self.poll_backup, done_message)
+            return
+        
+        if self.backup_shown():
+            self.backup_progress.pack_forget()
+            self.backup_status.configure(text=self.backup_summary())
+        
+        if finished[0] == 'error':
+            messagebox.showerror("Error", f"No se pudo copiar la base de datos: {finished[1]}")
+        elif done_message:
+            messagebox.showinfo("Éxito", done_message)
+    
+    def check_snapshot(self):
+        # Copia automática cuando la última es más vieja que BACKUP_INTERVAL_HOURS
+        self.root.after(BACKUP_CHECK_INTERVAL_MS, self.check_snapshot)
+        from finanzas.core.backup import BACKUP_KEEP, snapshot_dir, snapshot_due, take_snapshot
+        directory = snapshot_dir(self.db_path)
+        if snapshot_due(directory, datetime.now()):
+            self.start_backup(lambda progress, cancel: take_snapshot(self.db_path, directory, BACKUP_KEEP,
+                                                                     progress, cancel))
+    
+    def local_only(self):
+        # Copias, exportaciones e importaciones usan el archivo de la base
+        # directamente; contra un servidor no hay archivo local
+        if not self.server:
+            return True
+        messagebox.showerror("Error", "No disponible al trabajar con un servidor remoto")
+        return False
     
     def export_database(self):
-        messagebox.showinfo("Información", "Esta función exportaría la base de datos en una implementación completa")
+        if not self.local_only():
+            return
+        path = filedialog.asksaveasfilename(
+            title="Exportar base de datos",
+            defaultextension=".db.gz",
+            filetypes=[("Copia comprimida", "*.db.gz"), ("Base de datos SQLite", "*.db")]
+        )
+        if not path:
+            return
+        if os.path.abspath(path) == os.path.abspath(self.db_path):
+            messagebox.showerror("Error", "Elija un archivo distinto de la base de datos en uso")
+            return
+        from finanzas.core.backup import backup_database
+        
+        if not self.start_backup(lambda progress, cancel: backup_database(self.db_path, path, progress, cancel),
+                                 f"Base de datos exportada a {path}"):
+            messagebox.showwarning("Advertencia", "Ya hay una copia de seguridad en curso")
     
     def import_database(self):
-        messagebox.showinfo("Información", "Esta función importaría una base de datos en una implementación completa")
+        if not self.local_only():
+            return
+        path = filedialog.askopenfilename(
+            title="Importar base de datos",
+            filetypes=[("Copias", "*.db.gz *.db"), ("Todos los archivos", "*")]
+        )
+        if not path:
+            return
+        if not messagebox.askyesno("Confirmar", "Se reemplazarán todos los datos por los de la copia. "
+                                                "Antes se guardará una copia de los datos actuales. ¿Continuar?"):
+            return
+        from finanzas.core.backup import SNAPSHOT_SUFFIX, backup_database, restore_database, snapshot_dir
+        
+        safety_path = os.path.join(snapshot_dir(self.db_path),
+                                   f"antes-de-restaurar-{datetime.now():%Y%m%d-%H%M%S}{SNAPSHOT_SUFFIX}")
+        
+        def run(ledger):
+            # En el hilo escritor: ninguna otra escritura se mezcla con la restauración
+            os.makedirs(os.path.dirname(safety_path), exist_ok=True)
+            backup_database(self.db_path, safety_path)
+            restore_database(path, ledger.conn)
+        
+        def restored(result):
+            self.categories_changed()
+            self.changes.publish('reset')
+            messagebox.showinfo("Éxito", f"Base de datos restaurada desde {path}.\n\n"
+                                         f"Los datos anteriores quedaron en {safety_path}")
+        
+        def failed(error):
+            messagebox.showerror("Error", f"No se pudo restaurar la base de datos: {error}")
+        
+        self.db.submit(run, on_done=restored, on_error=failed, write=True)
+    
+    def import_statement_file(self):
+        if not self.local_only():
+            return
+        path = filedialog.askopenfilename(
+            title="Importar extracto bancario",
+            filetypes=[("Extractos", "*.csv *.ofx *.qfx"), ("CSV", "*.csv"), ("OFX", "*.ofx *.qfx")]
+        )
+        if not path:
+            return
+        
+        fmt = 'ofx' if path.lower().endswith(('.ofx', '.qfx')) else 'csv'
+        from finanzas.core.importer import import_statement
+        
+        def run(ledger):
+            with open(path, newline='', encoding='utf-8-sig', errors='replace') as file:
+                return import_statement(ledger.conn, file, fmt)
+        
+        def imported(report):
+            # El importador puede haber creado categorías nuevas
+            self.categories_changed()
+            self.changes.publish('reset')
+            rate = report.imported / report.elapsed if report.elapsed else 0
+            message = (f"Se importaron {report.imported} transacciones "
+                       f"({rate:,.0f} filas/s) y se omitieron {report.skipped}.")
+            if report.errors:
+                message += "\n\n" + "\n".join(report.errors)
+            messagebox.showinfo("Importación", message)
+        
+        def failed(error):
+            messagebox.showerror("Error", f"No se pudo importar el extracto: {error}")
+        
+        self.db.submit(run, on_done=imported, on_error=failed, write=True)
     
     def on_closing(self):
-        self.conn.close()
+        # Una copia a medio hacer se descarta en lugar de quedar incompleta
+        if self.backup_running():
+            self.backup_cancel.set()
+            self.backup_thread.join(5)
+        self.db.close()
         self.root.destroy()
+        if self.metrics_path:
+            with open(self.metrics_path, 'w', encoding='utf-8') as file:
+                METRICS.dump(file)
 
-if __name__ == "__main__":
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sistema de Gestión Financiera")
+    parser.add_argument('--db', help="ruta de la base de datos (por defecto $FINANZAS_DB o finanzas.db)")
+    parser.add_argument('--metrics', metavar='RUTA',
+                        help="medir consultas y vistas desde el inicio y guardar el resultado en RUTA al salir")
+    parser.add_argument('--slow-log', metavar='RUTA', help="agregar las consultas lentas a RUTA (JSON por línea)")
+    parser.add_argument('--server', metavar='URL',
+                        help="trabajar contra finanzas.server, p. ej. http://127.0.0.1:8765")
+    parser.add_argument('--ledger', default='principal', help="libro del servidor (por defecto principal)")
+    parser.add_argument('--token', default=os.environ.get('FINANZAS_TOKEN'),
+                        help="token del servidor (por defecto $FINANZAS_TOKEN)")
+    args = parser.parse_args(argv)
+    METRICS.enabled = bool(args.metrics or args.slow_log)
+    METRICS.slow_log_path = args.slow_log
+    
     root = tk.Tk()
-    app = FinanceApp(root)
+    app = FinanceApp(root, args.db, args.metrics, args.server, args.ledger, args.token)
     root.protocol("WM_DELETE_WINDOW", app.on_closing)
     root.mainloop()
+
+if __name__ == "__main__":
+    main()
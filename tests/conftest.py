@@ -0,0 +1,9 @@
+import pytest
+
+from finanzas.core import Ledger
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    with Ledger.open(str(tmp_path / 'finanzas.db')) as ledger:
+        yield ledger
@@ -0,0 +1,82 @@
+"""Motor de análisis con NumPy frente a los resúmenes de SQLite."""
+
+import random
+from collections import Counter
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from finanzas.core import analytics
+from finanzas.core.analytics import LedgerArrays, group_sums
+
+
+@pytest.fixture(params=['bincount', 'reduceat'])
+def path(request, monkeypatch):
+    # Con el límite en 0 toda suma toma el camino exacto de reduceat
+    if request.param == 'reduceat':
+        monkeypatch.setattr(analytics, 'FLOAT_EXACT_LIMIT', 0)
+    return request.param
+
+
+def expected_sums(keys, values, size):
+    sums = Counter()
+    for key, value in zip(keys.tolist(), values.tolist()):
+        sums[key] += value
+    return [sums[key] for key in range(size)]
+
+
+def test_group_sums(path):
+    rng = np.random.default_rng(5)
+    keys = rng.integers(0, 40, 5000)
+    values = rng.integers(1, 10 ** 7, 5000)
+    # Los grupos 40..49 no tienen valores y quedan en 0
+    assert group_sums(np, keys, values, 50).tolist() == expected_sums(keys, values, 50)
+    assert group_sums(np, keys[:0], values[:0], 3).tolist() == [0, 0, 0]
+
+
+def test_group_sums_exact_beyond_float():
+    # Más allá de 2**53 bincount (float64) pierde unidades; reduceat no
+    keys = np.array([0, 1, 0, 1, 2] * 200)
+    values = np.array([2 ** 50 + 1, 3, 2 ** 49 + 7, -5, 1] * 200, dtype=np.int64)
+    assert int(np.abs(values).sum()) >= analytics.FLOAT_EXACT_LIMIT
+    assert group_sums(np, keys, values, 3).tolist() == expected_sums(keys, values, 3)
+    
+    # Una suma de valores absolutos que desborda int64 tampoco va por bincount
+    values = np.array([2 ** 62, -2 ** 62, 2 ** 62 - 1, 2, -2 ** 62], dtype=np.int64)
+    assert int(np.abs(values).sum()) < analytics.FLOAT_EXACT_LIMIT
+    assert group_sums(np, np.array([0, 0, 1, 1, 2]), values, 3).tolist() == [0, 2 ** 62 + 1, -2 ** 62]
+
+
+@pytest.fixture
+def filled(ledger):
+    rng = random.Random(11)
+    categories = ledger.categories.all()
+    for _ in range(400):
+        _, nombre, tipo = rng.choice(categories)
+        # Meses salteados: la serie de LedgerArrays incluye los meses vacíos
+        fecha = f'{rng.choice([2023, 2024])}-{rng.choice([1, 2, 3, 7, 12]):02d}-{rng.randint(1, 28):02d}'
+        ledger.transactions.add(tipo, nombre, f'{rng.randint(1, 10 ** 6) / 100:.2f}', fecha, 'prueba')
+    return ledger
+
+
+def test_arrays_match_summary(filled, path):
+    arrays = LedgerArrays.load(filled.conn, chunk_size=64)
+    income, expenses, by_category = filled.summary.totals()
+    assert len(arrays) == 400
+    assert arrays.totals() == (income, expenses)
+    assert sorted(arrays.by_category('Gasto')) == sorted(by_category)
+    assert [total for _, total in arrays.by_category('Gasto')] == [total for _, total in by_category]
+    assert sum(total for _, total in arrays.by_category('Ingreso')) == income
+    
+    monthly = arrays.monthly()
+    assert [row for row in monthly if row[1] or row[2]] == filled.summary.series('mes')
+    assert (monthly[0][0], monthly[-1][0], len(monthly)) == ('2023-01', '2024-12', 24)
+    dias, balance = arrays.running_balance()
+    assert (dias == np.sort(dias)).all()
+    assert int(balance[-1]) == income - expenses == monthly[-1][3]
+
+
+def test_empty_ledger(ledger):
+    arrays = LedgerArrays.load(ledger.conn)
+    assert (len(arrays), arrays.totals(), arrays.by_category(), arrays.monthly()) == (0, (0, 0), [], [])
@@ -0,0 +1,94 @@
+"""Copias de seguridad, restauración y limpieza de copias automáticas."""
+
+import gzip
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from finanzas.core import ValidationError
+from finanzas.core.backup import (SNAPSHOT_PREFIX, SNAPSHOT_SUFFIX, SNAPSHOT_TIME_FORMAT, backup_database,
+                                  list_snapshots, prune_snapshots, restore_database)
+
+
+def rows(ledger):
+    return sorted(ledger.transactions.page())
+
+
+@pytest.fixture
+def filled(ledger):
+    ledger.transactions.add('Gasto', 'Alimentos', '12.50', '2024-01-05', "Supermercado")
+    ledger.transactions.add('Ingreso', 'Salario', '1000', '2024-01-31', "Sueldo enero")
+    return ledger
+
+
+def test_gz_round_trip(filled, tmp_path):
+    path = str(tmp_path / 'copia.db.gz')
+    saved = rows(filled)
+    assert backup_database(str(tmp_path / 'finanzas.db'), path) == os.path.getsize(path)
+    with gzip.open(path, 'rb') as packed:
+        assert packed.read(16) == b'SQLite format 3\x00'
+    
+    filled.transactions.add('Gasto', 'Transporte', '40', '2024-02-02', "Taxi")
+    filled.transactions.delete_many([saved[0][0]])
+    assert rows(filled) != saved
+    
+    restore_database(path, filled.conn)
+    assert rows(filled) == saved
+    assert filled.summary.check() == []
+
+
+def write_corrupt_gz(path):
+    with gzip.open(path, 'wb') as packed:
+        packed.write(b'SQLite format 3\x00' + os.urandom(8192))
+
+
+def write_truncated_gz(path, source):
+    backup_database(source, path + '.full.gz')
+    with open(path + '.full.gz', 'rb') as full:
+        data = full.read()
+    with open(path, 'wb') as truncated:
+        truncated.write(data[:len(data) // 2])
+
+
+def write_foreign_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE otra (x)')
+    conn.commit()
+    conn.close()
+
+
+@pytest.mark.parametrize('kind', ['basura', 'gz dañado', 'gz truncado', 'otra base'])
+def test_failed_restore_keeps_live_database(filled, tmp_path, kind):
+    path = str(tmp_path / ('copia.db' if kind in ('basura', 'otra base') else 'copia.db.gz'))
+    if kind == 'basura':
+        with open(path, 'wb') as file:
+            file.write(b'no es una base de datos' * 100)
+    elif kind == 'gz dañado':
+        write_corrupt_gz(path)
+    elif kind == 'gz truncado':
+        write_truncated_gz(path, str(tmp_path / 'finanzas.db'))
+    else:
+        write_foreign_db(path)
+    saved = rows(filled)
+    
+    with pytest.raises(ValidationError):
+        restore_database(path, filled.conn)
+    assert rows(filled) == saved
+    assert filled.conn.execute('PRAGMA integrity_check').fetchone()[0] == 'ok'
+
+
+def test_prune_keeps_newest(tmp_path):
+    start = datetime(2024, 1, 1, 3, 0, 0)
+    names = [f"{SNAPSHOT_PREFIX}{(start + timedelta(days=day)).strftime(SNAPSHOT_TIME_FORMAT)}{SNAPSHOT_SUFFIX}"
+             for day in range(10)]
+    # Un orden de creación distinto del de las fechas, y archivos ajenos
+    for name in names[5:] + names[:5] + ['finanzas-sin-fecha.db.gz', 'otra.db.gz']:
+        (tmp_path / name).write_bytes(b'')
+    
+    removed = prune_snapshots(str(tmp_path), keep=3)
+    assert sorted(os.path.basename(path) for path in removed) == names[:7]
+    assert [os.path.basename(path) for _, path in list_snapshots(str(tmp_path))] == names[:6:-1]
+    assert sorted(os.listdir(tmp_path)) == sorted(names[7:] + ['finanzas-sin-fecha.db.gz', 'otra.db.gz'])
+    assert prune_snapshots(str(tmp_path), keep=3) == []
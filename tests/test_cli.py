@@ -0,0 +1,34 @@
+"""Conversión de los argumentos de la línea de comandos."""
+
+import pytest
+
+from finanzas.cli import main, month
+from finanzas.core import Ledger, epoch_day
+
+
+@pytest.mark.parametrize('value, expected', [('2024-01', '2024-01'), ('2024-1', '2024-01'), (' 2024-12', '2024-12')])
+def test_month_is_normalized(value, expected):
+    # El resumen compara los meses como texto: '2024-1' > '2024-09'
+    assert month(value) == expected
+
+
+@pytest.mark.parametrize('value', ['2024-13', '2024', 'enero'])
+def test_month_rejects_invalid(value):
+    with pytest.raises(ValueError):
+        month(value)
+
+
+def test_check_summary_reports_daily_table(tmp_path, capsys):
+    db = str(tmp_path / 'finanzas.db')
+    assert main(['--db', db, 'agregar', 'Gasto', 'Alimentos', '10', '--fecha', '2024-01-05']) == 0
+    assert main(['--db', db, 'verificar-resumen']) == 0
+    with Ledger.open(db) as ledger:
+        ledger.conn.execute('DELETE FROM resumen_diario')
+        ledger.conn.commit()
+    capsys.readouterr()
+    
+    assert main(['--db', db, 'verificar-resumen']) == 1
+    assert capsys.readouterr().out.splitlines() == [f"resumen_diario\t{epoch_day('2024-01-05')}\tGasto\tguardado=None"
+                                                    f"\tesperado=(1000, 1)", "1 diferencias"]
+    assert main(['--db', db, 'verificar-resumen', '--rebuild']) == 0
+    assert main(['--db', db, 'verificar-resumen']) == 0
@@ -0,0 +1,88 @@
+"""DBExecutor: canales, cancelación e interrupciones."""
+
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from finanzas.executor import DBExecutor
+
+# Consulta que tarda hasta que se la interrumpe (o unos segundos)
+SLOW_SQL = '''
+    WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c LIMIT ?)
+    SELECT COUNT(*) FROM c
+'''
+
+
+class Root:
+    # Lo único que el ejecutor usa de Tk: root.after; poll se llama a mano
+    def after(self, ms, func):
+        pass
+
+
+@pytest.fixture
+def executor(tmp_path):
+    executor = DBExecutor(Root(), str(tmp_path / 'finanzas.db'), readers=2)
+    yield executor
+    executor.close()
+
+
+def wait(executor, condition, timeout=10):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        assert time.perf_counter() < deadline, "el ejecutor no terminó a tiempo"
+        executor.poll()
+        time.sleep(0.005)
+
+
+def slow_job(started, rows):
+    def job(ledger):
+        started.set()
+        return ledger.conn.execute(SLOW_SQL, (rows,)).fetchone()[0]
+    return job
+
+
+def test_cancel_interrupts_only_its_channel(executor):
+    results = []
+    errors = []
+    started_a, started_b = threading.Event(), threading.Event()
+    executor.submit(slow_job(started_a, 10 ** 9), on_done=results.append, on_error=errors.append, channel='a')
+    executor.submit(slow_job(started_b, 3 * 10 ** 6), on_done=results.append, on_error=errors.append, channel='b')
+    assert started_a.wait(5) and started_b.wait(5)
+    
+    start = time.perf_counter()
+    executor.cancel('a')
+    wait(executor, lambda: results)
+    assert results == [3 * 10 ** 6]
+    
+    # El hilo de 'a' quedó libre enseguida y sin informar nada
+    executor.submit(lambda ledger: 'a otra vez', on_done=results.append, channel='a')
+    wait(executor, lambda: len(results) == 2)
+    assert results[1] == 'a otra vez'
+    assert errors == []
+    assert time.perf_counter() - start < 5
+
+
+def test_replaced_job_result_is_dropped(executor):
+    results = []
+    release = threading.Event()
+    executor.submit(lambda ledger: release.wait(5) and 'vieja', on_done=results.append, channel='h')
+    executor.submit(lambda ledger: 'nueva', on_done=results.append, channel='h')
+    release.set()
+    wait(executor, lambda: results)
+    time.sleep(0.05)
+    executor.poll()
+    assert results == ['nueva']
+
+
+def test_interrupted_current_job_is_reported(executor):
+    # Una interrupción que no vino de cancel() no se descarta en silencio
+    errors = []
+    
+    def interrupted(ledger):
+        raise sqlite3.OperationalError('interrupted')
+    
+    executor.submit(interrupted, on_error=errors.append, channel='c')
+    wait(executor, lambda: errors)
+    assert str(errors[0]) == 'interrupted'
@@ -0,0 +1,59 @@
+"""Importación de extractos CSV y OFX."""
+
+import io
+
+from finanzas.core.importer import import_statement
+
+
+def category_names(ledger):
+    return {nombre for _, nombre, _ in ledger.categories.all()}
+
+
+def rows(ledger):
+    return sorted((fecha, tipo, categoria, monto, descripcion)
+                  for _, fecha, tipo, categoria, monto, descripcion in ledger.transactions.page())
+
+
+def test_rejected_lines_create_no_categories(ledger):
+    before = category_names(ledger)
+    report = import_statement(ledger.conn, io.StringIO(
+        'fecha,tipo,categoria,monto\n'
+        '2024-01-05,Gasto,X,abc\n'
+        '2024-13-01,Gasto,Y,10\n'
+        '2024-01-05,Otro,Z,10\n'
+    ))
+    assert (report.imported, report.skipped, len(report.errors)) == (0, 3, 3)
+    assert category_names(ledger) == before
+    assert rows(ledger) == []
+
+
+def test_imports_valid_rows(ledger):
+    report = import_statement(ledger.conn, io.StringIO(
+        'Fecha;Monto;Categoría;Descripción\n'
+        '2024-01-05;-12.50;alimentos;super\n'
+        '2024-01-06;1000;Bonos;extra\n'
+        '2024-02-30;-5;Nueva;fecha mala\n'
+        '2024-01-07;;Nueva;sin monto\n'
+    ))
+    assert (report.imported, report.skipped) == (2, 2)
+    # Una categoría existente con otras mayúsculas no se duplica; una
+    # desconocida se crea con el tipo de la fila
+    assert rows(ledger) == [('2024-01-05', 'Gasto', 'Alimentos', 1250, 'super'),
+                            ('2024-01-06', 'Ingreso', 'Bonos', 100000, 'extra')]
+    assert 'alimentos' not in category_names(ledger)
+    assert ('Bonos', 'Ingreso') in [(nombre, tipo) for _, nombre, tipo in ledger.categories.all()]
+    assert 'Nueva' not in category_names(ledger)
+    assert ledger.summary.check() == []
+
+
+def test_imports_ofx(ledger):
+    report = import_statement(ledger.conn, io.StringIO(
+        '<OFX><BANKTRANLIST>'
+        '<STMTTRN><TRNAMT>-20.00<DTPOSTED>20240110120000<NAME>Farmacia<MEMO>remedios</STMTTRN>'
+        '<STMTTRN><TRNAMT>500<DTPOSTED>20240115</STMTTRN>'
+        '<STMTTRN><TRNAMT>x<DTPOSTED>20240116</STMTTRN>'
+        '</BANKTRANLIST></OFX>'
+    ), fmt='ofx')
+    assert (report.imported, report.skipped) == (2, 1)
+    assert rows(ledger) == [('2024-01-10', 'Gasto', 'Otros gastos', 2000, 'Farmacia remedios'),
+                            ('2024-01-15', 'Ingreso', 'Otros ingresos', 50000, '')]
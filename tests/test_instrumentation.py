@@ -0,0 +1,62 @@
+"""Claves de las consultas medidas por METRICS."""
+
+import pytest
+
+from finanzas.core import METRICS
+from finanzas.core.instrumentation import Metrics, query_key
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    monkeypatch.setattr(METRICS, 'enabled', True)
+    METRICS.reset()
+    yield METRICS
+    METRICS.reset()
+
+
+def sql_keys(metrics):
+    return {name for name in metrics.snapshot()['operaciones'] if name.startswith('sql: ')}
+
+
+def test_query_key_collapses_lists_and_branches():
+    assert query_key('SELECT *\n  FROM t\n  WHERE id IN (?, ?, ?)  AND x IN (?)') == \
+        'SELECT * FROM t WHERE id IN (?…) AND x IN (?…)'
+    assert query_key('SELECT * FROM t WHERE (a, b) < (?, ?)') == 'SELECT * FROM t WHERE (a, b) < (?, ?)'
+    
+    a = 'SELECT * FROM (SELECT x FROM t WHERE k IN (?, ?) ORDER BY x LIMIT ?)'
+    b = 'SELECT * FROM (SELECT x FROM t WHERE (x) < (?) ORDER BY x LIMIT ?)'
+    tail = ' ORDER BY x DESC LIMIT ?'
+    keys = {query_key(' UNION ALL '.join(branches) + tail) for branches in ([a, b], [b, a], [a, a, b], [b, b, a, b])}
+    assert keys == {f"{b} UNION ALL {a.replace('IN (?, ?)', 'IN (?…)')} UNION ALL …{tail}"}
+    assert query_key(f'{a} UNION ALL {a}{tail}') != query_key(f'{a} UNION ALL {b}{tail}')
+
+
+def test_slow_log_uses_query_key(ledger, tmp_path):
+    metrics = Metrics(enabled=True, slow_ms=0)
+    metrics.record_query(ledger.conn, 'SELECT id FROM transacciones\n WHERE id IN (?, ?)', (1, 2), 0.001)
+    entry, = metrics.slow_queries
+    assert entry['sql'] == 'SELECT id FROM transacciones WHERE id IN (?…)'
+    assert entry['parametros'] == ['1', '2'] and entry['plan']
+
+
+def test_id_lists_and_page_branches_share_keys(ledger, metrics):
+    categories = ledger.categories.cache()
+    names = ['Alimentos', 'Transporte', 'Vivienda', 'Entretenimiento']
+    for day in range(1, 29):
+        for number, name in enumerate(names):
+            ledger.transactions.add('Gasto', name, str(day * 10 + number), f'2024-01-{day:02d}', "Compra")
+    ids = [row[0] for row in ledger.transactions.page(limit=100)]
+    ids_for = [categories.id_of(name) for name in names]
+    
+    METRICS.reset()
+    for count in range(1, 20):
+        ledger.transactions.get(ids[:count])
+    assert len(sql_keys(metrics)) == 1
+    
+    METRICS.reset()
+    for count in range(2, len(names) + 1):
+        first = ledger.transactions.page(categoria_ids=ids_for[:count], order='monto', limit=5)
+        ledger.transactions.page(categoria_ids=ids_for[:count], order='monto', limit=5,
+                                 before=(first[-1][4], first[-1][0]))
+    unions = [name for name in sql_keys(metrics) if 'UNION ALL' in name]
+    assert 0 < len(unions) <= 2
@@ -0,0 +1,47 @@
+"""Generación de transacciones recurrentes."""
+
+
+def generated(ledger):
+    return ledger.conn.execute('''
+        SELECT recurrente_id, fecha, monto
+        FROM transacciones
+        WHERE recurrente_id IS NOT NULL
+        ORDER BY recurrente_id, fecha
+    ''').fetchall()
+
+
+def test_generate_is_idempotent(ledger):
+    rent = ledger.recurring.add('Gasto', 'Vivienda', '500', '2024-01-31', 'mensual', 1, 'alquiler', '2024-06-30')
+    salary = ledger.recurring.add('Ingreso', 'Salario', '1000', '2024-03-01', 'semanal', 2)
+    
+    ids = ledger.recurring.generate('2024-03-15')
+    assert sorted(ids) == [row[0] for row in ledger.conn.execute('SELECT id FROM transacciones ORDER BY id')]
+    assert generated(ledger) == [(rent, '2024-01-31', 50000), (rent, '2024-02-29', 50000),
+                                 (salary, '2024-03-01', 100000), (salary, '2024-03-15', 100000)]
+    assert ledger.recurring.generate('2024-03-15') == []
+    
+    # Los períodos perdidos se generan una sola vez y el fin de mes no se arrastra
+    assert len(ledger.recurring.generate('2024-04-30')) == 5
+    assert ledger.recurring.generate('2024-04-30') == []
+    assert [fecha for rule_id, fecha, _ in generated(ledger) if rule_id == rent] == [
+        '2024-01-31', '2024-02-29', '2024-03-31', '2024-04-30']
+    assert [fecha for rule_id, fecha, _ in generated(ledger) if rule_id == salary] == [
+        '2024-03-01', '2024-03-15', '2024-03-29', '2024-04-12', '2024-04-26']
+    
+    # Una regla que no llegó a avanzar (otro proceso generó sus ocurrencias)
+    # no las duplica: el índice único las descarta y la regla se pone al día
+    before = generated(ledger)
+    ledger.conn.execute("UPDATE recurrentes SET generadas = 0, proxima = inicio WHERE id = ?", (rent,))
+    ledger.conn.commit()
+    assert ledger.recurring.generate('2024-04-30') == []
+    assert generated(ledger) == before
+    assert ledger.conn.execute('SELECT proxima FROM recurrentes WHERE id = ?', (rent,)).fetchone()[0] == '2024-05-31'
+    
+    # Pasado el fin la regla no genera más
+    ids = ledger.recurring.generate('2025-01-01')
+    assert ledger.recurring.generate('2025-01-01') == []
+    assert [fecha for rule_id, fecha, _ in generated(ledger) if rule_id == rent][-3:] == [
+        '2024-04-30', '2024-05-31', '2024-06-30']
+    assert [fecha for rule_id, fecha, _ in generated(ledger) if rule_id == salary][-1] == '2024-12-20'
+    assert len(ids) == 2 + 17
+    assert ledger.summary.check() == []
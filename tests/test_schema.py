@@ -0,0 +1,95 @@
+"""Migración de bases creadas por versiones anteriores."""
+
+import sqlite3
+
+import pytest
+
+from finanzas.core import Ledger, epoch_day, migrate, schema_version
+from finanzas.core.schema import MIGRATIONS
+
+# Esquema que creaba la aplicación original, sin PRAGMA user_version
+BASELINE_SQL = '''
+    CREATE TABLE transacciones (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tipo TEXT NOT NULL,
+        categoria TEXT NOT NULL,
+        monto REAL NOT NULL,
+        fecha TEXT NOT NULL,
+        descripcion TEXT
+    );
+    CREATE TABLE categorias (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nombre TEXT NOT NULL UNIQUE,
+        tipo TEXT NOT NULL
+    );
+    INSERT INTO categorias (nombre, tipo) VALUES
+        ('Alimentos', 'Gasto'), ('Transporte', 'Gasto'), ('Vivienda', 'Gasto'), ('Entretenimiento', 'Gasto'),
+        ('Salario', 'Ingreso'), ('Freelance', 'Ingreso'), ('Inversiones', 'Ingreso');
+'''
+
+# Montos en coma flotante como los guardaba la aplicación original; Mascotas
+# no está en categorias, como las que se escribían a mano en el formulario
+BASELINE_ROWS = [
+    ('Gasto', 'Alimentos', 19.99, '2024-01-05', 'café y medialunas'),
+    ('Gasto', 'Alimentos', 0.1 + 0.2, '2024-01-31', 'chicle'),
+    ('Gasto', 'Mascotas', 1234.56, '2024-02-10', 'veterinario'),
+    ('Ingreso', 'Salario', 150000.0, '2024-02-01', 'sueldo'),
+    ('Gasto', 'Transporte', 12.345, '2024-03-15', 'taxi'),
+]
+
+
+def baseline_database(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SQL)
+    conn.executemany('INSERT INTO transacciones (tipo, categoria, monto, fecha, descripcion) VALUES (?, ?, ?, ?, ?)',
+                     BASELINE_ROWS)
+    conn.commit()
+    return conn
+
+
+@pytest.mark.parametrize('version', range(len(MIGRATIONS)))
+def test_migrates_to_latest(tmp_path, version):
+    # Desde la base original, o desde la que dejó cada versión intermedia
+    path = str(tmp_path / 'finanzas.db')
+    conn = baseline_database(path)
+    migrate(conn, target=version)
+    conn.close()
+    
+    with Ledger.open(path) as ledger:
+        assert schema_version(ledger.conn) == len(MIGRATIONS)
+        assert ledger.conn.execute('PRAGMA foreign_key_check').fetchall() == []
+        
+        rows = ledger.transactions.page()
+        assert [(tipo, categoria, monto, fecha, descripcion) for _, fecha, tipo, categoria, monto, descripcion
+                in reversed(rows)] == [
+            ('Gasto', 'Alimentos', 1999, '2024-01-05', 'café y medialunas'),
+            ('Gasto', 'Alimentos', 30, '2024-01-31', 'chicle'),
+            ('Ingreso', 'Salario', 15000000, '2024-02-01', 'sueldo'),
+            ('Gasto', 'Mascotas', 123456, '2024-02-10', 'veterinario'),
+            ('Gasto', 'Transporte', 1235, '2024-03-15', 'taxi'),
+        ]
+        assert ('Mascotas', 'Gasto') in [(nombre, tipo) for _, nombre, tipo in ledger.categories.all()]
+        
+        # Resúmenes, columna dia e índice de búsqueda quedan al día
+        assert ledger.summary.check() == []
+        assert ledger.summary.totals() == (15000000, 1999 + 30 + 123456 + 1235,
+                                           [('Mascotas', 123456), ('Alimentos', 2029), ('Transporte', 1235)])
+        assert ledger.summary.totals('2024-02', '2024-02')[:2] == (15000000, 123456)
+        assert all(dia == epoch_day(fecha) for fecha, dia in
+                   ledger.conn.execute('SELECT fecha, dia FROM transacciones'))
+        assert [row[5] for row in ledger.transactions.page(search='cafe')] == ['café y medialunas']
+        
+        # Y las escrituras nuevas los siguen manteniendo
+        ledger.transactions.add('Gasto', 'Mascotas', '10.00', '2024-02-11', 'alimento balanceado')
+        assert ledger.summary.check() == []
+        assert len(ledger.transactions.page(search='alimento')) == 1
+
+
+def test_migrate_is_idempotent(tmp_path):
+    path = str(tmp_path / 'finanzas.db')
+    baseline_database(path).close()
+    with Ledger.open(path) as ledger:
+        before = ledger.transactions.page()
+    with Ledger.open(path) as ledger:
+        assert schema_version(ledger.conn) == len(MIGRATIONS)
+        assert ledger.transactions.page() == before
@@ -0,0 +1,75 @@
+"""Servidor HTTP y RemoteLedger contra un servidor real en un hilo."""
+
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from finanzas.client import RemoteLedger
+from finanzas.core import ValidationError
+from finanzas.server import LedgerServer
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = LedgerServer(('127.0.0.1', 0), str(tmp_path))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.pool('libro', create=True)
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture
+def remote(server):
+    with RemoteLedger(f'http://127.0.0.1:{server.server_address[1]}', 'libro') as remote:
+        yield remote
+
+
+def test_get_by_ids(remote):
+    trans_id = remote.transactions.add('Gasto', 'Alimentos', '12.50', '2024-01-05', 'super')
+    remote.transactions.add('Gasto', 'Transporte', '3', '2024-01-06', 'taxi')
+    
+    assert remote.transactions.get([trans_id]) == [(trans_id, '2024-01-05', 'Gasto', 'Alimentos', 1250, 'super')]
+    # Una lista vacía no trae filas, ni desde el cliente ni pedida a mano
+    assert remote.transactions.get([]) == []
+    assert remote.request('GET', '/transactions', {'ids': ''}) == {'rows': []}
+    assert len(remote.request('GET', '/transactions', {'search': '', 'period': ''})['rows']) == 2
+
+
+def test_validation_errors(remote):
+    with pytest.raises(ValidationError):
+        remote.transactions.add('Gasto', 'No existe', '1', '2024-01-05')
+    with pytest.raises(ValidationError):
+        remote.request('GET', '/transactions', {'order': 'otro'})
+
+
+def test_group_commit_rolls_back_only_failed_operation(server, remote):
+    writer = server.pool('libro').writer
+    batches = writer.batches
+    
+    def add(descripcion):
+        return lambda ledger: ledger.transactions.add('Gasto', 'Alimentos', '1', '2024-01-05', descripcion)
+    
+    def add_then_fail(ledger):
+        # La primera alta de la operación también se deshace
+        ledger.transactions.add('Gasto', 'Alimentos', '2', '2024-01-05', 'deshecha')
+        ledger.transactions.add('Gasto', 'No existe', '2', '2024-01-05', 'inválida')
+    
+    def add_then_crash(ledger):
+        ledger.transactions.add('Gasto', 'Alimentos', '3', '2024-01-05', 'deshecha')
+        raise RuntimeError("falla")
+    
+    batch = [(func, Future()) for func in (add('primera'), add_then_fail, add_then_crash, add('última'))]
+    writer.write(batch)
+    
+    assert writer.batches == batches + 1
+    first, failed, crashed, last = (future for _, future in batch)
+    assert isinstance(failed.exception(), ValidationError)
+    assert isinstance(crashed.exception(), RuntimeError)
+    assert sorted(row[5] for row in remote.transactions.page()) == ['primera', 'última']
+    assert [row[0] for row in remote.transactions.get([first.result(), last.result()])] == [last.result(),
+                                                                                             first.result()]
+    assert remote.summary.totals() == (0, 200, [('Alimentos', 200)])
@@ -0,0 +1,70 @@
+"""Resúmenes mantenidos por triggers frente a recalcularlos desde transacciones."""
+
+import random
+
+import pytest
+
+
+def random_writes(ledger, rng, count):
+    categories = ledger.categories.all()
+    ids = [row[0] for row in ledger.transactions.page(limit=10 ** 6)]
+    for _ in range(count):
+        _, nombre, tipo = rng.choice(categories)
+        fecha = f'2024-{rng.randint(1, 4):02d}-{rng.randint(1, 28):02d}'
+        monto = f'{rng.randint(1, 50000) / 100:.2f}'
+        action = rng.random()
+        if action < 0.6 or not ids:
+            ids.append(ledger.transactions.add(tipo, nombre, monto, fecha, 'prueba'))
+        elif action < 0.85:
+            # Cambia tipo, categoría, mes, día y monto a la vez
+            ledger.transactions.update(rng.choice(ids), tipo, nombre, monto, fecha, 'cambiada')
+        else:
+            ledger.transactions.delete_many([ids.pop(rng.randrange(len(ids)))])
+
+
+@pytest.fixture
+def written(ledger):
+    random_writes(ledger, random.Random(3), 300)
+    return ledger
+
+
+def test_triggers_keep_summaries_consistent(written):
+    assert written.summary.check() == []
+    income, expenses, by_category = written.summary.totals()
+    assert (income, expenses) == tuple(written.conn.execute('''
+        SELECT COALESCE(SUM(CASE WHEN tipo = 'Ingreso' THEN monto END), 0),
+               COALESCE(SUM(CASE WHEN tipo = 'Gasto' THEN monto END), 0)
+        FROM transacciones
+    ''').fetchone())
+    assert sum(total for _, total in by_category) == expenses
+
+
+def test_check_reports_and_rebuild_repairs(written):
+    conn = written.conn
+    tipo, categoria_id, mes, total, cantidad = conn.execute(
+        'SELECT tipo, categoria_id, mes, total, cantidad FROM resumen_mensual ORDER BY mes LIMIT 1').fetchone()
+    conn.execute('UPDATE resumen_mensual SET total = total + 1 WHERE tipo = ? AND categoria_id = ? AND mes = ?',
+                 (tipo, categoria_id, mes))
+    dia, daily_tipo, daily_total, daily_cantidad = conn.execute(
+        'SELECT dia, tipo, total, cantidad FROM resumen_diario ORDER BY dia, tipo LIMIT 1').fetchone()
+    conn.execute('DELETE FROM resumen_diario WHERE dia = ? AND tipo = ?', (dia, daily_tipo))
+    conn.commit()
+    
+    expected = [('resumen_mensual', (tipo, categoria_id, mes), (total + 1, cantidad), (total, cantidad)),
+                ('resumen_diario', (dia, daily_tipo), None, (daily_total, daily_cantidad))]
+    assert written.summary.check() == expected
+    
+    assert written.summary.rebuild() == expected
+    assert written.summary.check() == []
+    
+    # Los triggers siguen funcionando sobre las tablas reconstruidas
+    random_writes(written, random.Random(4), 50)
+    assert written.summary.check() == []
+
+
+def test_check_reports_daily_drift_alone(written):
+    # Solo resumen_diario desviado: verificar-resumen no puede darlo por bueno
+    written.conn.execute('UPDATE resumen_diario SET cantidad = cantidad + 1')
+    written.conn.commit()
+    differences = written.summary.check()
+    assert differences and {table for table, _, _, _ in differences} == {'resumen_diario'}
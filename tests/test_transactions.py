@@ -0,0 +1,150 @@
+"""Paginación del historial comparada con ordenar y filtrar en Python."""
+
+import random
+import unicodedata
+from datetime import date, timedelta
+
+import pytest
+
+from finanzas.core import SORT_COLUMNS, sort_key
+from finanzas.core import transactions
+
+PAGE = 7
+
+DESCRIPTIONS = ['taxi al aeropuerto', 'taxi nocturno', 'supermercado', 'cena con amigos', 'cine', 'alquiler',
+                'sueldo', 'proyecto web', '', 'taxímetro']
+
+# Filtros de page(); categoria y categorias llevan nombres, que se traducen a ids
+FILTERS = [
+    {},
+    {'tipo': 'Gasto'},
+    {'categoria': 'Transporte'},
+    {'categorias': ['Alimentos', 'Ñandú', 'Salario']},
+    {'tipo': 'Gasto', 'categorias': ['Alimentos', 'Salario']},
+    {'start_date': '2024-02-01', 'end_date': '2024-03-15'},
+    {'min_amount': 500, 'max_amount': 5000},
+    {'tipo': 'Ingreso', 'min_amount': 1000},
+    {'categorias': ['Transporte', 'Éxito'], 'start_date': '2024-03-01'},
+    {'search': 'taxi'},
+    {'search': 'taxi', 'tipo': 'Gasto', 'max_amount': 3000},
+    {'search': '"taxi nocturno"'},
+]
+
+
+@pytest.fixture
+def history(ledger):
+    # Filas con fechas y montos repetidos, para que el id tenga que desempatar
+    ledger.categories.add('Ñandú', 'Gasto')
+    ledger.categories.add('Éxito', 'Ingreso')
+    categories = ledger.categories.all()
+    rng = random.Random(7)
+    rows = []
+    for _ in range(300):
+        _, nombre, tipo = rng.choice(categories)
+        fecha = (date(2024, 1, 1) + timedelta(days=rng.randrange(90))).isoformat()
+        rows.append((tipo, nombre, rng.choice([100, 250, 999, 1000, 4999, 5000, 12000]), fecha,
+                     rng.choice(DESCRIPTIONS)))
+    ledger.conn.executemany('''
+        INSERT INTO transacciones (tipo, categoria_id, monto, fecha, descripcion)
+        SELECT ?, id, ?, ?, ? FROM categorias WHERE nombre = ?
+    ''', [(tipo, monto, fecha, descripcion, nombre) for tipo, nombre, monto, fecha, descripcion in rows])
+    ledger.conn.commit()
+    return ledger
+
+
+def page_arguments(ledger, filters):
+    ids = {nombre: cat_id for cat_id, nombre, _ in ledger.categories.all()}
+    arguments = dict(filters)
+    if 'categoria' in arguments:
+        arguments['categoria_id'] = ids[arguments.pop('categoria')]
+    if 'categorias' in arguments:
+        arguments['categoria_ids'] = [ids[nombre] for nombre in arguments.pop('categorias')]
+    return arguments
+
+
+def fold(text):
+    # Como el tokenizador de la búsqueda: sin mayúsculas ni diacríticos
+    return ''.join(char for char in unicodedata.normalize('NFD', text.lower()) if not unicodedata.combining(char))
+
+
+def matches(row, filters):
+    _, fecha, tipo, categoria, monto, descripcion = row
+    words = fold(descripcion).split()
+    search = filters.get('search', '')
+    if search.startswith('"'):
+        found = search.strip('"') in ' '.join(words)
+    else:
+        found = all(any(word.startswith(term) for word in words) for term in search.split())
+    return (found
+            and filters.get('tipo', tipo) == tipo
+            and filters.get('categoria', categoria) == categoria
+            and categoria in filters.get('categorias', [categoria])
+            and filters.get('start_date', fecha) <= fecha <= filters.get('end_date', fecha)
+            and filters.get('min_amount', monto) <= monto <= filters.get('max_amount', monto))
+
+
+def expected_rows(ledger, filters, order, descending):
+    rows = ledger.conn.execute('''
+        SELECT t.id, t.fecha, t.tipo, c.nombre, t.monto, t.descripcion
+        FROM transacciones t
+        JOIN categorias c ON c.id = t.categoria_id
+    ''').fetchall()
+    return sorted((row for row in rows if matches(row, filters)),
+                  key=lambda row: sort_key(row, order), reverse=descending)
+
+
+def check_pages(ledger, filters, order, descending):
+    arguments = page_arguments(ledger, filters)
+    pages = []
+    key = None
+    while True:
+        page = ledger.transactions.page(before=key, limit=PAGE, order=order, descending=descending, **arguments)
+        if not page:
+            break
+        pages.append(page)
+        key = sort_key(page[-1], order)
+    
+    assert [row for page in pages for row in page] == expected_rows(ledger, filters, order, descending)
+    # La página anterior a cada una es la que se mostró antes
+    for previous, page in zip(pages, pages[1:]):
+        assert ledger.transactions.page(after=sort_key(page[0], order), limit=PAGE, order=order,
+                                        descending=descending, **arguments) == previous
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+@pytest.mark.parametrize('descending', [True, False])
+@pytest.mark.parametrize('order', SORT_COLUMNS)
+def test_page_matches_python_sort(history, order, descending, filters):
+    check_pages(history, filters, order, descending)
+
+
+@pytest.mark.parametrize('filters', [{'search': 'taxi'}, {'search': 'taxi', 'start_date': '2024-02-01'}])
+@pytest.mark.parametrize('descending', [True, False])
+def test_page_search_scan_matches_python_sort(history, monkeypatch, descending, filters):
+    # Con muchas coincidencias la búsqueda recorre el historial en orden en
+    # lugar de ordenar las coincidencias
+    monkeypatch.setattr(transactions, 'SEARCH_SCAN_THRESHOLD', 1)
+    check_pages(history, filters, 'fecha', descending)
+
+
+def test_page_empty_category_intersection(history):
+    assert history.transactions.page(**page_arguments(history, {'categoria': 'Transporte',
+                                                                'categorias': ['Alimentos']})) == []
+
+
+@pytest.mark.parametrize('bulk_rows', [5, 10 ** 9])
+def test_delete_many(history, monkeypatch, bulk_rows):
+    # Con bulk_rows = 5 el borrado amplía la caché y la restaura después
+    monkeypatch.setattr(transactions, 'BULK_DELETE_ROWS', bulk_rows)
+    cache_size = history.conn.execute('PRAGMA cache_size').fetchone()[0]
+    ids = [row[0] for row in expected_rows(history, {}, 'fecha', True)]
+    doomed = ids[::3] + [10 ** 9]
+    
+    assert history.transactions.delete_many(doomed) == len(ids[::3])
+    assert [row[0] for row in expected_rows(history, {}, 'fecha', True)] == [
+        trans_id for trans_id in ids if trans_id not in set(doomed)]
+    assert history.conn.execute('PRAGMA cache_size').fetchone()[0] == cache_size
+    assert history.summary.check() == []
+    assert history.transactions.page(search='taxi', limit=10 ** 6) == expected_rows(
+        history, {'search': 'taxi'}, 'fecha', True)
+    assert history.transactions.delete_many([]) == 0
@@ -0,0 +1,222 @@
+"""BarChart sobre un Canvas de Tk real, que necesita una pantalla (xvfb-run
+sirve), y sobre un Canvas de reemplazo que corre sin ella."""
+
+import itertools
+import time
+from types import SimpleNamespace
+
+import pytest
+
+tk = pytest.importorskip('tkinter')
+
+from finanzas import widgets
+from finanzas.core import format_amount
+from finanzas.widgets import (CHART_LABEL_WIDTH, CHART_MARGIN, CHART_ROW_HEIGHT, CHART_VALUE_WIDTH,
+                              BarChart)
+
+# Categorías de la prueba grande y lo que pueden tardar en dibujarse
+MANY_CATEGORIES = 1000
+MANY_CATEGORIES_SECONDS = 2
+
+
+@pytest.fixture
+def root():
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("sin pantalla")
+    root.geometry('600x300')
+    yield root
+    root.destroy()
+
+
+@pytest.fixture
+def chart(root):
+    chart = BarChart(root)
+    chart.pack(fill=tk.BOTH, expand=True)
+    root.update()
+    return chart
+
+
+def bar_right(chart, label):
+    return chart.canvas.coords(chart.rows[label][1])[2]
+
+
+def label_y(chart, label):
+    return chart.canvas.coords(chart.rows[label][0])[1]
+
+
+def check_scale(chart):
+    # La barra más larga llega hasta el espacio reservado para los importes
+    room = chart.width - CHART_LABEL_WIDTH - CHART_VALUE_WIDTH - CHART_MARGIN
+    for label, row in chart.rows.items():
+        assert bar_right(chart, label) == pytest.approx(CHART_LABEL_WIDTH + room * row[4] / chart.maximum)
+        assert chart.canvas.coords(row[2])[0] == pytest.approx(bar_right(chart, label) + 6)
+
+
+def test_draws_rows(chart, root):
+    chart.set_data([('Alimentos', 30000), ('Transporte', 15000), ('Vivienda', 0)])
+    root.update()
+    
+    assert chart.width == chart.canvas.winfo_width()
+    check_scale(chart)
+    assert bar_right(chart, 'Vivienda') == pytest.approx(CHART_LABEL_WIDTH)
+    assert [label_y(chart, label) for label in ('Alimentos', 'Transporte', 'Vivienda')] == [
+        CHART_MARGIN + CHART_ROW_HEIGHT * (position + 0.5) for position in range(3)]
+    assert chart.canvas.itemcget(chart.rows['Alimentos'][2], 'text') == f"${format_amount(30000)}"
+    assert chart.canvas.itemcget(chart.empty, 'state') == 'hidden'
+    assert [float(value) for value in chart.canvas.cget('scrollregion').split()] == [
+        0, 0, chart.width, CHART_MARGIN * 2 + 3 * CHART_ROW_HEIGHT]
+
+
+def test_resize_rescales_bars(chart, root):
+    chart.set_data([('Alimentos', 30000), ('Transporte', 15000)])
+    root.update()
+    width = chart.width
+    
+    root.geometry('900x300')
+    root.update()
+    assert chart.width == chart.canvas.winfo_width() > width
+    check_scale(chart)
+    
+    root.geometry('400x300')
+    root.update()
+    assert chart.width == chart.canvas.winfo_width() < width
+    check_scale(chart)
+
+
+def test_set_data_reuses_items(chart, root):
+    chart.set_data([('A', 100), ('B', 200), ('C', 300)])
+    root.update()
+    items = {label: row[:3] for label, row in chart.rows.items()}
+    
+    chart.set_data([('C', 300), ('A', 150), ('D', 50)])
+    root.update()
+    assert chart.rows['A'][:3] == items['A']
+    assert chart.rows['C'][:3] == items['C']
+    assert all(not chart.canvas.find_withtag(item) for item in items['B'])
+    # Tres ítems por fila, el eje y el texto de vacío
+    assert len(chart.canvas.find_all()) == 3 * 3 + 2
+    assert label_y(chart, 'C') < label_y(chart, 'A') < label_y(chart, 'D')
+    assert chart.canvas.itemcget(chart.rows['A'][2], 'text') == f"${format_amount(150)}"
+    check_scale(chart)
+    
+    # Un máximo nuevo reescala todas las barras
+    chart.set_data([('C', 300), ('A', 600), ('D', 50)])
+    root.update()
+    check_scale(chart)
+
+
+def many_rows(count=MANY_CATEGORIES):
+    return [(f'Categoría {number:04d}', (count - number) * 137) for number in range(count)]
+
+
+def test_draws_many_categories(chart, root):
+    rows = many_rows()
+    start = time.perf_counter()
+    chart.set_data(rows)
+    root.update()
+    assert time.perf_counter() - start < MANY_CATEGORIES_SECONDS
+    
+    assert len(chart.canvas.find_all()) == 3 * MANY_CATEGORIES + 2
+    check_scale(chart)
+    assert float(chart.canvas.cget('scrollregion').split()[3]) == CHART_MARGIN * 2 + MANY_CATEGORIES * CHART_ROW_HEIGHT
+    
+    # Los mismos datos otra vez no crean ni mueven nada; un tamaño nuevo solo reescala
+    items = set(chart.canvas.find_all())
+    chart.set_data(rows)
+    root.geometry('900x300')
+    root.update()
+    assert set(chart.canvas.find_all()) == items
+    check_scale(chart)
+
+
+def test_empty_data(chart, root):
+    chart.set_data([('A', 100)])
+    chart.set_data([])
+    root.update()
+    assert chart.rows == {}
+    assert len(chart.canvas.find_all()) == 2
+    assert chart.canvas.itemcget(chart.empty, 'state') == 'normal'
+
+
+class StubCanvas:
+    # Lo que BarChart usa de tk.Canvas, sin dibujar: cada ítem guarda su tipo,
+    # coordenadas y opciones, así la prueba corre sin pantalla
+    def __init__(self, master, **options):
+        self.items = {}
+        self.ids = itertools.count(1)
+        self.options = options
+    
+    def create(self, kind, coords, options):
+        item = next(self.ids)
+        self.items[item] = SimpleNamespace(kind=kind, coords=list(coords), options=options)
+        return item
+    
+    def create_text(self, *coords, **options):
+        return self.create('text', coords, options)
+    
+    def create_rectangle(self, *coords, **options):
+        return self.create('rectangle', coords, options)
+    
+    def create_line(self, *coords, **options):
+        return self.create('line', coords, options)
+    
+    def coords(self, item, *coords):
+        if coords:
+            self.items[item].coords = list(coords)
+        return self.items[item].coords
+    
+    def itemconfigure(self, item, **options):
+        self.items[item].options.update(options)
+    
+    def delete(self, *items):
+        for item in items:
+            del self.items[item]
+    
+    def configure(self, **options):
+        self.options.update(options)
+    
+    def find_all(self):
+        return tuple(self.items)
+    
+    def pack(self, **options):
+        pass
+    
+    def bind(self, sequence, func):
+        pass
+    
+    def yview(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_chart(monkeypatch):
+    monkeypatch.setattr(widgets.ttk.Frame, '__init__', lambda self, master, **kwargs: None)
+    scrollbar = SimpleNamespace(pack=lambda **options: None, set=None)
+    monkeypatch.setattr(widgets.ttk, 'Scrollbar', lambda *args, **kwargs: scrollbar)
+    monkeypatch.setattr(widgets.tk, 'Canvas', StubCanvas)
+    chart = BarChart(None)
+    chart.on_resize(SimpleNamespace(width=600))
+    return chart
+
+
+def test_many_categories_without_display(stub_chart):
+    canvas = stub_chart.canvas
+    rows = many_rows()
+    stub_chart.set_data(rows)
+    assert len(canvas.find_all()) == 3 * MANY_CATEGORIES + 2
+    assert canvas.options['scrollregion'] == (0, 0, 600, CHART_MARGIN * 2 + MANY_CATEGORIES * CHART_ROW_HEIGHT)
+    
+    room = 600 - CHART_LABEL_WIDTH - CHART_VALUE_WIDTH - CHART_MARGIN
+    for position, (label, value) in enumerate(rows):
+        text, bar, amount = (canvas.items[item] for item in stub_chart.rows[label][:3])
+        assert text.options['text'] == label
+        assert amount.options['text'] == f"${format_amount(value)}"
+        assert text.coords[1] == CHART_MARGIN + CHART_ROW_HEIGHT * (position + 0.5)
+        assert bar.coords[2] == pytest.approx(CHART_LABEL_WIDTH + room * value / rows[0][1])
+    
+    # Quitar la mitad de las filas borra sus ítems y reacomoda el resto
+    stub_chart.set_data(rows[::2])
+    assert len(canvas.find_all()) == 3 * (MANY_CATEGORIES // 2) + 2
+    assert canvas.items[stub_chart.rows[rows[2][0]][0]].coords[1] == CHART_MARGIN + CHART_ROW_HEIGHT * 1.5